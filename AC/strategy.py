@@ -1,9 +1,12 @@
+import os
 import sys
-sys.path.append(r"E:\StockIndexCTA")
+# 直接运行本文件时把项目根目录加入搜索路径 (也可用 python -m CTA_BT 运行)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from CTA_BT.CTA_BTv3 import BaseStrategy, run_backtest
+from CTA_BT.indicators import RollingMean
+from CTA_BT.kernels import exit_on
 import numpy as np
-import pandas as pd
 
 class ACStrategy(BaseStrategy):
 
@@ -13,12 +16,8 @@ class ACStrategy(BaseStrategy):
     name = f'{symbol}_AC_{n1}_{n2}'
     min_date = 20160101
 
-    def getOrgData(self):
-        path = fr"E:\StockIndexCTA\Data\{self.symbol}_{self.td}.csv"
-        self.raw_data = pd.read_csv(path)
-
     def prepare_data(self):
-        arr = self.raw_data.values
+        arr = self.raw_data
 
         # 1:开盘价, 2:收盘价, 3:最高价, 4:最低价
         self.openPrice = arr[:, 1]
@@ -30,20 +29,19 @@ class ACStrategy(BaseStrategy):
         
         # 1. 中间价
         median_price = (self.highPrice + self.lowPrice) / 2.0
-        mp_series = pd.Series(median_price)
 
         # 2. AO
         n1 = self.n1
         n2 = self.n2
         
-        sma_fast = mp_series.rolling(window=n1).mean()
-        sma_slow = mp_series.rolling(window=n2).mean()
+        sma_fast = self.cache.rolling_mean("mp", median_price, n1)
+        sma_slow = self.cache.rolling_mean("mp", median_price, n2)
         ao = sma_fast - sma_slow
 
         # 3. AC
-        sma_ao = ao.rolling(window=n1).mean()
+        sma_ao = self.cache.rolling_mean(f"ao_{n1}_{n2}", ao, n1)
         ac_series = ao - sma_ao
-        self.ac_series = ac_series.values 
+        self.ac_series = ac_series 
         
         # --- 向量化逻辑准备 ---
         
@@ -75,36 +73,52 @@ class ACStrategy(BaseStrategy):
         sell_cond_pos = (ac > 0) & is_falling_1 & is_falling_2 & is_falling_3
         raw_sell_signal = (sell_cond_neg | sell_cond_pos)
         
-        # --- 状态机模拟 ---
-        # 初始化
-        pos_arr = np.zeros(len(ac))
-        current_pos = 0.0
-        
-        start_idx = n2
-        ac_vals = ac
-        p1_vals = p1
-        buy_sigs = raw_buy_signal.astype(bool)
-        sell_sigs = raw_sell_signal.astype(bool)
-        
-        for i in range(start_idx, len(ac)):
-            
-            # 1. 强制出场逻辑
-            if current_pos == 1 and ac_vals[i] < p1_vals[i]:
-                current_pos = 0
-            elif current_pos == -1 and ac_vals[i] > p1_vals[i]:
-                current_pos = 0
-                
-            # 2. 入场逻辑
-            # 有信号则买入
-            if buy_sigs[i]:
-                current_pos = -1
-            # 有信号则卖出
-            elif sell_sigs[i]:
-                current_pos = 1
-            
-            pos_arr[i] = current_pos
-            
-        self.target_positions = pos_arr
+        # --- 状态机 (kernels.exit_on) ---
+        # 1. 强制出场: 持多且 AC 下降 / 持空且 AC 上升时平仓
+        # 2. 入场: 买入信号开空, 卖出信号开多 (同一分钟入场优先于出场)
+        entry = np.where(raw_buy_signal, -1, np.where(raw_sell_signal, 1, 0))
+        self.target_positions = exit_on(entry, ac < p1, ac > p1, start=n2)
+
+    def init_stream(self):
+        # 实盘逐根推送: AO / AC 的三条均线逐根更新, 入场与强制出场按 exit_on 的规则逐根推进
+        arr = self.raw_data
+        self.openPrice = arr[:, 1]
+        self.highPrice = arr[:, 3]
+        self.lowPrice = arr[:, 4]
+        self.closePrice = arr[:, 2]
+
+        n = len(arr)
+        self.ac_series = np.full(n, np.nan)
+        self.target_positions = np.zeros(n)
+        self._sma_fast = RollingMean(self.n1)
+        self._sma_slow = RollingMean(self.n2)
+        self._sma_ao = RollingMean(self.n1)
+        self._position = 0.0
+        return True
+
+    def update_stream(self, i):
+        median_price = (self.highPrice[i] + self.lowPrice[i]) / 2.0
+        ao = self._sma_fast.update(median_price) - self._sma_slow.update(median_price)
+        ac = self.ac_series
+        ac[i] = ao - self._sma_ao.update(ao)
+        if i < self.n2:
+            return
+
+        a, p1, p2, p3 = ac[i], ac[i - 1], ac[i - 2], ac[i - 3]
+        buy = ((a > 0) & (a > p1) & (p1 > p2)) | ((a < 0) & (a > p1) & (p1 > p2) & (p2 > p3))
+        sell = ((a < 0) & (a < p1) & (p1 < p2)) | ((a > 0) & (a < p1) & (p1 < p2) & (p2 < p3))
+        cur = self._position
+        if (cur > 0 and a < p1) or (cur < 0 and a > p1):
+            cur = 0.0
+        if buy:
+            cur = -1.0
+        elif sell:
+            cur = 1.0
+        self._position = self.target_positions[i] = cur
+
+    def GetPositions(self, start):
+        # 目标仓位已在 prepare_data 中整日算好, 直接走向量化结算
+        return self.target_positions
 
     def GetSig(self, i):
         self.prePosition = self.position
@@ -1,9 +1,12 @@
+import os
 import sys
-sys.path.append(r"E:\StockIndexCTA")
+# 直接运行本文件时把项目根目录加入搜索路径 (也可用 python -m CTA_BT 运行)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from CTA_BT.CTA_BTv3 import BaseStrategy, run_backtest
+from CTA_BT.indicators import EMA, RollingMean, ema
+from CTA_BT.kernels import latch
 import numpy as np
-import pandas as pd
 
 class ADXStrategy(BaseStrategy):
     # 策略配置
@@ -13,14 +16,9 @@ class ADXStrategy(BaseStrategy):
     name = f'{symbol}_ADX_{N}'
     min_date = 20160101
 
-    def getOrgData(self):
-        # 获取原始数据
-        path = fr"E:\StockIndexCTA\Data\{self.symbol}_{self.td}.csv"
-        self.raw_data = pd.read_csv(path)
-
     def prepare_data(self):
         # 准备数据
-        arr = self.raw_data.values
+        arr = self.raw_data
         
         # 提取价格数据 (BaseStrategy需要)
         self.openPrice = arr[:, 1]
@@ -30,51 +28,94 @@ class ADXStrategy(BaseStrategy):
         
         # --- 指标计算 ---
         
-        # 1. TR (真实波幅)
-        prev_close = pd.Series(self.closePrice).shift(1)
-        tr1 = pd.Series(self.highPrice) - pd.Series(self.lowPrice)
-        tr2 = (pd.Series(self.highPrice) - prev_close).abs()
-        tr3 = (prev_close - pd.Series(self.lowPrice)).abs()
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        # 1. TR (真实波幅) 与 3. DM (方向移动): 与周期 N 无关, 同日各参数组合共享
+        tr, plus_dm, minus_dm = self.cache.adx_components(
+            self.highPrice, self.lowPrice, self.closePrice)
         
         # 2. MTR (平滑真实波幅) = EMA(TR, N)
-        mtr = tr.ewm(span=self.N, adjust=False).mean()
-        
-        # 3. DM (方向移动)
-        hd = pd.Series(self.highPrice) - pd.Series(self.highPrice).shift(1)
-        ld = pd.Series(self.lowPrice).shift(1) - pd.Series(self.lowPrice)
-        
-        plus_dm = np.where((hd > 0) & (hd > ld), hd, 0.0)
-        minus_dm = np.where((ld > 0) & (ld > hd), ld, 0.0)
-        
-        plus_dm = pd.Series(plus_dm, index=pd.Series(self.highPrice).index)
-        minus_dm = pd.Series(minus_dm, index=pd.Series(self.lowPrice).index)
+        mtr = self.cache.ema("tr", tr, span=self.N)
         
-        dmp = plus_dm.ewm(span=self.N, adjust=False).mean()
-        dmm = minus_dm.ewm(span=self.N, adjust=False).mean()
+        dmp = self.cache.ema("plus_dm", plus_dm, span=self.N)
+        dmm = self.cache.ema("minus_dm", minus_dm, span=self.N)
         
-        # 4. DI (方向指数)
-        pdi = (dmp / mtr) * 100
-        mdi = (dmm / mtr) * 100
-        
-        # 5. DX (动向指数)
-        denom = pdi + mdi
-        dx = (abs(pdi - mdi) / denom) * 100
-        dx = dx.fillna(0)
+        # 4. DI (方向指数) 与 5. DX (动向指数); 0/0 得到 NaN 后按 0 处理, 与原 pandas 写法相同不告警
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pdi = (dmp / mtr) * 100
+            mdi = (dmm / mtr) * 100
+            denom = pdi + mdi
+            dx = (abs(pdi - mdi) / denom) * 100
+        dx = np.where(np.isnan(dx), 0.0, dx)
         
         # 6. ADX (平均动向指数) = EMA(DX, N)
-        adx = dx.ewm(span=self.N, adjust=False).mean()
+        adx = ema(dx, span=self.N)
         
         # 7. MA (简单移动平均线)
-        ma = pd.Series(self.closePrice).rolling(window=60).mean()
+        ma = self.cache.rolling_mean("close", self.closePrice, 60)
         # 可以改用EMA        
 
 
         # 存储计算结果
-        self.adx_arr = adx.values
-        self.ma_arr = ma.values
+        self.adx_arr = adx
+        self.ma_arr = ma
+        self.close_arr = self.closePrice
+
+    def init_stream(self):
+        # 实盘逐根推送: TR / DM 逐根计算, 各 EMA 与均线逐根更新, 与 prepare_data 逐位相同
+        arr = self.raw_data
+        self.openPrice = arr[:, 1]
+        self.closePrice = arr[:, 2]
+        self.highPrice = arr[:, 3]
+        self.lowPrice = arr[:, 4]
         self.close_arr = self.closePrice
 
+        n = len(arr)
+        self.adx_arr = np.full(n, np.nan)
+        self.ma_arr = np.full(n, np.nan)
+        self._mtr = EMA(span=self.N)
+        self._dmp = EMA(span=self.N)
+        self._dmm = EMA(span=self.N)
+        self._adx = EMA(span=self.N)
+        self._ma = RollingMean(60)
+        return True
+
+    def update_stream(self, i):
+        high, low, close = self.highPrice, self.lowPrice, self.closePrice
+        # 首根K线没有前收盘价: TR 取 最高 - 最低, DM 为 0 (同 pandas shift 后的 NaN 处理)
+        tr = high[i] - low[i]
+        plus_dm = minus_dm = 0.0
+        if i > 0:
+            prev_close = close[i - 1]
+            tr = max(tr, abs(high[i] - prev_close), abs(prev_close - low[i]))
+            hd = high[i] - high[i - 1]
+            ld = low[i - 1] - low[i]
+            plus_dm = hd if hd > 0 and hd > ld else 0.0
+            minus_dm = ld if ld > 0 and ld > hd else 0.0
+
+        mtr = np.float64(self._mtr.update(tr))
+        dmp = self._dmp.update(plus_dm)
+        dmm = self._dmm.update(minus_dm)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pdi = (dmp / mtr) * 100
+            mdi = (dmm / mtr) * 100
+            dx = (abs(pdi - mdi) / (pdi + mdi)) * 100
+        if dx != dx:
+            dx = 0.0
+        self.adx_arr[i] = self._adx.update(dx)
+        self.ma_arr[i] = self._ma.update(close[i])
+
+    def GetPositions(self, start):
+        # 均线交叉且趋势够强时给出信号, 其余分钟维持原有仓位 (持有直到反向信号)
+        close, ma = self.close_arr, self.ma_arr
+        cross_up = np.zeros(len(close), dtype=bool)
+        cross_down = np.zeros(len(close), dtype=bool)
+        cross_up[1:] = (close[1:] > ma[1:]) & (close[:-1] <= ma[:-1])
+        cross_down[1:] = (close[1:] < ma[1:]) & (close[:-1] >= ma[:-1])
+        is_trend_strong = self.adx_arr > self.ADX_THRESHOLD
+
+        # 反向: 向上突破开空, 向下突破开多
+        sig = np.where(cross_up & is_trend_strong, -1, np.where(cross_down & is_trend_strong, 1, 0))
+        return latch(sig, max(start, self.N))
+
     def GetSig(self, i):
 
         if i < self.N:
@@ -1,9 +1,12 @@
+import os
 import sys
-sys.path.append(r"E:\StockIndexCTA")
+# 直接运行本文件时把项目根目录加入搜索路径 (也可用 python -m CTA_BT 运行)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from CTA_BT.CTA_BTv3 import BaseStrategy, run_backtest
+from CTA_BT.indicators import LastPeak, LastTrough, RollingMean, last_peak, last_trough
+from CTA_BT.kernels import latch
 import numpy as np
-import pandas as pd
 
 class AOStrategy(BaseStrategy):
     # 策略配置
@@ -16,17 +19,12 @@ class AOStrategy(BaseStrategy):
     name = f'{symbol}_AO_{NDAY}_{MDAY}'
     min_date = 20160101
 
-    def getOrgData(self):
-        # 获取原始数据
-        path = fr"E:\StockIndexCTA\Data\{self.symbol}_{self.td}.csv"
-        self.raw_data = pd.read_csv(path)
-
     def prepare_data(self):
         # 准备数据
-        if self.raw_data is None or self.raw_data.empty:
+        if self.raw_data is None or len(self.raw_data) == 0:
             return
 
-        arr = self.raw_data.values
+        arr = self.raw_data
         
         # 提取价格数据
         self.openPrice = arr[:, 1]
@@ -39,93 +37,98 @@ class AOStrategy(BaseStrategy):
         mp = (self.highPrice + self.lowPrice) / 2.0
         
         # 2. 计算 AO = SMA(MP, nDay) - SMA(MP, mDay)
-        mp_series = pd.Series(mp)
-        sma_n = mp_series.rolling(window=self.NDAY).mean()
-        sma_m = mp_series.rolling(window=self.MDAY).mean()
-        self.ao = (sma_n - sma_m).values
+        # 碟形 / 双峰是相邻 AO 的大小比较, 对末位误差敏感; 均值须与 pandas rolling 逐位相同
+        sma_n = self.cache.rolling_mean("mp", mp, self.NDAY)
+        sma_m = self.cache.rolling_mean("mp", mp, self.MDAY)
+        self.ao = sma_n - sma_m
 
-    def GetSig(self, i):
-        # 暖身期检查
-        if i < self.MDAY + 2:
-            self.prePosition = self.position
-            self.position = 0
-            return
+        # 3. 双峰所需的极值索引: 自上次穿越零轴以来最近的局部低点 / 高点
+        self.last_trough = last_trough(self.ao)
+        self.last_peak = last_peak(self.ao)
 
-        # 获取当前及之前的 AO 值
-        ao_curr = self.ao[i]        # t
-        ao_prev = self.ao[i-1]      # t-1
-        ao_prev2 = self.ao[i-2]     # t-2
-        
-        # 信号逻辑:
-        sig = self.position # 默认维持原有仓位
-        
-        buy_signal = False
-        sell_signal = False
+    def init_stream(self):
+        # 实盘逐根推送: 两条均线逐根更新; 局部极值要等下一根K线才能确认,
+        # 第 i 根到达时写入第 i-1 项, GetSig(i) 只用到第 i-2 项
+        arr = self.raw_data
+        self.openPrice = arr[:, 1]
+        self.closePrice = arr[:, 2]
+        self.highPrice = arr[:, 3]
+        self.lowPrice = arr[:, 4]
+
+        n = len(arr)
+        self.ao = np.full(n, np.nan)
+        self.last_trough = np.full(n, -1, dtype=np.int64)
+        self.last_peak = np.full(n, -1, dtype=np.int64)
+        self._sma_n = RollingMean(self.NDAY)
+        self._sma_m = RollingMean(self.MDAY)
+        self._trough = LastTrough()
+        self._peak = LastPeak()
+        return True
+
+    def update_stream(self, i):
+        mp = (self.highPrice[i] + self.lowPrice[i]) / 2.0
+        ao = self._sma_n.update(mp) - self._sma_m.update(mp)
+        self.ao[i] = ao
+        trough, peak = self._trough.update(ao), self._peak.update(ao)
+        if i > 0:
+            self.last_trough[i - 1] = trough
+            self.last_peak[i - 1] = peak
+
+    def _signals(self, i):
+        # 第 i 分钟的买入 / 卖出信号; i 可为标量或整数数组
+        ao = self.ao
+        ao_curr = ao[i]        # t
+        ao_prev = ao[i - 1]    # t-1
+        ao_prev2 = ao[i - 2]   # t-2
 
         # 1. 零轴穿越 (Zero Cross)
-        if ao_prev < 0 and ao_curr > 0:
-            buy_signal = True
-        elif ao_prev > 0 and ao_curr < 0:
-            sell_signal = True
+        cross_buy = (ao_prev < 0) & (ao_curr > 0)
+        cross_sell = (ao_prev > 0) & (ao_curr < 0)
 
         # 2. 碟形 (Saucer)
-        if not buy_signal and not sell_signal:
-            # 买入: AO > 0, 探底回升
-            if ao_curr > 0 and ao_prev > 0 and ao_prev2 > 0:
-                if ao_curr > ao_prev and ao_prev < ao_prev2:
-                    buy_signal = True
-            # 卖出: AO < 0, 探顶回落
-            if ao_curr < 0 and ao_prev < 0 and ao_prev2 < 0:
-                if ao_curr < ao_prev and ao_prev > ao_prev2:
-                    sell_signal = True
+        # 买入: AO > 0, 探底回升; 卖出: AO < 0, 探顶回落
+        saucer_buy = (ao_curr > 0) & (ao_prev > 0) & (ao_prev2 > 0) & \
+                     (ao_curr > ao_prev) & (ao_prev < ao_prev2)
+        saucer_sell = (ao_curr < 0) & (ao_prev < 0) & (ao_prev2 < 0) & \
+                      (ao_curr < ao_prev) & (ao_prev > ao_prev2)
 
         # 3. 双峰 (Twin Peaks)
-        if not buy_signal and not sell_signal:
-            lookback = self.MDAY
-            start_idx = max(0, i - lookback)
-            
-            # 双峰买入
-            if ao_curr < 0 and ao_curr > ao_prev and ao_prev < ao_prev2:
-                second_bottom_val = ao_prev
-                second_bottom_idx = i - 1
-                found_first_bottom = False
-                
-                for k in range(second_bottom_idx - 1, start_idx, -1):
-                    val = self.ao[k]
-                    if val >= 0: break
-                    
-                    val_next = self.ao[k+1]
-                    val_prev = self.ao[k-1]
-                    
-                    if val < val_next and val < val_prev:
-                        if second_bottom_val > val:
-                            found_first_bottom = True
-                        break 
-                
-                if found_first_bottom:
-                    buy_signal = True
-
-            # 双峰卖出
-            if ao_curr > 0 and ao_curr < ao_prev and ao_prev > ao_prev2:
-                second_top_val = ao_prev
-                second_top_idx = i - 1
-                found_first_top = False
-                
-                for k in range(second_top_idx - 1, start_idx, -1):
-                    val = self.ao[k]
-                    if val <= 0: break
-                    
-                    val_next = self.ao[k+1]
-                    val_prev = self.ao[k-1]
-                    
-                    if val > val_next and val > val_prev:
-                        if second_top_val < val:
-                            found_first_top = True
-                        break
-                
-                if found_first_top:
-                    sell_signal = True
+        # t-1 为第二个谷(峰); 第一个谷(峰)须在 MDAY 回看窗口内, 且两者之间未穿越零轴
+        start_idx = np.maximum(0, i - self.MDAY)
+        k_low = self.last_trough[i - 2]
+        k_high = self.last_peak[i - 2]
+        twin_buy = (ao_curr < 0) & (ao_curr > ao_prev) & (ao_prev < ao_prev2) & \
+                   (k_low > start_idx) & (ao_prev > ao[k_low])
+        twin_sell = (ao_curr > 0) & (ao_curr < ao_prev) & (ao_prev > ao_prev2) & \
+                    (k_high > start_idx) & (ao_prev < ao[k_high])
+
+        # 优先级: 零轴穿越 > 碟形 > 双峰
+        cross = cross_buy | cross_sell
+        saucer = ~cross & (saucer_buy | saucer_sell)
+        buy = cross_buy | (~cross & saucer_buy) | (~cross & ~saucer & twin_buy)
+        sell = cross_sell | (~cross & saucer_sell) | (~cross & ~saucer & twin_sell)
+        return buy, sell
 
+    def GetPositions(self, start):
+        n = len(self.ao)
+        warm = min(self.MDAY + 2, n)
+        buy, sell = self._signals(np.arange(warm, n))
+
+        # 有信号的分钟取 +1 / -1, 其余维持上一分钟仓位; 暖身期与 start 之前空仓
+        sig = np.zeros(n)
+        sig[warm:] = np.where(buy, 1, np.where(sell, -1, 0))
+        return latch(sig, max(start, warm))
+
+    def GetSig(self, i):
+        # 暖身期检查
+        if i < self.MDAY + 2:
+            self.prePosition = self.position
+            self.position = 0
+            return
+
+        buy_signal, sell_signal = self._signals(i)
+
+        sig = self.position # 默认维持原有仓位
         if buy_signal:
             sig = 1
         elif sell_signal:
@@ -1,9 +1,11 @@
+import os
 import sys
-sys.path.append(r"E:\StockIndexCTA")
+# 直接运行本文件时把项目根目录加入搜索路径 (也可用 python -m CTA_BT 运行)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from CTA_BT.CTA_BTv3 import BaseStrategy, run_backtest
+from CTA_BT.indicators import EMA
 import numpy as np
-import pandas as pd
 
 class AlligatorStrategy(BaseStrategy):
     # 策略配置
@@ -17,14 +19,9 @@ class AlligatorStrategy(BaseStrategy):
     name = f'{symbol}_Alligator_{FAST}_{MID}_{SLOW}'
     min_date = 20160101
 
-    def getOrgData(self):
-        # 获取原始数据
-        path = fr"E:\StockIndexCTA\Data\{self.symbol}_{self.td}.csv"
-        self.raw_data = pd.read_csv(path)
-
     def prepare_data(self):
         # 准备数据
-        arr = self.raw_data.values
+        arr = self.raw_data
         
         # 提取价格数据
         self.openPrice = arr[:, 1]
@@ -34,21 +31,57 @@ class AlligatorStrategy(BaseStrategy):
         
         # --- 指标计算 ---
         # MP (中价) := (最高价 + 最低价) / 2
-        mp = (pd.Series(self.highPrice) + pd.Series(self.lowPrice)) / 2
+        mp = (self.highPrice + self.lowPrice) / 2
         
         # MEMA
         
         # LIPS (嘴唇/绿线): MEMA(MP, FAST)
-        self.lips = mp.ewm(alpha=1/self.FAST, adjust=False).mean().values
+        self.lips = self.cache.ema("mp", mp, alpha=1/self.FAST)
         
         # TEETH (牙齿/红线): MEMA(MP, MID)
-        self.teeth = mp.ewm(alpha=1/self.MID, adjust=False).mean().values
+        self.teeth = self.cache.ema("mp", mp, alpha=1/self.MID)
         
         # JAW (下巴/蓝线): MEMA(MP, SLOW)
-        self.jaw = mp.ewm(alpha=1/self.SLOW, adjust=False).mean().values
+        self.jaw = self.cache.ema("mp", mp, alpha=1/self.SLOW)
         
         self.close_arr = self.closePrice
 
+    def init_stream(self):
+        # 实盘逐根推送: 三条 MEMA 逐根更新, 与 prepare_data 逐位相同
+        arr = self.raw_data
+        self.openPrice = arr[:, 1]
+        self.closePrice = arr[:, 2]
+        self.highPrice = arr[:, 3]
+        self.lowPrice = arr[:, 4]
+        self.close_arr = self.closePrice
+
+        n = len(arr)
+        self.lips = np.full(n, np.nan)
+        self.teeth = np.full(n, np.nan)
+        self.jaw = np.full(n, np.nan)
+        self._lines = [(self.lips, EMA(alpha=1/self.FAST)),
+                       (self.teeth, EMA(alpha=1/self.MID)),
+                       (self.jaw, EMA(alpha=1/self.SLOW))]
+        return True
+
+    def update_stream(self, i):
+        mp = (self.highPrice[i] + self.lowPrice[i]) / 2
+        for line, stream in self._lines:
+            line[i] = stream.update(mp)
+
+    def GetPositions(self, start):
+        # 信号只取决于当分钟的价格与三线排列, 无路径依赖, 整日向量化计算
+        price = self.close_arr
+        l, t, j = self.lips, self.teeth, self.jaw
+
+        long_cond = (price > l) & (l > t) & (t > j)
+        short_cond = (price < l) & (l < t) & (t < j)
+        pos = np.where(long_cond, 1, np.where(short_cond, -1, 0))
+
+        # 暖身期空仓
+        pos[:self.SLOW] = 0
+        return pos
+
     def GetSig(self, i):
         # 暖身期检查 (确保有足够数据计算指标)
         if i < self.SLOW:
@@ -1,9 +1,12 @@
+import os
 import sys
-sys.path.append(r"E:\StockIndexCTA")
+# 直接运行本文件时把项目根目录加入搜索路径 (也可用 python -m CTA_BT 运行)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from CTA_BT.CTA_BTv3 import BaseStrategy, run_backtest
+from CTA_BT.indicators import RollingArgMax, RollingArgMin, rolling_argmax, rolling_argmin
+from CTA_BT.kernels import latch
 import numpy as np
-import pandas as pd
 
 class AroonStrategy(BaseStrategy):
     # 策略配置
@@ -17,14 +20,9 @@ class AroonStrategy(BaseStrategy):
     name = f'{symbol}_Aroon_{NDAY}'
     min_date = 20160101
 
-    def getOrgData(self):
-        # 获取原始数据
-        path = fr"E:\StockIndexCTA\Data\{self.symbol}_{self.td}.csv"
-        self.raw_data = pd.read_csv(path)
-
     def prepare_data(self):
         # 准备数据
-        arr = self.raw_data.values
+        arr = self.raw_data
         
         # 提取价格数据
         self.openPrice = arr[:, 1]
@@ -33,17 +31,43 @@ class AroonStrategy(BaseStrategy):
         self.lowPrice = arr[:, 4]
         
         # --- 指标计算 ---
-        high_series = pd.Series(self.highPrice)
-        low_series = pd.Series(self.lowPrice)
         n = self.NDAY
         
         # Aroon Up: (N - HHVBARS(High, N)) / N * 100
-        rolling_argmax = high_series.rolling(window=n).apply(np.argmax, raw=True)
-        self.aroon_up = ((rolling_argmax + 1) / n * 100).values
+        # 窗口内最高价位置 (滑动窗口向量化, 同日各参数组合共享)
+        high_argmax = self.cache.get(
+            ("argmax", "high", n), lambda: rolling_argmax(self.highPrice, n))
+        self.aroon_up = (high_argmax + 1) / n * 100
         
         # Aroon Down: (N - LLVBARS(Low, N)) / N * 100
-        rolling_argmin = low_series.rolling(window=n).apply(np.argmin, raw=True)
-        self.aroon_down = ((rolling_argmin + 1) / n * 100).values
+        low_argmin = self.cache.get(
+            ("argmin", "low", n), lambda: rolling_argmin(self.lowPrice, n))
+        self.aroon_down = (low_argmin + 1) / n * 100
+
+    def init_stream(self):
+        # 实盘逐根推送: 单调队列逐根更新窗口极值位置, 与 prepare_data 逐位相同
+        arr = self.raw_data
+        self.openPrice = arr[:, 1]
+        self.closePrice = arr[:, 2]
+        self.highPrice = arr[:, 3]
+        self.lowPrice = arr[:, 4]
+
+        self.aroon_up = np.full(len(arr), np.nan)
+        self.aroon_down = np.full(len(arr), np.nan)
+        self._high_argmax = RollingArgMax(self.NDAY)
+        self._low_argmin = RollingArgMin(self.NDAY)
+        return True
+
+    def update_stream(self, i):
+        n = self.NDAY
+        self.aroon_up[i] = (self._high_argmax.update(self.highPrice[i]) + 1) / n * 100
+        self.aroon_down[i] = (self._low_argmin.update(self.lowPrice[i]) + 1) / n * 100
+
+    def GetPositions(self, start):
+        up, down = self.aroon_up, self.aroon_down
+        sig = np.where((up > self.UPBAND) & (down < self.LOWBAND), 1,
+                       np.where((down > self.UPBAND) & (up < self.LOWBAND), -1, 0))
+        return latch(sig, max(start, self.NDAY))
 
     def GetSig(self, i):
         # 暖身期检查
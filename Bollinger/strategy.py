@@ -1,9 +1,12 @@
+import os
 import sys
-sys.path.append(r"E:\StockIndexCTA")
+# 直接运行本文件时把项目根目录加入搜索路径 (也可用 python -m CTA_BT 运行)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from CTA_BT.CTA_BTv3 import BaseStrategy, run_backtest
+from CTA_BT.indicators import RollingMean, RollingStd
+from CTA_BT.kernels import latch
 import numpy as np
-import pandas as pd
 
 class BollingerStrategy(BaseStrategy):
     # 策略配置
@@ -17,12 +20,8 @@ class BollingerStrategy(BaseStrategy):
     name = f'{symbol}_Bollinger_{MDAY}_{NDAY}_{NSTD}'
     min_date = 20160101
 
-    def getOrgData(self):
-        path = fr"E:\StockIndexCTA\Data\{self.symbol}_{self.td}.csv"
-        self.raw_data = pd.read_csv(path)
-
     def prepare_data(self):
-        arr = self.raw_data.values
+        arr = self.raw_data
 
         # 1:开盘价, 2:收盘价, 3:最高价, 4:最低价
         self.openPrice = arr[:, 1]
@@ -31,17 +30,42 @@ class BollingerStrategy(BaseStrategy):
         self.closePrice = arr[:, 2] 
 
         # --- 指标计算 ---
-        close_s = pd.Series(self.closePrice)
+        close = self.closePrice
 
         # 1. 上轨 (UPP): MA(MDAY) + NSTD * STD(MDAY)
-        ma_m = close_s.rolling(window=self.MDAY).mean()
-        std_m = close_s.rolling(window=self.MDAY).std()
-        self.upp = (ma_m + self.NSTD * std_m).values
+        ma_m = self.cache.rolling_mean("close", close, self.MDAY)
+        std_m = self.cache.rolling_std("close", close, self.MDAY)
+        self.upp = ma_m + self.NSTD * std_m
 
         # 2. 下轨 (DOWNP): MA(NDAY) - NSTD * STD(NDAY)
-        ma_n = close_s.rolling(window=self.NDAY).mean()
-        std_n = close_s.rolling(window=self.NDAY).std()
-        self.downp = (ma_n - self.NSTD * std_n).values
+        ma_n = self.cache.rolling_mean("close", close, self.NDAY)
+        std_n = self.cache.rolling_std("close", close, self.NDAY)
+        self.downp = ma_n - self.NSTD * std_n
+
+    def init_stream(self):
+        # 实盘逐根推送: 上下轨的均值 / 标准差逐根更新, 与 prepare_data 逐位相同
+        arr = self.raw_data
+        self.openPrice = arr[:, 1]
+        self.highPrice = arr[:, 3]
+        self.lowPrice = arr[:, 4]
+        self.closePrice = arr[:, 2]
+
+        n = len(arr)
+        self.upp = np.full(n, np.nan)
+        self.downp = np.full(n, np.nan)
+        self._ma_m, self._std_m = RollingMean(self.MDAY), RollingStd(self.MDAY)
+        self._ma_n, self._std_n = RollingMean(self.NDAY), RollingStd(self.NDAY)
+        return True
+
+    def update_stream(self, i):
+        close = self.closePrice[i]
+        self.upp[i] = self._ma_m.update(close) + self.NSTD * self._std_m.update(close)
+        self.downp[i] = self._ma_n.update(close) - self.NSTD * self._std_n.update(close)
+
+    def GetPositions(self, start):
+        close = self.closePrice
+        sig = np.where(close > self.upp, -1, np.where(close < self.downp, 1, 0))
+        return latch(sig, max(start, self.MDAY, self.NDAY))
 
     def GetSig(self, i):
         # 暖身期检查
@@ -1,23 +1,102 @@
 import pandas as pd
 import numpy as np
-import matplotlib
-from matplotlib import pyplot as plt
+import copyreg
 import os
 import inspect
+import time
+from functools import lru_cache
+from itertools import repeat
 
+from CTA_BT.bar_store import N_MINUTES, load_day
+from CTA_BT.day_cache import DayCache
+from CTA_BT.journal import TradeJournal, empty_records, export_csv, make_records
+from CTA_BT.metrics import MetricsAccumulator, day_turnover
+from CTA_BT.prefetch import DayLoader
+from CTA_BT.profiler import NULL_TIMER, PhaseTimer
+from CTA_BT.progress import is_headless, make_reporter, plot_result
+from CTA_BT.resample import resample_day
+from CTA_BT.warmup import get_history
 
-matplotlib.rcParams['font.sans-serif'] = ['SimHei']
-matplotlib.rcParams['axes.unicode_minus'] = False 
 
-class BaseStrategy:
+# 项目根目录与数据目录 (按本文件位置推导, 不再依赖 E:\StockIndexCTA)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "Data")
+TRADEDATES_PATH = os.path.join(ROOT_DIR, "研究", "UpdateTD", "tradedates.csv")
+
+
+class StrategyType(type):
+    # 策略类的元类, 只用于 pickle: 参数变体 (sweep.make_variant 生成) 按 "基类 + 参数" 序列化,
+    # 子进程中重新生成, 因此可以直接发送到进程池; 其余策略类照常按模块与名称引用
+    pass
+
+
+def _reduce_strategy(cls):
+    variant = cls.__dict__.get("_variant_of")
+    if variant is None:
+        return cls.__qualname__
+    from CTA_BT.sweep import make_variant
+    return make_variant, variant
+
+
+copyreg.pickle(StrategyType, _reduce_strategy)
+
+
+class BaseStrategy(metaclass=StrategyType):
+    data_dir = DATA_DIR
+    store_dir = None   # 列式存储目录, 默认 Data/_store
+    vectorized = True  # 策略实现 GetPositions 时走整日向量化结算, False 强制逐分钟循环
+    warmup_bars = 0    # >0 时在当日行情前拼接此前连续交易日的最后 K 根K线, 指标开盘即预热
+    gap_mode = "adjust"  # 预热历史的隔夜跳空规则: "adjust" 按比例缩放 / "raw" 原样, 见 warmup.py
+    min_date = None    # 回测区间 [min_date, max_date], None 为不限
+    max_date = None
+    bar_period = 1     # >1 时指标与信号运行在 bar_period 分钟K线上, 收益仍按分钟结算, 见 resample.py
+
     def __init__(self, td, symbol):
         self.td = td
         self.symbol = symbol   # "IM", "IF", "000852", "000300"
         self.raw_data = None
+        self.offset = 0   # raw_data 中当日第一根K线的位置 (前面为预热历史)
+        self.minute_data = None   # 分钟行情 (含预热历史); bar_period = 1 时即 raw_data
+        self.minute_offset = 0
+        self.bar_end = None       # bar_period > 1 时每根K线最后一分钟的当日分钟索引 (预热历史为 -1)
         self.PNL = []
         self.position = 0
         self.prePosition = 0
-        self.trade_records = []
+        self.trade_records = empty_records()   # 当日交易明细, 结构化数组 (见 journal.TRADE_DTYPE)
+        self.held = np.zeros(N_MINUTES)        # 每分钟实际持有的仓位 (当日分钟索引), 未交易分钟为 0
+        self.cache = DayCache()   # 当日共享中间量, 参数扫描时由同日各组合共用
+
+    def getOrgData(self):
+        # 获取原始数据: (rows, 7) 数组, 列顺序同 CSV
+        # (MinInt, open, close, high, low, volume, open_interest)
+        # 已打包的交易日直接取内存映射视图 (零拷贝), 否则回退读取逐日 CSV
+        self.set_data(load_day(self.symbol, self.td, self.data_dir, self.store_dir))
+
+    def set_data(self, today):
+        # 设置当日行情 (可由预读线程提前读好, 见 prefetch.py); 开启预热时在前面拼接历史K线
+        if self.warmup_bars > 0:
+            hist = get_history(self.symbol, self.warmup_bars, trade_calendar(),
+                               self.data_dir, self.store_dir, self.gap_mode)
+            prefix = hist.prefix(self.td, today)
+            hist.push(self.td, today)
+            today = np.concatenate([prefix, today])
+            self.set_bars(today, len(prefix))
+        else:
+            self.set_bars(today, 0)
+
+    def set_bars(self, data, offset):
+        # 分钟行情 (前 offset 行为预热历史) -> 策略使用的K线; bar_period > 1 时合成多周期K线
+        self.minute_data = data
+        self.minute_offset = offset
+        if self.bar_period > 1:
+            self.raw_data, self.offset, self.bar_end = resample_day(
+                self.symbol, self.td, self.bar_period, data, offset, self.data_dir, self.store_dir)
+        else:
+            self.raw_data, self.offset = data, offset
+
+    def share_data(self, other):
+        # 共用同日已读取的行情 (参数扫描、批量回测); 周期不同时由分钟行情重新合成
+        self.set_bars(other.minute_data, other.minute_offset)
 
     def CmpRet(self, nowClose, nowOpen):
         ret = self.prePosition * (nowClose / nowOpen - 1)
@@ -25,13 +104,51 @@ class BaseStrategy:
             ret = ret * (1 - 0.0)
         return ret
 
+    def GetPositions(self, start):
+        # 可选的数组接口: 返回整日仓位向量 pos, pos[i] 等于逐分钟路径中 GetSig(i)
+        # 之后的 self.position (只用到 i >= start 的部分, start 之前视为空仓)。
+        # 开启预热时 i 为 raw_data 中的位置, start 已包含 self.offset。
+        # 默认返回 None, 即策略依赖逐分钟状态, 回退到 GetSig 循环。
+        return None
+
+    def init_stream(self):
+        # 可选的流式接口 (实盘逐根推送, 见 live.py): 此时 raw_data 为预分配的整日缓冲区,
+        # 已到达的K线依次写入。返回 True 表示之后每根K线到达时由 update_stream(i)
+        # 增量更新指标数组的第 i 项, GetSig(i) 照常读取; 结果须与 prepare_data 逐位相同。
+        # 默认返回 False, 每根K线对已到达的行情整体重算 prepare_data。
+        return False
+
+    def update_stream(self, i):
+        pass
+
     def run_backtest(self, start_minute=5):
-        self.getOrgData()
+        # raw_data 已由外部注入 (如参数扫描同日共享行情) 时不再重复读取
+        if self.raw_data is None:
+            self.getOrgData()
         self.prepare_data()
+        self.run_signals(start_minute)
 
-        for i in range(start_minute, 229):
+    def run_signals(self, start_minute=5):
+        # 指标已由 prepare_data 算好: 生成仓位并逐分钟结算收益与交易明细
+        # GetSig / 价格数组按 raw_data 位置索引; 交易明细中的分钟索引仍为当日分钟
+        if self.bar_period > 1:
+            self.run_bar_signals(start_minute)
+            return
+
+        offset = self.offset
+        if self.vectorized and type(self).CmpRet is BaseStrategy.CmpRet:
+            positions = self.GetPositions(offset + start_minute)
+            if positions is not None:
+                self.settle_positions(positions, start_minute)
+                return
+
+        # 交易明细预分配为当日最大分钟数, 结束时截取实际条数
+        records = empty_records(229 - start_minute)
+        n_records = 0
+        for i in range(offset + start_minute, offset + 229):
 
             self.GetSig(i)
+            self.held[i - offset] = self.prePosition
             
             # 获取当前分钟的开盘价和收盘价
             nowOpen = self.openPrice[i]
@@ -41,84 +158,228 @@ class BaseStrategy:
             self.PNL.append(ret)
 
             if ret != 0:
-                self.trade_records.append([
+                records[n_records] = (
                     self.td,           # 交易日期
-                    i,                 # 分钟索引 (i)
+                    i - offset,        # 分钟索引 (i)
                     nowOpen,           # 开盘价
                     nowClose,          # 收盘价
                     self.prePosition,  # 持仓信号 (上一分钟的仓位)
                     ret                # 分钟收益率
-                ])
+                )
+                n_records += 1
+        self.trade_records = records[:n_records]
 
+    def run_bar_signals(self, start_minute=5):
+        # 多周期: 收盘分钟落在 [start_minute, 228] 内的K线依次给出仓位,
+        # 展开为分钟仓位 (每分钟取此前最后一根已收盘K线的仓位) 后按分钟结算
+        if type(self).CmpRet is not BaseStrategy.CmpRet:
+            raise ValueError("bar_period > 1 时按分钟结算, 不支持自定义 CmpRet")
+        bars = np.flatnonzero((self.bar_end >= start_minute) & (self.bar_end <= 228))
+        positions = None
+        if self.vectorized and len(bars):
+            positions = self.GetPositions(bars[0])
+        if positions is None:
+            positions = np.zeros(len(self.raw_data))
+            for j in bars:
+                self.GetSig(j)
+                positions[j] = self.position
+        positions = np.asarray(positions)
 
-def run_backtest(strategy_cls):
-    tradedates = pd.read_csv(r'E:\StockIndexCTA\研究\UpdateTD\tradedates.csv')
-    tradedates = tradedates['TradingDayInt'].to_list()
+        minute_positions = np.zeros(len(self.minute_data), dtype=positions.dtype)
+        if len(bars):
+            n_today = len(self.minute_data) - self.minute_offset
+            k = np.searchsorted(self.bar_end[bars], np.arange(n_today), side="right") - 1
+            minute_positions[self.minute_offset:] = np.where(
+                k >= 0, positions[bars[np.maximum(k, 0)]], 0)
+        self.settle_positions(minute_positions, start_minute)
 
-    rslt = []
-    all_trade_records = [] 
+    def settle_positions(self, positions, start_minute=5):
+        # 整日向量化结算, 与逐分钟循环逐项一致:
+        # 第 i 分钟持有上一分钟 GetSig 给出的仓位, 首个交易分钟持有空仓
+        # bar_period > 1 时 positions 为展开后的分钟仓位, 按分钟行情结算
+        positions = np.asarray(positions)
+        if self.bar_period > 1:
+            offset = self.minute_offset
+            openPrice, closePrice = self.minute_data[:, 1], self.minute_data[:, 2]
+        else:
+            offset = self.offset
+            openPrice, closePrice = self.openPrice, self.closePrice
+        idx = np.arange(start_minute, 229)
 
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.set_title(f'Cumulative Return - {strategy_cls.name}') 
-    plt.ion()
+        held = np.zeros(len(idx), dtype=positions.dtype)
+        held[1:] = positions[offset + start_minute:offset + 228]
 
-    for td in tradedates:
-        if td < strategy_cls.min_date:
-            continue
-        try:
-            stg = strategy_cls(td, strategy_cls.symbol)
-            stg.run_backtest()
-        except (FileNotFoundError, pd.errors.EmptyDataError):
-            print(f"跳过 {td}, {strategy_cls.symbol} 无数据")
-            continue
+        nowOpen = openPrice[offset + idx]
+        nowClose = closePrice[offset + idx]
+        ret = held * (nowClose / nowOpen - 1)
+        self.PNL = ret
+        self.held[idx] = held
 
-        RET = np.sum(stg.PNL)
-        rslt.append([td, RET])
-        print(f"{td} 收益: {RET:.6f}")
-        
-        all_trade_records.extend(stg.trade_records)
+        # 只为收益非零的分钟生成交易明细
+        nz = np.flatnonzero(ret)
+        self.trade_records = make_records(self.td, idx[nz], nowOpen[nz], nowClose[nz],
+                                          held[nz], ret[nz])
 
-        ax.clear()
-        dates = [str(x[0]) for x in rslt]
-        rets = np.cumsum(np.array([x[1] for x in rslt]))
 
-        ax.plot(dates, rets, linewidth=1, color='#8B0000', label='Cumulative Return') 
-        ax.set_title(f'Cumulative Return - {strategy_cls.name} (Current Date: {td})') 
-        
-        step = max(1, len(dates)//10)
-        ax.set_xticks(range(0, len(dates), step))
-        ax.set_xticklabels(dates[::step], rotation=45, fontsize=8)
-        ax.grid(True, linestyle='--', alpha=0.6) 
-        plt.tight_layout()
-        plt.pause(0.015)
+def day_result(stg):
+    # 单日结果: (当日收益, 分钟交易明细, 每分钟持仓 held)
+    return np.sum(stg.PNL), stg.trade_records, stg.held
 
-    plt.ioff()
 
-    # -------------------------------
-    # 计算指标
-    # -------------------------------
+def _default_loader(strategy_cls):
+    # 策略沿用 BaseStrategy.getOrgData 时, 当日行情即 load_day 的结果, 可由预读线程提前读取
+    return strategy_cls.getOrgData is BaseStrategy.getOrgData
 
-    df = pd.DataFrame(rslt, columns=["date", "ret"])
-    df["cum_ret"] = np.cumsum(df["ret"])
-    total_days = len(df)
-    
-    # 保存分钟交易明细
-    trade_df = pd.DataFrame(
-        all_trade_records,
-        columns=["date", "minute_i", "open_price", "close_price", "position", "minute_ret"]
-    )
-    
-    strategy_file = inspect.getfile(strategy_cls)
-    result_dir = os.path.dirname(strategy_file)
+
+def _load(stg, today):
+    # today: 预读的当日行情或读取时捕获的异常 (见 prefetch.py); None 时在此同步读取
+    # 策略自定义了 getOrgData (另有数据来源或加工) 时预读结果不适用, 仍由 getOrgData 读取
+    if today is None or not _default_loader(type(stg)):
+        stg.getOrgData()
+    elif isinstance(today, Exception):
+        raise today
+    else:
+        stg.set_data(today)
+
+
+def run_day(strategy_cls, td, today=None):
+    # 运行单日回测, 返回 day_result; 无数据时返回 None
+    try:
+        stg = strategy_cls(td, strategy_cls.symbol)
+        _load(stg, today)
+        stg.run_backtest()
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return None
+    return day_result(stg)
+
+
+def run_day_profiled(strategy_cls, td, today=None):
+    # 同 run_day, 另外返回各阶段耗时 {load, prepare, signal}; 跳过时带 skip 原因
+    # (预读时 load 只含拼接预热历史, 读取本身在后台线程中)
+    stg = strategy_cls(td, strategy_cls.symbol)
+    t0 = time.perf_counter()
+    try:
+        _load(stg, today)
+        t1 = time.perf_counter()
+        stg.prepare_data()
+        t2 = time.perf_counter()
+        stg.run_signals()
+        t3 = time.perf_counter()
+    except (FileNotFoundError, pd.errors.EmptyDataError) as e:
+        return None, {"load": time.perf_counter() - t0, "skip": type(e).__name__}
+    times = {"load": t1 - t0, "prepare": t2 - t1, "signal": t3 - t2}
+    return day_result(stg), times
+
+
+def _iter_chunk(day_fn, args, tds, loader=None):
+    # 顺序运行一段连续交易日; 给定 loader 时后台预读, 行情以 today= 传入 day_fn
+    if loader is None:
+        for td in tds:
+            yield td, day_fn(*args, td)
+        return
+    for td, today in loader.iter(tds):
+        yield td, day_fn(*args, td, today=today)
+
+
+def _run_chunk(day_fn, args, tds, loader=None):
+    # 子进程任务
+    return [res for _, res in _iter_chunk(day_fn, args, tds, loader)]
+
+
+def map_days(day_fn, tds, n_jobs=1, *args, loader=None):
+    """按日期顺序逐日产出 (td, day_fn(*args, td))。
+
+    各交易日新建策略实例、仓位不跨日, 互相独立, 因此 n_jobs > 1 时把交易日切成
+    连续的小段分发到进程池, 再按原顺序合并; n_jobs 为 None 或 -1 时使用全部CPU核。
+    day_fn 与 args 需可被 pickle (模块级函数 / 类)。
+    loader: prefetch.DayLoader, 每段内后台预读行情; day_fn 需接受 today 参数
+    """
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs == 1:
+        yield from _iter_chunk(day_fn, args, tds, loader)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    # 每个进程约分到 4 段, 兼顾负载均衡与进程间通信开销
+    chunk = max(1, len(tds) // (n_jobs * 4))
+    chunks = [tds[k:k + chunk] for k in range(0, len(tds), chunk)]
+    with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+        results = ex.map(_run_chunk, repeat(day_fn), repeat(args), chunks, repeat(loader))
+        for tds_chunk, chunk_results in zip(chunks, results):
+            yield from zip(tds_chunk, chunk_results)
+
+
+def iter_days(strategy_cls, tds, n_jobs=1, timer=NULL_TIMER, prefetch=0):
+    # 按日期顺序逐日产出 (td, run_day 结果); 开启剖析时把各阶段耗时记入 timer
+    # prefetch > 0 时后台预读其后 prefetch 个交易日的行情; 自定义 getOrgData 的策略不预读
+    use_loader = prefetch and _default_loader(strategy_cls)
+    loader = DayLoader.for_strategy(strategy_cls, prefetch) if use_loader else None
+    if not timer.enabled:
+        yield from map_days(run_day, tds, n_jobs, strategy_cls, loader=loader)
+        return
+    for td, (res, times) in map_days(run_day_profiled, tds, n_jobs, strategy_cls, loader=loader):
+        timer.add_day(times)
+        yield td, res
+
+
+def iter_cached_days(strategy_cls, tds, n_jobs=1, cache=None, timer=NULL_TIMER, prefetch=0):
+    """同 iter_days, 但命中缓存的交易日直接读取, 只计算缺失或行情已变化的交易日。
+
+    新算出的结果随即写入缓存 (按批提交), 中断后重跑从断点继续。
+    """
+    if cache is None:
+        yield from iter_days(strategy_cls, tds, n_jobs, timer, prefetch)
+        return
+
+    fps = {td: cache.fingerprint(td) for td in tds}
+    todo = [td for td in tds if not cache.is_valid(td, fps[td])]
+    if len(tds):
+        print(f"{strategy_cls.name}: 缓存命中 {len(tds) - len(todo)} 天, 需计算 {len(todo)} 天")
+
+    fresh = iter_days(strategy_cls, todo, n_jobs, timer, prefetch)
+    todo_set = set(todo)
+    for td in tds:
+        if td in todo_set:
+            _, res = next(fresh)
+            cache.put(td, fps[td], res)
+        else:
+            with timer.phase("cache_read"):
+                res = cache.get(td)
+            timer.count("cache_hit")
+        yield td, res
+    cache.commit()
+
+
+@lru_cache(maxsize=None)
+def trading_calendar():
+    # tradedates.csv 进程内只读一次 (见 catalog.TradingCalendar)
+    from CTA_BT.catalog import TradingCalendar
+    return TradingCalendar.from_csv(TRADEDATES_PATH)
+
+
+def load_tradedates(min_date=None, max_date=None):
+    # [min_date, max_date] 内的交易日列表, 二分查找区间
+    return trading_calendar().range(min_date, max_date)
+
+
+@lru_cache(maxsize=None)
+def trade_calendar():
+    # 完整交易日历, 供预热缓冲区查找上一交易日
+    return tuple(trading_calendar().range())
+
+
+def get_result_dir(strategy_cls):
+    # 结果保存在策略文件所在目录
+    result_dir = os.path.dirname(inspect.getfile(strategy_cls))
     os.makedirs(result_dir, exist_ok=True)
-    
-    trade_save_path = os.path.join(result_dir, f"{strategy_cls.name}_trades.csv")
-    trade_df.to_csv(trade_save_path, index=False)
-    print(f"分钟交易明细已保存到：{trade_save_path}")
-    
-    # -------------------------------
-    # 指标计算和日收益保存
-    # -------------------------------
+    return result_dir
+
+
+def calc_metrics(df):
+    # 日收益表 (date, ret, cum_ret) 的汇总指标
+    total_days = len(df)
     annual_ret = df["cum_ret"].iloc[-1] * 242 / total_days
     sharpe = (df["ret"].mean() / df["ret"].std()) * np.sqrt(242) if df["ret"].std() != 0 else np.nan 
 
@@ -129,42 +390,139 @@ def run_backtest(strategy_cls):
 
     calmar = annual_ret / max_drawdown if max_drawdown != 0 else np.nan
 
-    start_date = str(df["date"].iloc[0])
-    end_date = str(df["date"].iloc[-1])
-    days = len(df)
+    return {
+        "annual_ret": annual_ret,
+        "sharpe": sharpe,
+        "calmar": calmar,
+        "max_drawdown": max_drawdown,
+        "start_date": str(df["date"].iloc[0]),
+        "end_date": str(df["date"].iloc[-1]),
+        "days": total_days,
+    }
+
+
+def save_results(strategy_cls, rslt, result_dir, headless=True, timer=NULL_TIMER, plot=True):
+    """由 [(date, ret, turnover)] 计算指标, 保存日结果 CSV 与累计收益图, 返回 (df, metrics)。
 
+    ret 为未扣成本的日收益, turnover 为当日换手 Σ|Δ仓位| (成本敏感性分析见 costs.py)。
+    plot 为 False 时不绘图, 也不导入 matplotlib。
+    """
+    # -------------------------------
+    # 计算指标
+    # -------------------------------
+    with timer.phase("aggregate"):
+        df = pd.DataFrame(rslt, columns=["date", "ret", "turnover"])
+        df.insert(2, "cum_ret", np.cumsum(df["ret"]))
+        metrics = calc_metrics(df)
+
+    # -------------------------------
+    # 日收益保存
+    # -------------------------------
     save_path = os.path.join(result_dir, f"{strategy_cls.name}.csv")
-    df.to_csv(save_path, index=False)
+    with timer.phase("save"):
+        df.to_csv(save_path, index=False)
     print(f"日结果已保存到：{save_path}")
 
-    ax.set_title(f'Cumulative Return - {strategy_cls.name}')
-    ax.plot(df["date"].astype(str), df["cum_ret"], linewidth=1, color='#8B0000')
+    # 结果图只在结束时绘制一次
+    if not plot:
+        return df, metrics
+    image_save_path = os.path.join(result_dir, f"{strategy_cls.name}.png")
+    with timer.phase("plot"):
+        plot_result(df, metrics, strategy_cls.name, image_save_path, show=not headless)
+    print(f"累计收益图已保存到：{image_save_path}")
+    return df, metrics
 
-    text_str = (
-        f"年化收益率: {annual_ret:.2%}\n"
-        f"夏普比率: {sharpe:.2f}\n"
-        f"卡玛比率: {calmar:.2f}\n"
-        f"最大回撤: {max_drawdown:.2%}\n"
-        f"{start_date} - {end_date}({days}天)"
-    )
 
-    ax.text(0.01, 0.97, text_str, transform=ax.transAxes,
-             verticalalignment='top', fontsize=9,
-             bbox=dict(facecolor='white', alpha=0.9, edgecolor='none', boxstyle='round,pad=0.5')) 
+def run_backtest(strategy_cls, n_jobs=1, progress=None, headless=None, trades_csv=True,
+                 use_cache=True, profile=False, save_positions=False, prefetch=4, plot=True):
+    """逐日回测并保存日结果、分钟交易明细和累计收益图。
 
-    step = max(1, len(df)//10)
-    xtick_labels = df["date"].astype(str)[::step]
-    ax.set_xticks(range(0, len(df), step))
-    ax.set_xticklabels(xtick_labels, rotation=45, fontsize=8)
+    progress: 进度报告方式, "chart" / "text" / "json" / "none" 或 reporter 实例;
+              默认有界面时为交互图, 无界面时为节流文本。
+    headless: 为 True 时全程不创建交互式窗口, 结果图用 Agg 后端直接保存;
+              None 时按运行环境自动判断。
+    trades_csv: 交易明细始终写入二进制日志 {name}_trades/ (见 journal.py),
+                默认同时导出 {name}_trades.csv (与原先相同); 为 False 时只写日志, 省去导出耗时。
+    use_cache: 逐日结果缓存在策略目录的 _cache/ 下 (见 result_cache.py),
+               重跑时只计算新增或失效的交易日; False 时全部重算且不读写缓存。
+               重写了 getOrgData 的策略始终不使用缓存 (日指纹只覆盖 load_day 读取的文件)。
+    profile: 为 True 时记录各阶段耗时与跳过计数, 结束时打印汇总并保存
+             {name}_profile.json (见 profiler.py)
+    save_positions: 为 True 时另外保存逐日分钟持仓矩阵 {name}_positions.npz,
+                    供多策略分钟级组合使用 (见 portfolio.py)
+    prefetch: 后台预读的交易日数 (见 prefetch.py), 读取与计算重叠; 0 为关闭
+    plot: 为 False 时不保存累计收益图 (不导入 matplotlib), 配合 progress="text" / "json" / "none"
+    """
+    if headless is None:
+        headless = is_headless()
+    reporter = make_reporter(progress, headless)
+    timer = PhaseTimer() if profile else NULL_TIMER
 
-    ax.grid(True, linestyle='--', alpha=0.6)
-    plt.tight_layout()
-    fig.canvas.draw()
-    plt.show()
+    # 无数据的交易日 (缺失或空文件) 由数据目录索引预先剔除, 不再逐日尝试读取
+    from CTA_BT.catalog import split_work
+    tradedates, skipped = split_work(
+        strategy_cls, load_tradedates(strategy_cls.min_date, strategy_cls.max_date))
+    if skipped:
+        n_empty = sum(reason == "empty" for reason in skipped.values())
+        print(f"跳过 {len(skipped)} 个无数据交易日 (缺失 {len(skipped) - n_empty}, 空文件 {n_empty})")
+        timer.count("skipped_days", len(skipped))
 
-    # 保存图片
-    image_save_path = os.path.join(result_dir, f"{strategy_cls.name}.png")
-    fig.savefig(image_save_path)
-    print(f"累计收益图已保存到：{image_save_path}")
+    result_dir = get_result_dir(strategy_cls)
+    trade_save_path = os.path.join(result_dir, f"{strategy_cls.name}_trades")
+    journal = TradeJournal(trade_save_path)
+    cache = None
+    # 自定义 getOrgData 的数据来源无法计算日指纹, 数据变化时缓存不会失效, 因此不使用缓存
+    if use_cache and _default_loader(strategy_cls):
+        from CTA_BT.result_cache import ResultCache
+        cache = ResultCache(strategy_cls, os.path.join(result_dir, "_cache"), trade_calendar())
+
+    rslt = []
+    held_dates, held_rows = [], []
+    acc = MetricsAccumulator()   # 逐笔统计 (胜率、盈亏比、持仓时间等) 随回测增量累计
+
+    reporter.start(strategy_cls.name, len(tradedates) + len(skipped), skipped=len(skipped))
+    for td, res in iter_cached_days(strategy_cls, tradedates, n_jobs, cache, timer, prefetch):
+        if res is None:
+            reporter.skip(td, strategy_cls.symbol)
+            timer.count("skipped_days")
+            continue
+
+        RET, trade_records, held = res
+        with timer.phase("aggregate"):
+            rslt.append([td, RET, day_turnover(held)])
+            journal.append(trade_records)
+            acc.add_result(td, res)
+            if save_positions:
+                held_dates.append(td)
+                held_rows.append(held)
+        with timer.phase("report"):
+            reporter.day(td, RET)
+
+    # 保存分钟交易明细
+    with timer.phase("aggregate"):
+        if cache is not None:
+            cache.close()
+        journal.close()
+    print(f"分钟交易明细已保存到：{trade_save_path}")
+    if trades_csv:
+        with timer.phase("save"):
+            print(f"分钟交易明细已导出到：{export_csv(trade_save_path)}")
+    if save_positions:
+        from CTA_BT.portfolio import save_positions as _save_positions
+        positions_path = os.path.join(result_dir, f"{strategy_cls.name}_positions.npz")
+        with timer.phase("save"):
+            _save_positions(positions_path, held_dates, held_rows, strategy_cls.symbol,
+                            strategy_cls.name)
+        print(f"分钟持仓矩阵已保存到：{positions_path}")
+
+    df, metrics = save_results(strategy_cls, rslt, result_dir, headless, timer, plot)
+    metrics.update(rolling_sharpe=acc.rolling_sharpe, **acc.trade_stats())
+    reporter.finish(metrics)
+
+    if timer.enabled:
+        timer.report(strategy_cls.name)
+        profile_path = os.path.join(result_dir, f"{strategy_cls.name}_profile.json")
+        timer.save(profile_path, name=strategy_cls.name, n_jobs=n_jobs, days=len(tradedates))
+        print(f"阶段耗时已保存到：{profile_path}")
 
-    return df
\ No newline at end of file
+    return df
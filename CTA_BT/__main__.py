@@ -0,0 +1,99 @@
+"""
+命令行入口 (python -m CTA_BT)
+
+按点分路径运行任意策略类, 不必执行 strategy.py 的 __main__:
+    python -m CTA_BT ADX.strategy.ADXStrategy
+    python -m CTA_BT ADX N=14 ADX_THRESHOLD=25 --start 20220101 --end 20231231
+    python -m CTA_BT Bollinger symbol=IF bar_period=5 --data D:/Data --jobs 8 --no-plot
+    python -m CTA_BT --list                   # 列出项目中的全部策略
+    python -m CTA_BT --startup                # 冷启动耗时基准 (见 benchmark.py)
+
+参数覆盖 KEY=VALUE 以类属性覆盖的方式生成参数变体 (同参数扫描), 结果名称沿用原名称的写法,
+如 ADX N=14 为 IM_ADX_14, symbol=IF 为 IF_ADX_16 (见 sweep.variant_name);
+--start / --end / --data 只改变回测区间与数据目录, 不改变结果名称。
+
+启动开销: 本模块顶层只导入标准库; 回测引擎 (numpy / pandas) 在运行策略时才导入,
+matplotlib 只在绘制结果图或交互式进度图时导入 (--no-plot 且非 chart 进度时全程不导入)。
+"""
+import argparse
+
+
+def _overrides(specs):
+    # ["N=14", "symbol=IF"] -> {"N": 14, "symbol": "IF"}
+    from CTA_BT.sweep import parse_value
+
+    params = {}
+    for spec in specs:
+        key, sep, value = spec.partition("=")
+        if not sep or not key:
+            raise SystemExit(f"参数覆盖格式应为 键=值: {spec}")
+        params[key.strip()] = parse_value(value.strip())
+    return params
+
+
+def run(args):
+    from CTA_BT.CTA_BTv3 import run_backtest
+    from CTA_BT.strategies import load_strategy
+    from CTA_BT.sweep import make_variant
+
+    base = load_strategy(args.strategy)
+    params = _overrides(args.params)
+    unknown = [k for k in params if not hasattr(base, k)]
+    if unknown:
+        print(f"注意: {base.__name__} 没有这些属性, 覆盖可能不起作用: {unknown}")
+    if args.start is not None:
+        params["min_date"] = args.start
+    if args.end is not None:
+        params["max_date"] = args.end
+    if args.data is not None:
+        params["data_dir"] = args.data
+    strategy_cls = make_variant(base, params)
+
+    run_backtest(strategy_cls, n_jobs=args.jobs, progress=args.progress,
+                 headless=True if args.no_plot else None, trades_csv=args.trades_csv,
+                 use_cache=not args.no_cache, profile=args.profile,
+                 save_positions=args.positions, prefetch=args.prefetch, plot=not args.no_plot)
+    return 0
+
+
+def list_strategies():
+    from CTA_BT.strategies import discover_strategies
+
+    for path, cls in discover_strategies().items():
+        print(f"{path:45s} {cls.name:20s} symbol={cls.symbol} min_date={cls.min_date}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m CTA_BT", description="运行回测策略")
+    parser.add_argument("strategy", nargs="?",
+                        help="策略类路径, 如 ADX.strategy.ADXStrategy; 只给文件夹名时取其中唯一的策略")
+    parser.add_argument("params", nargs="*", help="参数覆盖, 如 N=14 symbol=IF")
+    parser.add_argument("--start", type=int, default=None, help="起始交易日, 默认策略 min_date")
+    parser.add_argument("--end", type=int, default=None, help="结束交易日 (含)")
+    parser.add_argument("--data", default=None, help="数据根目录, 默认项目下 Data/")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数, -1 为全部CPU核")
+    parser.add_argument("--progress", choices=["chart", "text", "json", "none"], default=None)
+    parser.add_argument("--no-plot", action="store_true", help="不绘制结果图 (不导入 matplotlib)")
+    parser.add_argument("--no-cache", action="store_true", help="不读写逐日结果缓存")
+    parser.add_argument("--prefetch", type=int, default=4, help="后台预读交易日数, 0 为关闭")
+    parser.add_argument("--no-trades-csv", dest="trades_csv", action="store_false",
+                        help="只写二进制交易日志, 不导出交易明细 CSV")
+    parser.add_argument("--positions", action="store_true", help="另存分钟持仓矩阵")
+    parser.add_argument("--profile", action="store_true", help="记录各阶段耗时")
+    parser.add_argument("--list", action="store_true", help="列出项目中的全部策略")
+    parser.add_argument("--startup", action="store_true", help="测量冷启动耗时")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        return list_strategies()
+    if args.startup:
+        from CTA_BT.benchmark import main as benchmark_main
+        return benchmark_main(["--startup"])
+    if not args.strategy:
+        parser.error("需要指定策略, 或使用 --list / --startup")
+    return run(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
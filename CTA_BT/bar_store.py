@@ -0,0 +1,201 @@
+"""
+分钟线列式存储 (BarStore)
+
+把 Data/{symbol}_{td}.csv 逐日文件一次性打包为单个内存映射数组:
+    bars.f8    : float64 原始二进制, 形状 (天数, 240, 7), 列顺序与 CSV 一致
+                 (MinInt, open, close, high, low, volume, open_interest)
+    index.npy  : 日期索引, 每行 (date, rows, crc), rows 为当日实际分钟数
+
+追加新交易日时只在 bars.f8 尾部写入新块并重写很小的 index.npy, 不改写已有数据。
+
+用法:
+    python -m CTA_BT.bar_store IM IF          # 增量打包 IM、IF 全部历史
+"""
+import os
+import sys
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+N_MINUTES = 240
+COLUMNS = ["MinInt", "open_price", "close_price", "high_price",
+           "low_price", "volume", "open_interest"]
+N_COLS = len(COLUMNS)
+BLOCK_BYTES = N_MINUTES * N_COLS * 8
+
+
+def _session_minutes(start, n):
+    # 从 start (HHMM) 起连续 n 个分钟的 MinInt
+    h, m = divmod(start, 100)
+    mins = h * 60 + m + np.arange(n)
+    return (mins // 60) * 100 + mins % 60
+
+
+# 每日 240 个分钟标签: 上午 931-1130, 下午 1301-1500
+MIN_INTS = np.concatenate([_session_minutes(931, 120), _session_minutes(1301, 120)])
+
+INDEX_DTYPE = np.dtype([("date", "i8"), ("rows", "i4"), ("crc", "u4")])
+
+
+class BarStore:
+    """单品种分钟线内存映射存储, 按交易日返回零拷贝视图。"""
+
+    def __init__(self, symbol, store_dir):
+        self.symbol = symbol
+        self.path = os.path.join(store_dir, symbol)
+        self.bars_path = os.path.join(self.path, "bars.f8")
+        self.index_path = os.path.join(self.path, "index.npy")
+        self._mm = None
+        self.reload()
+
+    @staticmethod
+    def exists(symbol, store_dir):
+        return os.path.exists(os.path.join(store_dir, symbol, "index.npy"))
+
+    def reload(self):
+        # 读取日期索引并重新映射数据文件 (追加后需要调用)
+        if os.path.exists(self.index_path):
+            self.index = np.load(self.index_path)
+        else:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        self._pos = {int(d): k for k, d in enumerate(self.index["date"])}
+
+        n_days = len(self.index)
+        if n_days == 0:
+            self._mm = None
+            return
+        self._mm = np.memmap(self.bars_path, dtype=np.float64, mode="r",
+                             shape=(n_days, N_MINUTES, N_COLS))
+
+    @property
+    def dates(self):
+        return self.index["date"]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, td):
+        return int(td) in self._pos
+
+    def day(self, td):
+        # 返回当日 (rows, 7) 的只读视图; 不在存储中时与读 CSV 一致抛 FileNotFoundError
+        k = self._pos.get(int(td))
+        if k is None:
+            raise FileNotFoundError(f"{self.symbol}_{td} 不在列式存储中")
+        return self._mm[k, :self.index["rows"][k]]
+
+    def crc(self, td):
+        k = self._pos.get(int(td))
+        return None if k is None else int(self.index["crc"][k])
+
+    def append(self, days):
+        # days: [(td, arr)], arr 为 (rows, 7) 数组, rows <= 240; 已存在的日期跳过
+        new_index = []
+        os.makedirs(self.path, exist_ok=True)
+        self._mm = None  # 追加前释放映射
+        with open(self.bars_path, "ab") as f:
+            # 截掉上次中断残留的未入索引数据, 保证块偏移与索引一致
+            f.truncate(len(self.index) * BLOCK_BYTES)
+            for td, arr in days:
+                if int(td) in self._pos:
+                    continue
+                block = np.full((N_MINUTES, N_COLS), np.nan)
+                block[:len(arr)] = arr
+                buf = block.tobytes()
+                f.write(buf)
+                new_index.append((int(td), len(arr), zlib.crc32(buf)))
+                self._pos[int(td)] = -1  # 占位, 防止同批次重复写入
+
+        if new_index:
+            index = np.concatenate([self.index, np.array(new_index, dtype=INDEX_DTYPE)])
+            # 先写临时文件再替换, 避免中断时索引与数据不一致
+            tmp_path = self.index_path + ".tmp.npy"
+            np.save(tmp_path, index)
+            os.replace(tmp_path, self.index_path)
+        self.reload()
+        return len(new_index)
+
+
+# ---------------------------------------------
+# 读取接口: 优先列式存储, 否则回退到逐日 CSV
+# ---------------------------------------------
+
+_stores = {}
+
+
+def get_store(symbol, store_dir):
+    # 进程内缓存已打开的存储; 存储不存在时返回 None
+    key = (symbol, store_dir)
+    store = _stores.get(key)
+    if store is None:
+        if not BarStore.exists(symbol, store_dir):
+            return None
+        store = _stores[key] = BarStore(symbol, store_dir)
+    return store
+
+
+def read_csv_day(symbol, td, data_dir):
+    path = os.path.join(data_dir, f"{symbol}_{td}.csv")
+    return pd.read_csv(path).to_numpy(dtype=np.float64)
+
+
+def load_day(symbol, td, data_dir, store_dir=None):
+    """返回 (rows, 7) 分钟线数组; 缺失时抛 FileNotFoundError / EmptyDataError。"""
+    if store_dir is None:
+        store_dir = os.path.join(data_dir, "_store")
+    store = get_store(symbol, store_dir)
+    if store is not None and td in store:
+        return store.day(td)
+    return read_csv_day(symbol, td, data_dir)
+
+
+# ---------------------------------------------
+# 一次性打包 (增量)
+# ---------------------------------------------
+
+def ingest(symbol, data_dir, store_dir=None, batch_size=250):
+    """把 data_dir 下 symbol 的全部逐日 CSV 追加进列式存储, 返回新写入的天数。"""
+    if store_dir is None:
+        store_dir = os.path.join(data_dir, "_store")
+    store = BarStore(symbol, store_dir)
+
+    prefix = f"{symbol}_"
+    tds = []
+    for fname in os.listdir(data_dir):
+        if fname.startswith(prefix) and fname.endswith(".csv"):
+            stem = fname[len(prefix):-4]
+            if stem.isdigit() and int(stem) not in store:
+                tds.append(int(stem))
+    tds.sort()
+
+    n_new = 0
+    batch = []
+    for td in tds:
+        try:
+            arr = read_csv_day(symbol, td, data_dir)
+        except pd.errors.EmptyDataError:
+            print(f"跳过 {td}, {symbol} 空文件")
+            continue
+        if len(arr) == 0 or len(arr) > N_MINUTES or arr.shape[1] != N_COLS:
+            # 非标准交易时段(如2016年前IF的270分钟)保留在CSV中读取
+            print(f"跳过 {td}, {symbol} 行列数 {arr.shape} 不符合存储格式")
+            continue
+        batch.append((td, arr))
+        if len(batch) >= batch_size:
+            n_new += store.append(batch)
+            batch = []
+    if batch:
+        n_new += store.append(batch)
+
+    _stores.pop((symbol, store_dir), None)
+    print(f"{symbol}: 新增 {n_new} 天, 共 {len(store)} 天 -> {store.path}")
+    return n_new
+
+
+if __name__ == "__main__":
+    from CTA_BT.CTA_BTv3 import DATA_DIR
+
+    for sym in sys.argv[1:] or ["IM"]:
+        ingest(sym, DATA_DIR)
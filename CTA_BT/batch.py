@@ -0,0 +1,180 @@
+"""
+批量回测 (Batch Runner)
+
+自动发现项目中全部 BaseStrategy 子类, 对每个品种逐日运行:
+    每个 (品种, 交易日) 只读取一次行情, 同日所有策略共用这份数据与一个 DayCache
+    (如 AC / AO 的中间价滚动均值只算一次), 策略数增加时读取开销不变。
+每个 (策略, 品种) 照常输出日结果 CSV、交易明细日志与累计收益图, 另外汇总一张对比表。
+
+用法:
+    python -m CTA_BT.batch --symbols IM IF --jobs 4
+    python -m CTA_BT.batch --symbols IM --strategies ADX AO
+
+注意: 批量回测不读写逐日结果缓存 (result_cache), 每次全部重算。
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from CTA_BT.CTA_BTv3 import (ROOT_DIR, day_result, get_result_dir, load_tradedates, map_days,
+                              save_results)
+from CTA_BT.catalog import split_work
+from CTA_BT.day_cache import DayCache
+from CTA_BT.journal import TradeJournal
+from CTA_BT.metrics import MetricsAccumulator, day_turnover
+from CTA_BT.sweep import make_variant
+
+
+def for_symbol(strategy_cls, symbol):
+    # 同一策略换品种: 以类属性覆盖 symbol, 名称中的品种前缀随之替换
+    if symbol == strategy_cls.symbol:
+        return strategy_cls
+    return make_variant(strategy_cls, {"symbol": symbol})
+
+
+def _load_key(cls):
+    # 读取方式相同的策略可共用同一份行情 (含预热历史)
+    return (cls.data_dir, cls.store_dir, cls.warmup_bars, cls.gap_mode)
+
+
+def _in_range(cls, td):
+    # 策略自身的回测区间 [min_date, max_date], None 为不限
+    return (cls.min_date is None or td >= cls.min_date) and \
+        (cls.max_date is None or td <= cls.max_date)
+
+
+def batch_day(strategy_classes, symbol, td):
+    """单日: 每种读取方式读取一次行情, 依次运行全部策略, 返回逐策略的 (收益, 交易明细, 分钟持仓) 或 None。
+
+    td 不在策略自身回测区间内时该策略为 None, 不读取行情也不计算。
+    """
+    classes = [for_symbol(cls, symbol) for cls in strategy_classes]
+    out = [None] * len(classes)
+
+    groups = {}
+    for k, cls in enumerate(classes):
+        if _in_range(cls, td):
+            groups.setdefault(_load_key(cls), []).append(k)
+
+    for members in groups.values():
+        base = classes[members[0]](td, symbol)
+        try:
+            base.getOrgData()
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            continue
+        caches = {}   # 中间量按K线周期分开共享
+        for k in members:
+            stg = classes[k](td, symbol)
+            stg.share_data(base)
+            stg.cache = caches.setdefault(stg.bar_period, DayCache())
+            stg.run_backtest()
+            out[k] = day_result(stg)
+    return out
+
+
+def run_batch(strategies=None, symbols=("IM", "IF"), n_jobs=1, min_date=None,
+              headless=True, summary_path=None, save_positions=False):
+    """批量回测, 返回对比表 (每行一个策略 × 品种)。
+
+    strategies: {名称: 策略类}, 默认为 discover_strategies() 发现的全部策略
+    min_date: 统一回测起点; None 时取各策略 min_date 的最小值, 各策略仍只在自身 [min_date, max_date] 内回测
+    summary_path: 对比表保存路径, 默认项目根目录下 batch_summary.csv
+    save_positions: 为 True 时另外保存各 (策略, 品种) 的分钟持仓矩阵, 供 portfolio.py 组合
+    """
+    if strategies is None:
+        from CTA_BT.strategies import discover_strategies
+        strategies = discover_strategies()
+    keys = list(strategies)
+    classes = [strategies[k] for k in keys]
+    if min_date is None:
+        starts = [cls.min_date for cls in classes]
+        min_date = None if None in starts else min(starts)
+    tradedates = load_tradedates(min_date)
+
+    rows = []
+    for symbol in symbols:
+        variants = [for_symbol(cls, symbol) for cls in classes]
+        # 交易日志在策略得到第一个交易日结果时才打开 (mode="w" 会清空已有分段),
+        # 区间外或无数据、一天也没有运行的策略保留原有结果
+        journals = [None] * len(variants)
+        rslts = [[] for _ in variants]
+        accs = [MetricsAccumulator() for _ in variants]
+        helds = [([], []) for _ in variants]
+
+        # 至少一个策略在其回测区间内、且数据目录中有该品种数据的交易日
+        work = set()
+        for variant in variants:
+            work.update(split_work(variant, [td for td in tradedates if _in_range(variant, td)])[0])
+        work = sorted(work)
+
+        n_days = 0
+        for td, outs in map_days(batch_day, work, n_jobs, classes, symbol):
+            for k, res in enumerate(outs):
+                if res is None:
+                    continue
+                if journals[k] is None:
+                    v = variants[k]
+                    journals[k] = TradeJournal(os.path.join(get_result_dir(v), f"{v.name}_trades"),
+                                               segment_rows=20_000)
+                rslts[k].append([td, res[0], day_turnover(res[2])])
+                journals[k].append(res[1])
+                accs[k].add_result(td, res)
+                if save_positions:
+                    helds[k][0].append(td)
+                    helds[k][1].append(res[2])
+            n_days += any(res is not None for res in outs)
+        print(f"{symbol}: 共运行 {n_days} 个交易日, {len(variants)} 个策略")
+
+        for key, variant, journal, rslt, acc, (dates, held) in zip(keys, variants, journals, rslts,
+                                                                  accs, helds):
+            if journal is not None:
+                journal.close()
+            if not rslt:
+                print(f"跳过 {variant.name}: {symbol} 无数据")
+                continue
+            if save_positions:
+                from CTA_BT.portfolio import save_positions as _save_positions
+                _save_positions(os.path.join(get_result_dir(variant), f"{variant.name}_positions.npz"),
+                                dates, held, symbol, variant.name)
+            _, metrics = save_results(variant, rslt, get_result_dir(variant), headless)
+            rows.append({"strategy": key, "symbol": symbol, "name": variant.name, **metrics,
+                         **acc.trade_stats()})
+
+    table = pd.DataFrame(rows)
+    if len(table):
+        table = table.sort_values(["symbol", "sharpe"], ascending=[True, False])
+    if summary_path is None:
+        summary_path = os.path.join(ROOT_DIR, "batch_summary.csv")
+    table.to_csv(summary_path, index=False)
+    print(f"批量对比表已保存到：{summary_path}")
+    return table
+
+
+def main(argv=None):
+    from CTA_BT.strategies import discover_strategies
+
+    parser = argparse.ArgumentParser(description="全部策略 × 品种批量回测")
+    parser.add_argument("--symbols", nargs="+", default=["IM", "IF"])
+    parser.add_argument("--strategies", nargs="+", default=None,
+                        help="只运行这些文件夹中的策略, 如 ADX AO")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数, -1 为全部CPU核")
+    parser.add_argument("--min-date", type=int, default=None)
+    parser.add_argument("--out", default=None, help="对比表路径")
+    parser.add_argument("--positions", action="store_true", help="另存分钟持仓矩阵")
+    args = parser.parse_args(argv)
+
+    strategies = discover_strategies()
+    if args.strategies:
+        strategies = {k: v for k, v in strategies.items() if k.split(".")[0] in args.strategies}
+
+    table = run_batch(strategies, args.symbols, args.jobs, args.min_date, summary_path=args.out,
+                      save_positions=args.positions)
+    if len(table):
+        cols = ["name", "annual_ret", "sharpe", "calmar", "max_drawdown", "win_rate", "days"]
+        print(table[cols].to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,478 @@
+"""
+基准测试 (Benchmark Suite)
+
+四部分:
+    1. 合成行情: 以固定种子生成逼真的 240 分钟 OHLCV/OI 日数据, 格式与 Data/ 下的 CSV 一致
+       (日内 U 形波动与成交量、隔夜跳空、t 分布厚尾收益、0.2 点最小变动价位)
+    2. 计时: 每个策略分阶段计时 (读取 / prepare_data / 信号与结算), 给出每日与每 1000 日耗时,
+       分别测量向量化路径与逐分钟循环
+    3. 差分检查: 向量化等快速路径与逐分钟循环逐日比较日收益、交易明细与分钟持仓, 必须完全一致;
+       按品种 (IM / IF) 的参数扫描、滚动前推与逐轮淘汰须与各品种单独回测完全一致
+    4. 冷启动: 在全新的解释器中导入引擎、命令行入口与各策略模块的耗时, 并检查导入时
+       没有顺带加载 matplotlib 等重量级模块 (进程池子进程按 spawn 启动时每个都要付出这部分开销)
+
+结果保存为 JSON, 便于在不同提交之间比较性能回退。
+
+用法:
+    python -m CTA_BT.benchmark --days 250 --out bench.json
+    python -m CTA_BT.benchmark --days 250 --compare bench_old.json
+    python -m CTA_BT.benchmark --generate Data --days 500     # 只生成合成行情到 Data/
+    python -m CTA_BT.benchmark --startup --out startup.json    # 只测冷启动
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.bar_store import COLUMNS, MIN_INTS, N_MINUTES, ingest
+from CTA_BT.CTA_BTv3 import ROOT_DIR, load_tradedates, run_day, run_day_profiled
+from CTA_BT.metrics import column_metrics
+
+
+# ---------------------------------------------
+# 合成行情
+# ---------------------------------------------
+
+_T = np.arange(N_MINUTES)
+# 日内波动 U 形: 开盘与收盘附近放大, 午后开盘小幅抬升
+_VOL_SHAPE = 1.0 + 1.5 * np.exp(-_T / 15) + 0.8 * np.exp(-(N_MINUTES - 1 - _T) / 20) \
+    + 0.5 * np.exp(-np.abs(_T - 120) / 5) * (_T >= 120)
+
+
+def _round_tick(x, tick):
+    return np.round(x / tick) * tick
+
+
+def synth_day(rng, prev_close, tick=0.2, vol=0.0006):
+    """生成单日 (240, 7) 分钟线, 返回 (数组, 当日收盘价)。"""
+    gap = rng.normal(0.0, 0.005)
+    trend = rng.normal(0.0, 0.00015)            # 当日趋势强度
+    sigma = vol * _VOL_SHAPE * rng.lognormal(0.0, 0.25)
+    # t(4) 分布厚尾, 标准化到单位方差; 加少量一阶自相关
+    shocks = rng.standard_t(4, N_MINUTES) / np.sqrt(2.0)
+    r = np.empty(N_MINUTES)
+    prev = 0.0
+    for k in range(N_MINUTES):
+        prev = 0.1 * prev + sigma[k] * shocks[k]
+        r[k] = prev + trend
+
+    open0 = prev_close * np.exp(gap)
+    close = _round_tick(open0 * np.exp(np.cumsum(r)), tick)
+    open_ = np.empty(N_MINUTES)
+    open_[0] = _round_tick(open0, tick)
+    open_[1:] = close[:-1] + _round_tick(rng.normal(0.0, 0.3, N_MINUTES - 1) * tick, tick)
+
+    wick = np.abs(rng.normal(0.0, 1.0, (2, N_MINUTES))) * sigma * close * 0.8
+    high = _round_tick(np.maximum(open_, close) + wick[0], tick)
+    low = _round_tick(np.minimum(open_, close) - wick[1], tick)
+
+    volume = np.round(rng.lognormal(5.5, 0.4, N_MINUTES) * _VOL_SHAPE)
+    oi = 100000 + np.cumsum(np.round(rng.normal(0.0, 30.0, N_MINUTES)))
+
+    arr = np.column_stack([MIN_INTS, open_, close, high, low, volume, oi])
+    return arr, close[-1]
+
+
+def generate_data(data_dir, tradedates, symbol="IM", seed=0, start_price=6000.0,
+                  tick=0.2, missing=()):
+    """按交易日顺序写入 {symbol}_{td}.csv; missing 中的交易日不生成文件 (模拟缺数据)。"""
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    price = start_price
+    written = []
+    for td in tradedates:
+        arr, price = synth_day(rng, price, tick)
+        if td in missing:
+            continue
+        df = pd.DataFrame(arr, columns=COLUMNS)
+        int_cols = ["MinInt", "volume", "open_interest"]
+        df[int_cols] = df[int_cols].astype(np.int64)
+        df.to_csv(os.path.join(data_dir, f"{symbol}_{td}.csv"), index=False,
+                  float_format="%.1f")
+        written.append(td)
+    return written
+
+
+# ---------------------------------------------
+# 计时与差分检查
+# ---------------------------------------------
+
+def with_attrs(strategy_cls, **attrs):
+    # 以类属性覆盖生成临时子类 (如指向合成数据目录、切换结算路径)
+    attrs["__module__"] = strategy_cls.__module__
+    return type(strategy_cls.__name__, (strategy_cls,), attrs)
+
+
+def time_strategy(strategy_cls, tds, warmup_days=5):
+    """分阶段计时, 返回每日平均毫秒数与每 1000 日秒数。
+
+    先不计时地运行前 warmup_days 天, 排除首次导入、内存映射缺页等一次性开销。
+    """
+    for td in tds[:warmup_days]:
+        run_day(strategy_cls, td)
+
+    t_load = t_prepare = t_signal = 0.0
+    n_days = 0
+    for td in tds:
+        res, times = run_day_profiled(strategy_cls, td)
+        if res is None:
+            continue
+        t_load += times["load"]
+        t_prepare += times["prepare"]
+        t_signal += times["signal"]
+        n_days += 1
+
+    n = max(n_days, 1)
+    total = t_load + t_prepare + t_signal
+    return {
+        "days": n_days,
+        "load_ms": 1000 * t_load / n,
+        "prepare_ms": 1000 * t_prepare / n,
+        "signal_ms": 1000 * t_signal / n,
+        "total_ms": 1000 * total / n,
+        "per_1000_days_s": 1000 * total / n,
+    }
+
+
+def _same_records(a, b, tol):
+    if a.shape != b.shape:
+        return False
+    for field in a.dtype.names:
+        x, y = a[field], b[field]
+        if x.dtype.kind == "f":
+            if not np.allclose(x, y, rtol=0.0, atol=tol, equal_nan=True):
+                return False
+        elif not np.array_equal(x, y):
+            return False
+    return True
+
+
+def diff_paths(strategy_cls, tds, tol=0.0):
+    """逐日比较快速路径与逐分钟循环, 返回不一致的交易日列表。"""
+    fast = with_attrs(strategy_cls, vectorized=True)
+    loop = with_attrs(strategy_cls, vectorized=False)
+    mismatched = []
+    for td in tds:
+        a, b = run_day(fast, td), run_day(loop, td)
+        if a is None or b is None:
+            if (a is None) != (b is None):
+                mismatched.append(td)
+            continue
+        if abs(a[0] - b[0]) > tol or not _same_records(a[1], b[1], tol) \
+                or not np.allclose(a[2], b[2], rtol=0.0, atol=tol):
+            mismatched.append(td)
+    return mismatched
+
+
+def direct_returns(strategy_cls, tds):
+    # 逐日单独回测, 返回 {交易日: 日收益}, 不含无数据的交易日
+    out = {}
+    for td in tds:
+        res = run_day(strategy_cls, td)
+        if res is not None:
+            out[td] = res[0]
+    return out
+
+
+def diff_sweep(strategy_cls, tds, grid):
+    """参数扫描的每一列与该组合单独回测逐日比较, 返回不一致的组合名称列表。
+
+    网格含 symbol 时各列须取自各自品种的行情; 品种间行情不同, 若扫描共用了
+    同一份行情, 相应列会与单独回测不一致。
+    """
+    from CTA_BT.sweep import make_variant, param_grid, run_sweep
+
+    _, daily = run_sweep(strategy_cls, grid, tradedates=tds, save=False)
+    mismatched = []
+    for params, name in zip(param_grid(grid), daily.columns):
+        expected = direct_returns(make_variant(strategy_cls, params), tds)
+        col = daily[name].dropna()
+        if list(col.index) != list(expected) or \
+                not np.array_equal(col.values, list(expected.values())):
+            mismatched.append(name)
+    return mismatched
+
+
+def diff_walk_forward(strategy_cls, tds, grid, train_days, test_days):
+    """滚动前推与各组合单独回测的结果比较, 返回不一致的折序号列表。
+
+    每折选出的组合须与按单独回测收益打分的结果相同, 样本外收益须等于该组合单独回测的收益。
+    """
+    from CTA_BT.sweep import make_variant, param_grid, variant_name
+    from CTA_BT.walk_forward import make_folds, walk_forward
+
+    combos = param_grid(grid)
+    names = [variant_name(strategy_cls, p) for p in combos]
+    table, oos, _ = walk_forward(strategy_cls, grid, train_days, test_days, tradedates=tds,
+                                 save=False)
+    direct = pd.DataFrame({name: pd.Series(direct_returns(make_variant(strategy_cls, p), tds),
+                                           dtype=np.float64)
+                           for p, name in zip(combos, names)}, index=tds)
+    mismatched = []
+    for k, (train, test) in enumerate(make_folds(tds, train_days, test_days)):
+        scores = column_metrics(direct.loc[train].values)["sharpe"]
+        best = None if np.all(np.isnan(scores)) else names[int(np.nanargmax(scores))]
+        got = oos.loc[oos["fold"] == k, "ret"].to_numpy(dtype=np.float64)
+        expected = direct.loc[test, best].dropna().values if best else np.empty(0)
+        if table["name"].iloc[k] != best or not np.array_equal(got, expected):
+            mismatched.append(k)
+    return mismatched
+
+
+def diff_halving(strategy_cls, tds, grid):
+    """逐轮淘汰 (不淘汰任何组合) 的最终指标与各组合单独回测比较, 返回不一致的组合名称列表。"""
+    from CTA_BT.halving import successive_halving
+    from CTA_BT.sweep import make_variant, param_grid, variant_name
+
+    combos = param_grid(grid)
+    names = [variant_name(strategy_cls, p) for p in combos]
+    report = successive_halving(strategy_cls, grid, initial_days=max(1, len(tds) // 4),
+                                min_survivors=len(combos), tradedates=tds, save=False)
+    report = report.set_index("name")
+    # 与逐轮淘汰相同的 (交易日 × 全部组合) 矩阵, 逐列求和的舍入顺序一致
+    direct = [direct_returns(make_variant(strategy_cls, p), tds) for p in combos]
+    expected = column_metrics(np.array([[d.get(td, np.nan) for d in direct] for td in tds]))
+    mismatched = []
+    for k, name in enumerate(names):
+        row = report.loc[name]
+        if row["days_evaluated"] != len(direct[k]) or any(
+                not np.array_equal(row[key], values[k], equal_nan=True)
+                for key, values in expected.items()):
+            mismatched.append(name)
+    return mismatched
+
+
+def diff_search(strategy_cls, tds):
+    """参数搜索 (扫描、滚动前推、逐轮淘汰) 在网格 {"symbol": SEARCH_SYMBOLS} 上与单独回测比较。
+
+    返回 {检查项: 不一致的组合名称或折序号}; 品种间行情不同, 搜索若共用同一份行情即会不一致。
+    """
+    grid = {"symbol": list(SEARCH_SYMBOLS)}
+    return {
+        "sweep": diff_sweep(strategy_cls, tds, grid),
+        "walk_forward": diff_walk_forward(strategy_cls, tds, grid, len(tds) // 3, len(tds) // 6),
+        "halving": diff_halving(strategy_cls, tds, grid),
+    }
+
+
+# ---------------------------------------------
+# 冷启动
+# ---------------------------------------------
+
+# 导入引擎或策略时不应被顺带加载的模块 (只在绘图等需要时才导入)
+HEAVY_MODULES = ("matplotlib", "sklearn", "scipy")
+
+
+def _startup_targets(strategies):
+    targets = {
+        "python": "pass",
+        "numpy": "import numpy",
+        "pandas": "import pandas",
+        "engine": "import CTA_BT.CTA_BTv3",
+        "cli": "import CTA_BT.__main__",
+    }
+    for module in sorted({path.rsplit(".", 1)[0] for path in strategies}):
+        targets[module] = f"import {module}"
+    return targets
+
+
+def startup_times(strategies=None, repeat=5):
+    """每个导入目标在全新解释器中重复运行 repeat 次, 返回 {目标: {min_ms, median_ms, heavy}}。
+
+    heavy 为导入后已加载的 HEAVY_MODULES; 耗时含解释器自身启动 (见 "python" 一项)。
+    """
+    if strategies is None:
+        from CTA_BT.strategies import discover_strategies
+        strategies = discover_strategies()
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    check = f"import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+
+    results = {}
+    for label, stmt in _startup_targets(strategies).items():
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", f"{stmt}\n{check}"], cwd=ROOT_DIR, env=env,
+                                 capture_output=True, text=True, check=True)
+            times.append((time.perf_counter() - t0) * 1000)
+        heavy = [m for m in out.stdout.strip().split(",") if m]
+        results[label] = {"min_ms": min(times), "median_ms": statistics.median(times),
+                          "heavy": heavy}
+        print(f"{label:40s} 冷启动 {min(times):7.1f} ms (中位数 {statistics.median(times):7.1f})"
+              + (f"  重量级模块: {heavy}" if heavy else ""))
+    return results
+
+
+# ---------------------------------------------
+# 整体运行与结果比较
+# ---------------------------------------------
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _save_report(report, out):
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"基准结果已保存到：{out}")
+
+
+# 参数搜索检查: 网格为 {"symbol": SEARCH_SYMBOLS}, 在前 SEARCH_CHECK_DAYS 天上与单独回测比较
+# (滚动前推的训练 / 测试窗口分别取其 1/3 与 1/6)
+SEARCH_SYMBOLS = ("IM", "IF")
+SEARCH_CHECK_DAYS = 20
+
+
+def run_suite(strategies=None, n_days=250, seed=0, data_dir=None, pack=True,
+              start_date=20220101, out=None, startup=True):
+    """生成 (或使用已有的) 行情, 对每个策略计时并做差分检查, 返回结果字典。
+
+    strategies: {名称: 策略类}, 默认为项目中发现的全部策略
+    data_dir: 已有数据目录; None 时在临时目录生成 n_days 天合成行情, 结束后删除
+    pack: 生成后打包为列式存储, 读取计时与实际运行路径一致
+    startup: 同时测量冷启动耗时 (见 startup_times)
+    """
+    if strategies is None:
+        from CTA_BT.strategies import discover_strategies
+        strategies = discover_strategies()
+
+    tds = load_tradedates(start_date)[:n_days]
+    tmp_dir = None
+    if data_dir is None:
+        data_dir = tmp_dir = tempfile.mkdtemp(prefix="cta_bench_")
+        symbols = sorted({cls.symbol for cls in strategies.values()})
+        # 参数扫描检查用到的其他品种排在后面, 不改变策略品种的随机种子; 另缺一天数据
+        extra = [s for s in SEARCH_SYMBOLS if s not in symbols]
+        for k, symbol in enumerate(symbols + extra):
+            missing = tds[3:4] if symbol in extra else ()
+            generate_data(data_dir, tds, symbol, seed=seed + k, missing=missing)
+            if pack:
+                ingest(symbol, data_dir)
+
+    results = {}
+    try:
+        for name, cls in strategies.items():
+            target = with_attrs(cls, data_dir=data_dir, store_dir=None)
+            fast = time_strategy(with_attrs(target, vectorized=True), tds)
+            loop = time_strategy(with_attrs(target, vectorized=False), tds)
+            mismatched = diff_paths(target, tds)
+            search_bad = {k: v for k, v in diff_search(target, tds[:SEARCH_CHECK_DAYS]).items() if v}
+            results[name] = {
+                "fast": fast,
+                "loop": loop,
+                "speedup": loop["total_ms"] / fast["total_ms"] if fast["total_ms"] else None,
+                "paths_match": not mismatched,
+                "mismatched_days": mismatched,
+                "search_match": not search_bad,
+                "search_mismatched": search_bad,
+            }
+            print(f"{name:40s} fast {fast['total_ms']:7.2f} ms/日  loop {loop['total_ms']:7.2f} ms/日"
+                  f"  {'一致' if not mismatched else f'不一致 {len(mismatched)} 天'}"
+                  f"  参数搜索{'一致' if not search_bad else f'不一致 {search_bad}'}")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "n_days": len(tds),
+        "seed": seed,
+        "results": results,
+    }
+    if startup:
+        report["startup"] = startup_times(strategies, repeat=3)
+    if out:
+        _save_report(report, out)
+    return report
+
+
+def compare_reports(old, new, threshold=1.2, metric="total_ms"):
+    """比较两次基准结果, 返回变慢超过 threshold 倍的 (策略, 路径, 旧值, 新值, 倍数)。
+
+    冷启动按 min_ms 比较, 路径记为 "startup"。
+    """
+    regressions = []
+    for label, res in new.get("startup", {}).items():
+        before = old.get("startup", {}).get(label, {}).get("min_ms")
+        if before and res["min_ms"] / before > threshold:
+            regressions.append((label, "startup", before, res["min_ms"], res["min_ms"] / before))
+    for name, res in new.get("results", {}).items():
+        base = old.get("results", {}).get(name)
+        if base is None:
+            continue
+        for path in ("fast", "loop"):
+            before, after = base[path][metric], res[path][metric]
+            if before > 0 and after / before > threshold:
+                regressions.append((name, path, before, after, after / before))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="策略基准测试")
+    parser.add_argument("--days", type=int, default=250, help="交易日数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", default=None, help="使用已有数据目录而非合成行情")
+    parser.add_argument("--no-pack", action="store_true", help="合成行情不打包为列式存储")
+    parser.add_argument("--out", default=None, help="结果 JSON 路径")
+    parser.add_argument("--compare", default=None, help="与之前的结果 JSON 比较")
+    parser.add_argument("--threshold", type=float, default=1.2, help="判定变慢的倍数")
+    parser.add_argument("--generate", default=None, metavar="DIR",
+                        help="只在 DIR 下生成合成行情 (IM), 不运行基准")
+    parser.add_argument("--startup", action="store_true", help="只测量冷启动耗时")
+    parser.add_argument("--no-startup", action="store_true", help="不测量冷启动耗时")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        tds = generate_data(args.generate, load_tradedates(20220101)[:args.days], seed=args.seed)
+        print(f"已生成 {len(tds)} 天合成行情到：{args.generate}")
+        return 0
+
+    if args.startup:
+        report = {"commit": _git_commit(), "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                  "python": platform.python_version(), "startup": startup_times()}
+        if args.out:
+            _save_report(report, args.out)
+    else:
+        report = run_suite(n_days=args.days, seed=args.seed, data_dir=args.data,
+                           pack=not args.no_pack, out=args.out, startup=not args.no_startup)
+
+    failed = [name for name, res in report.get("results", {}).items() if not res["paths_match"]]
+    search_failed = [name for name, res in report.get("results", {}).items()
+                     if not res.get("search_match", True)]
+    heavy = {label: res["heavy"] for label, res in report.get("startup", {}).items()
+             if res["heavy"] and label not in ("python", "numpy", "pandas")}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        for name, path, before, after, ratio in compare_reports(old, report, args.threshold):
+            unit = "ms" if path == "startup" else "ms/日"
+            print(f"变慢: {name} [{path}] {before:.2f} -> {after:.2f} {unit} (x{ratio:.2f})")
+    if heavy:
+        print(f"冷启动时导入了重量级模块: {heavy}")
+    if failed:
+        print(f"快速路径与逐分钟循环不一致: {failed}")
+    if search_failed:
+        print(f"参数搜索与单独回测不一致: {search_failed}")
+    return 1 if failed or search_failed or heavy else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
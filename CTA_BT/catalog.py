@@ -0,0 +1,299 @@
+"""
+交易日历与数据目录 (Calendar & Data Catalog)
+
+TradingCalendar: tradedates.csv 进程内只读一次, 保存为有序数组, 区间 / 前后交易日查询均为二分查找。
+
+DataCatalog: 扫描数据根目录一次 (列出逐日 CSV 文件名与大小、读取列式存储索引),
+为每个品种建立逐日状态索引:
+    AVAILABLE : 有数据 (列式存储中的交易日, 或非空的逐日 CSV)
+    EMPTY     : 文件存在但没有数据行 (读取时抛 EmptyDataError 或得到 0 行)
+    MISSING   : 交易日历中有、数据目录中没有
+回测开始前据此给出精确的待计算交易日列表 (work_list), 不再逐日尝试读取再捕获异常,
+进程池分段、结果缓存也只面对真正有数据的交易日, 各段工作量均匀。
+
+索引按品种保存在列式存储目录下的 _catalog/{symbol}.npz (默认 {data_dir}/_store/_catalog,
+与列式存储一样是生成文件, 不与逐日 CSV 混放); 下次使用时比较数据目录与列式存储索引的
+修改时间、交易日历的范围, 以及空文件当前的大小, 有变化时自动重扫。
+目录不可写时只在内存中使用, 不影响回测。
+
+用法:
+    catalog = get_catalog(DATA_DIR)
+    catalog.available("IM", 20220101, 20231231)      # 有数据的交易日
+    work, skipped = catalog.work_list("IM", tradedates)
+    python -m CTA_BT.catalog IM IF                    # 打印各品种的数据覆盖情况
+"""
+import argparse
+import bisect
+import os
+
+import numpy as np
+
+from CTA_BT.bar_store import BarStore
+
+
+MISSING, AVAILABLE, EMPTY = 0, 1, 2
+STATUS_NAMES = {MISSING: "missing", AVAILABLE: "available", EMPTY: "empty"}
+
+# 小于此大小的 CSV 打开确认是否只有表头; 240 行分钟线约 15KB, 正常文件不会被打开
+_SMALL_FILE = 1024
+
+
+class TradingCalendar:
+    """有序交易日数组; range / prev / next 均为二分查找。"""
+
+    def __init__(self, dates):
+        self.dates = np.unique(np.asarray(dates, dtype=np.int64))
+        self._list = self.dates.tolist()
+
+    @classmethod
+    def from_csv(cls, path):
+        import pandas as pd
+        return cls(pd.read_csv(path)["TradingDayInt"].to_numpy())
+
+    def __len__(self):
+        return len(self._list)
+
+    def __contains__(self, td):
+        k = bisect.bisect_left(self._list, td)
+        return k < len(self._list) and self._list[k] == td
+
+    def range(self, start=None, end=None):
+        """[start, end] 内的交易日列表, None 为不限。"""
+        lo = 0 if start is None else bisect.bisect_left(self._list, start)
+        hi = len(self._list) if end is None else bisect.bisect_right(self._list, end)
+        return self._list[lo:hi]
+
+    def prev(self, td):
+        # td 之前最近的交易日, 没有时为 None
+        k = bisect.bisect_left(self._list, td)
+        return self._list[k - 1] if k > 0 else None
+
+    def next(self, td):
+        k = bisect.bisect_right(self._list, td)
+        return self._list[k] if k < len(self._list) else None
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _header_only(path):
+    # 只有表头 (或只有空行) 的小文件视为空
+    with open(path, "rb") as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    return len(lines) <= 1
+
+
+class DataCatalog:
+    """单个数据根目录下各品种的逐日数据状态; 每个品种首次查询时加载或扫描。"""
+
+    def __init__(self, data_dir, store_dir=None, calendar=(), catalog_dir=None):
+        self.data_dir = data_dir
+        self.store_dir = store_dir or os.path.join(data_dir, "_store")
+        self.catalog_dir = catalog_dir or os.path.join(self.store_dir, "_catalog")
+        self.calendar = np.asarray(calendar, dtype=np.int64)
+        self._listing = None
+        self._index = {}
+
+    # ---------------------------------------------
+    # 扫描与持久化
+    # ---------------------------------------------
+
+    def _files(self):
+        # 数据目录只列一次: {品种: {日期: 文件大小}}
+        if self._listing is None:
+            listing = {}
+            try:
+                entries = list(os.scandir(self.data_dir))
+            except FileNotFoundError:
+                entries = []
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(".csv") or "_" not in name:
+                    continue
+                symbol, _, stem = name[:-4].rpartition("_")
+                if stem.isdigit():
+                    listing.setdefault(symbol, {})[int(stem)] = entry.stat().st_size
+            self._listing = listing
+        return self._listing
+
+    def _signature(self, symbol):
+        cal = self.calendar
+        return np.array([
+            _mtime_ns(self.data_dir),
+            _mtime_ns(os.path.join(self.store_dir, symbol, "index.npy")),
+            len(cal), cal[0] if len(cal) else 0, cal[-1] if len(cal) else 0,
+        ], dtype=np.int64)
+
+    def scan(self, symbol):
+        """重新扫描 symbol, 返回 (日期, 状态, 文件大小) 三个数组并写入索引文件。"""
+        try:
+            # 先建索引目录 (可能连带创建 _store), 签名中的数据目录修改时间不再因此变化
+            os.makedirs(self.catalog_dir, exist_ok=True)
+        except OSError:
+            pass
+        signature = self._signature(symbol)
+        files = self._files().get(symbol, {})
+        stored = set()
+        if BarStore.exists(symbol, self.store_dir):
+            index = BarStore(symbol, self.store_dir).index
+            stored = {int(d) for d, rows in zip(index["date"], index["rows"]) if rows > 0}
+
+        dates = np.union1d(self.calendar, np.fromiter(set(files) | stored, dtype=np.int64))
+        status = np.full(len(dates), MISSING, dtype=np.int8)
+        sizes = np.full(len(dates), -1, dtype=np.int64)
+        for k, td in enumerate(dates.tolist()):
+            if td in stored:
+                status[k] = AVAILABLE
+            size = files.get(td)
+            if size is None:
+                continue
+            sizes[k] = size
+            if td in stored:
+                continue
+            path = os.path.join(self.data_dir, f"{symbol}_{td}.csv")
+            empty = size == 0 or (size < _SMALL_FILE and _header_only(path))
+            status[k] = EMPTY if empty else AVAILABLE
+
+        self._set(symbol, dates, status, sizes)
+        try:
+            tmp_path = os.path.join(self.catalog_dir, f"{symbol}.tmp.npz")
+            np.savez(tmp_path, dates=dates, status=status, sizes=sizes, signature=signature)
+            os.replace(tmp_path, os.path.join(self.catalog_dir, f"{symbol}.npz"))
+        except OSError:
+            pass
+        return dates, status, sizes
+
+    def _load(self, symbol):
+        # 读取已保存的索引; 签名不符或空文件大小变化时返回 None (需要重扫)
+        path = os.path.join(self.catalog_dir, f"{symbol}.npz")
+        try:
+            with np.load(path) as f:
+                dates, status, sizes, signature = f["dates"], f["status"], f["sizes"], f["signature"]
+        except (OSError, KeyError, ValueError):
+            return None
+        if not np.array_equal(signature, self._signature(symbol)):
+            return None
+        for td, size in zip(dates[status == EMPTY].tolist(), sizes[status == EMPTY].tolist()):
+            try:
+                if os.stat(os.path.join(self.data_dir, f"{symbol}_{td}.csv")).st_size != size:
+                    return None
+            except OSError:
+                return None
+        return dates, status, sizes
+
+    def _set(self, symbol, dates, status, sizes):
+        self._index[symbol] = {
+            "dates": dates,
+            "status": status,
+            "sizes": sizes,
+            "available": dates[status == AVAILABLE].tolist(),
+            "pos": {td: k for k, td in enumerate(dates.tolist())},
+        }
+
+    def index(self, symbol, rescan=False):
+        entry = self._index.get(symbol)
+        if entry is None or rescan:
+            loaded = None if rescan else self._load(symbol)
+            if loaded is None:
+                self.scan(symbol)
+            else:
+                self._set(symbol, *loaded)
+            entry = self._index[symbol]
+        return entry
+
+    # ---------------------------------------------
+    # 查询
+    # ---------------------------------------------
+
+    def status(self, symbol, td):
+        entry = self.index(symbol)
+        k = entry["pos"].get(int(td))
+        return MISSING if k is None else int(entry["status"][k])
+
+    def available(self, symbol, start=None, end=None):
+        """[start, end] 内有数据的交易日列表 (二分查找)。"""
+        days = self.index(symbol)["available"]
+        lo = 0 if start is None else bisect.bisect_left(days, start)
+        hi = len(days) if end is None else bisect.bisect_right(days, end)
+        return days[lo:hi]
+
+    def work_list(self, symbol, tds):
+        """把 tds 分为 (有数据的交易日列表, {无数据的交易日: "missing" / "empty"})。"""
+        entry = self.index(symbol)
+        pos, status = entry["pos"], entry["status"]
+        work, skipped = [], {}
+        for td in tds:
+            k = pos.get(int(td))
+            s = MISSING if k is None else status[k]
+            if s == AVAILABLE:
+                work.append(td)
+            else:
+                skipped[td] = STATUS_NAMES[s]
+        return work, skipped
+
+    def summary(self, symbol):
+        # 首个至末个数据文件之间的覆盖情况
+        entry = self.index(symbol)
+        present = entry["dates"][entry["status"] != MISSING]
+        if not entry["available"]:
+            return {"symbol": symbol, "available": 0}
+        in_range = (entry["dates"] >= present[0]) & (entry["dates"] <= present[-1])
+        counts = np.bincount(entry["status"][in_range], minlength=3)
+        return {"symbol": symbol, "first": int(present[0]), "last": int(present[-1]),
+                "available": int(counts[AVAILABLE]), "empty": int(counts[EMPTY]),
+                "missing": int(counts[MISSING])}
+
+
+_catalogs = {}
+
+
+def get_catalog(data_dir, store_dir=None):
+    # 进程内按数据目录复用; 交易日历取 tradedates.csv
+    key = (data_dir, store_dir)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        from CTA_BT.CTA_BTv3 import trade_calendar
+        catalog = _catalogs[key] = DataCatalog(data_dir, store_dir, trade_calendar())
+    return catalog
+
+
+def split_work(strategy_cls, tds):
+    """策略的待计算交易日与无数据交易日, 见 DataCatalog.work_list。
+
+    数据目录索引只反映 load_day 读取的文件; 策略重写了 getOrgData (另有数据来源) 时
+    索引不适用, 全部交易日照常计算, 读取失败的交易日由逐日回测按原规则跳过。
+    """
+    from CTA_BT.CTA_BTv3 import _default_loader
+    if not _default_loader(strategy_cls):
+        return list(tds), {}
+    catalog = get_catalog(strategy_cls.data_dir, strategy_cls.store_dir)
+    return catalog.work_list(strategy_cls.symbol, tds)
+
+
+def main(argv=None):
+    from CTA_BT.CTA_BTv3 import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="扫描数据目录, 打印各品种的数据覆盖情况")
+    parser.add_argument("symbols", nargs="*", default=None, help="品种, 默认为目录中的全部品种")
+    parser.add_argument("--data", default=DATA_DIR)
+    parser.add_argument("--rescan", action="store_true", help="忽略已保存的索引重新扫描")
+    args = parser.parse_args(argv)
+
+    catalog = get_catalog(args.data)
+    for symbol in args.symbols or sorted(catalog._files()):
+        catalog.index(symbol, rescan=args.rescan)
+        s = catalog.summary(symbol)
+        if not s["available"]:
+            print(f"{symbol}: 无数据")
+            continue
+        print(f"{symbol}: {s['first']} ~ {s['last']}  有数据 {s['available']} 天, "
+              f"空文件 {s['empty']} 天, 缺失 {s['missing']} 天")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+"""
+交易成本敏感性 (Cost Sensitivity)
+
+回测收益均未扣成本 (BaseStrategy.CmpRet 中的费率为 0)。成本与换手成正比, 不必按每档
+费率重跑回测: 日结果 CSV 中记录了当日换手 turnover = Σ|Δ仓位| (建仓、调仓、反手、收盘
+平仓均计入, 反手计 2), 每单位换手的成本为 c 时
+    净日收益 = ret - c × turnover
+一组 (手续费, 滑点) 组合一次矩阵运算得到全部净收益序列, 再逐列计算指标。
+手续费与滑点均按成交金额的比例、每单位换手 (单边) 计, 如万分之 0.23 即 0.000023。
+
+盈亏平衡成本 = Σret / Σturnover: 单边成本高于此值时累计净收益为负。
+每分钟的换手由分钟持仓得到 (metrics.minute_turnover, 持仓见 {name}_positions.npz)。
+
+用法:
+    python -m CTA_BT.costs ADX/IM_ADX14.csv QJTP/IM_QJTP.csv \\
+        --fees 0 0.000023 0.0001 --slippage 0 0.00005 0.0001
+    table, breakeven = cost_sensitivity(pd.read_csv("ADX/IM_ADX14.csv"))
+"""
+import argparse
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.metrics import column_metrics
+
+
+DEFAULT_FEES = (0.0, 0.000023, 0.00005, 0.0001)
+DEFAULT_SLIPPAGES = (0.0, 0.00005, 0.0001)
+
+
+def net_returns(ret, turnover, costs):
+    """(天数,) 日收益与换手 × (n,) 单边成本 -> (天数, n) 净日收益矩阵。"""
+    ret = np.asarray(ret, dtype=np.float64)
+    turnover = np.asarray(turnover, dtype=np.float64)
+    costs = np.asarray(costs, dtype=np.float64)
+    return ret[:, None] - turnover[:, None] * costs[None, :]
+
+
+def breakeven_cost(ret, turnover):
+    total = float(np.sum(turnover))
+    return float(np.sum(ret)) / total if total else np.nan
+
+
+def cost_sensitivity(daily, fees=DEFAULT_FEES, slippages=DEFAULT_SLIPPAGES, annual_days=242):
+    """返回 (结果表, 盈亏平衡成本)。
+
+    daily: 含 ret 与 turnover 列的日结果 (run_backtest 保存的 {name}.csv)
+    结果表每行一个 (手续费, 滑点) 组合: 合计成本、年化、夏普、卡玛、最大回撤与年化成本拖累
+    """
+    if "turnover" not in daily:
+        raise ValueError("日结果缺少 turnover 列, 请用当前版本重新运行 run_backtest")
+    grid = pd.DataFrame(list(itertools.product(fees, slippages)), columns=["fee", "slippage"])
+    grid["cost"] = grid["fee"] + grid["slippage"]
+
+    ret = daily["ret"].to_numpy(dtype=np.float64)
+    turnover = daily["turnover"].to_numpy(dtype=np.float64)
+    m = column_metrics(net_returns(ret, turnover, grid["cost"]), annual_days)
+    table = grid.assign(**m)
+    table["cost_drag"] = grid["cost"] * turnover.mean() * annual_days if len(ret) else np.nan
+    return table, breakeven_cost(ret, turnover)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按一组手续费 / 滑点计算净收益指标")
+    parser.add_argument("paths", nargs="+", help="run_backtest 保存的日结果 CSV")
+    parser.add_argument("--fees", type=float, nargs="+", default=list(DEFAULT_FEES),
+                        help="单边手续费率")
+    parser.add_argument("--slippage", type=float, nargs="+", default=list(DEFAULT_SLIPPAGES),
+                        help="单边滑点 (按成交金额比例)")
+    args = parser.parse_args(argv)
+
+    summary = []
+    for path in args.paths:
+        daily = pd.read_csv(path)
+        table, breakeven = cost_sensitivity(daily, args.fees, args.slippage)
+        out_path = os.path.splitext(path)[0] + "_costs.csv"
+        table.to_csv(out_path, index=False)
+        print(f"成本敏感性结果已保存到：{out_path}")
+        summary.append({"name": os.path.splitext(os.path.basename(path))[0],
+                        "turnover_per_day": daily["turnover"].mean(),
+                        "breakeven_cost": breakeven})
+        print(table[["fee", "slippage", "annual_ret", "sharpe", "calmar"]].to_string(index=False))
+    print(pd.DataFrame(summary).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
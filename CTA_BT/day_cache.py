@@ -0,0 +1,70 @@
+"""
+单日共享中间量缓存 (DayCache)
+
+同一交易日、同一份行情下, 不同参数组合反复用到的中间序列只计算一次:
+    - 滚动均值 / 标准差: 按 (序列, 窗口) 记忆, 直接调用 pandas 的滚动算法, 与单独回测逐位相同
+      (累计和相减在窗口内价格不变时与 pandas 的结果有末位差异, 会改变 AO 等策略的相等比较)
+    - ADX 的 TR / +DM / -DM: 与周期 N 无关, 每天只算一次
+    - EMA: 按 (序列, 平滑系数) 记忆
+单次回测时每个策略实例自带一个 DayCache; 参数扫描时同一天的所有参数组合共用一个。
+"""
+import numpy as np
+import pandas as pd
+
+from CTA_BT.indicators import ema, rolling_mean, rolling_std
+
+
+class DayCache:
+
+    def __init__(self):
+        self._memo = {}
+
+    def get(self, key, fn):
+        # 通用记忆: key 不存在时调用 fn() 计算并缓存
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    # ---------------------------------------------
+    # 滚动统计
+    # ---------------------------------------------
+
+    def rolling_mean(self, name, x, n):
+        """pd.Series(x).rolling(n).mean() 的记忆版本, 同一 (序列, 窗口) 每天只算一次。"""
+        return self.get(("mean", name, n), lambda: rolling_mean(x, n))
+
+    def rolling_std(self, name, x, n, ddof=1):
+        """pd.Series(x).rolling(n).std(ddof) 的记忆版本。"""
+        return self.get(("std", name, n, ddof), lambda: rolling_std(x, n, ddof))
+
+    # ---------------------------------------------
+    # 指数平滑
+    # ---------------------------------------------
+
+    def ema(self, name, x, span=None, alpha=None):
+        """pandas ewm(adjust=False) 的记忆版本, span / alpha 二选一。"""
+        key = ("ema", name, span, alpha)
+        return self.get(key, lambda: ema(x, span=span, alpha=alpha))
+
+    # ---------------------------------------------
+    # ADX 中间量
+    # ---------------------------------------------
+
+    def adx_components(self, high, low, close):
+        """返回 (TR, +DM, -DM), 与 ADX 周期 N 无关。"""
+        def build():
+            high_s = pd.Series(high)
+            low_s = pd.Series(low)
+            prev_close = pd.Series(close).shift(1)
+
+            tr1 = high_s - low_s
+            tr2 = (high_s - prev_close).abs()
+            tr3 = (prev_close - low_s).abs()
+            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1).values
+
+            hd = high_s - high_s.shift(1)
+            ld = low_s.shift(1) - low_s
+            plus_dm = np.where((hd > 0) & (hd > ld), hd, 0.0)
+            minus_dm = np.where((ld > 0) & (ld > hd), ld, 0.0)
+            return tr, plus_dm, minus_dm
+        return self.get(("adx_components",), build)
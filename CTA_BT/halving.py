@@ -0,0 +1,190 @@
+"""
+逐轮淘汰搜索 (Successive Halving)
+
+大参数网格逐个跑满全部交易日代价很高, 而多数组合只看一小部分交易日就已明显落后。
+逐轮淘汰把全部组合先放在少量抽样交易日上回测, 按指标淘汰排名靠后的部分, 幸存者
+再在更多交易日上继续, 直到最后一轮在全部交易日上排名:
+    第 r 轮交易日数 = initial_days × eta^r (最后一轮为全部交易日)
+    每轮保留约 1/eta 的组合 (至少 min_survivors 个)
+
+抽样交易日按固定随机种子打乱日历后依次取前若干天, 覆盖全部历史区间, 不偏向某一段行情;
+各轮的日集合逐轮嵌套, 已回测过的 (交易日, 组合) 结果直接复用, 每轮只补算新增的交易日。
+打分时抽样日按日期顺序排列, 卡玛的回撤因此只是在抽样日上的近似。
+回测沿用 run_sweep 的单日循环 (每个数据来源每日读取一次行情、同日组合共用 DayCache),
+交易日分段在进程池中并行; 网格含 symbol 时各组合在自己品种的行情上回测、打分。
+
+用法:
+    from CTA_BT.halving import successive_halving
+    report = successive_halving(BollingerStrategy,
+                                {"MDAY": [10, 15, 20], "NDAY": [2, 5], "NSTD": [1.5, 2.0, 2.5]},
+                                initial_days=60, eta=3, metric="calmar", n_jobs=8)
+
+    python -m CTA_BT.halving Alligator.strategy.AlligatorStrategy FAST=3,5,8 MID=8,13 \\
+        SLOW=13,21,34 symbol=IM,IF --initial-days 60 --eta 3 --jobs 8
+
+report 每行一个组合, 按最终名次排列: 幸存者在前, 被淘汰者按淘汰轮次由晚到早;
+列含参数、状态、已回测交易日数、各指标, 以及被淘汰的轮次与原因。
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.CTA_BTv3 import get_result_dir, load_tradedates, map_days
+from CTA_BT.metrics import column_metrics
+from CTA_BT.sweep import make_variant, param_grid, parse_grid, sweep_day, variant_name, work_days
+
+
+METRICS = ("sharpe", "calmar")
+
+
+def halving_budgets(n_days, initial_days, eta):
+    # 各轮累计交易日数: initial_days, ×eta, ×eta^2, ..., 最后一轮为全部交易日
+    budgets = []
+    budget = max(1, initial_days)
+    while budget < n_days:
+        budgets.append(budget)
+        budget = int(math.ceil(budget * eta))
+    budgets.append(n_days)
+    return budgets
+
+
+def _ranked(scores, alive):
+    # 幸存组合按得分从高到低排序, 无效得分 (NaN) 排在最后
+    keys = np.where(np.isnan(scores[alive]), -np.inf, scores[alive])
+    return alive[np.argsort(-keys, kind="stable")]
+
+
+def successive_halving(strategy_cls, grid, initial_days=60, eta=2, metric="sharpe",
+                       min_survivors=1, n_jobs=1, tradedates=None, seed=0, save=True):
+    """逐轮淘汰搜索, 返回按名次排列的结果表。
+
+    grid: {参数名: 取值列表}, 同 run_sweep
+    initial_days: 第一轮的抽样交易日数
+    eta: 每轮交易日数的增长倍数, 同时每轮保留约 1/eta 的组合
+    metric: 排名指标, "sharpe" 或 "calmar"
+    tradedates: 交易日历, 默认从 min_date 起的全部交易日; 无数据的交易日不参与抽样
+    seed: 抽样交易日的随机种子, 固定时结果可复现
+    """
+    if metric not in METRICS:
+        raise ValueError(f"未知的排名指标: {metric}, 可选 {METRICS}")
+    if eta <= 1:
+        raise ValueError(f"eta 须大于 1, 实际为 {eta}")
+    combos = param_grid(grid)
+    names = [variant_name(strategy_cls, p) for p in combos]
+    if tradedates is None:
+        tradedates = load_tradedates(strategy_cls.min_date)
+    # 至少一个组合有数据的交易日 (网格含 symbol 时按各品种分别查询)
+    tds = work_days([make_variant(strategy_cls, p) for p in combos], tradedates)
+
+    # 打乱后的日历; 第 r 轮使用前 budgets[r] 天 (按日期排序后回测与打分)
+    order = np.random.default_rng(seed).permutation(len(tds))
+    budgets = halving_budgets(len(tds), initial_days, eta)
+
+    rets = np.full((len(tds), len(combos)), np.nan)
+    has_data = np.zeros(len(tds), dtype=bool)
+    status = {k: {"round": None, "reason": ""} for k in range(len(combos))}
+    alive = np.arange(len(combos))
+    scores = np.full(len(combos), np.nan)
+    evaluated = np.zeros(len(combos), dtype=int)
+    stats = {}
+    done = 0
+    day_evals = 0
+
+    for r, budget in enumerate(budgets):
+        # 只补算本轮新增的交易日, 之前各轮的结果直接复用
+        new_rows = np.sort(order[done:budget])
+        survivors = [combos[k] for k in alive]
+        results = map_days(sweep_day, [tds[i] for i in new_rows], n_jobs, strategy_cls, survivors)
+        for row, (_, day_rets) in zip(new_rows, results):
+            if day_rets is None:
+                continue
+            has_data[row] = True
+            rets[row, alive] = day_rets
+        day_evals += len(new_rows) * len(alive)
+        done = budget
+
+        rows = np.sort(order[:budget])
+        rows = rows[has_data[rows]]
+        block = rets[np.ix_(rows, alive)]
+        m = column_metrics(block)   # 某组合当日无数据 (NaN) 时跳过
+        scores[alive] = m[metric]
+        evaluated[alive] = np.sum(~np.isnan(block), axis=0)
+        for key, values in m.items():
+            stats.setdefault(key, np.full(len(combos), np.nan))[alive] = values
+
+        ranked = _ranked(scores, alive)
+        last = r == len(budgets) - 1
+        keep = len(ranked) if last else max(min_survivors, int(math.ceil(len(ranked) / eta)))
+        print(f"第 {r + 1} 轮: {len(rows)} 个交易日, {len(alive)} 组参数, 保留 {min(keep, len(ranked))} 组")
+        if keep >= len(ranked):
+            continue
+
+        cutoff = scores[ranked[keep - 1]]
+        for rank, k in enumerate(ranked[keep:], start=keep + 1):
+            score = scores[k]
+            if np.isnan(score):
+                reason = f"{metric} 无效 (无收益波动或无交易日)"
+            else:
+                reason = f"{metric} {score:.3f} 排名 {rank}/{len(ranked)}, 低于保留线 {cutoff:.3f}"
+            status[k] = {"round": r + 1, "reason": reason}
+        alive = np.sort(ranked[:keep])
+
+    # 结果表: 幸存者按最终得分在前, 被淘汰者按轮次由晚到早、同轮按得分
+    report_rows = []
+    for k, (params, name) in enumerate(zip(combos, names)):
+        pruned = status[k]["round"]
+        report_rows.append({
+            "name": name, **params,
+            "status": "pruned" if pruned else "survivor",
+            "pruned_round": pruned,
+            "days_evaluated": int(evaluated[k]),
+            "score": scores[k],
+            **{key: values[k] for key, values in stats.items()},
+            "reason": status[k]["reason"],
+        })
+    report = pd.DataFrame(report_rows)
+    report["_round"] = report["pruned_round"].fillna(len(budgets) + 1)
+    report["_score"] = report["score"].fillna(-np.inf)
+    report = report.sort_values(["_round", "_score"], ascending=False, kind="stable")
+    report = report.drop(columns=["_round", "_score"]).reset_index(drop=True)
+    report.insert(0, "rank", np.arange(1, len(report) + 1))
+
+    full = len(tds) * len(combos)
+    if full:
+        print(f"共回测 {day_evals} 个 (交易日, 组合), 为全量扫描的 {day_evals / full:.1%}")
+    if save:
+        path = os.path.join(get_result_dir(strategy_cls), f"{strategy_cls.name}_halving.csv")
+        report.to_csv(path, index=False)
+        print(f"逐轮淘汰结果已保存到：{path}")
+    return report
+
+
+def main(argv=None):
+    from CTA_BT.strategies import load_strategy
+
+    parser = argparse.ArgumentParser(description="逐轮淘汰参数搜索")
+    parser.add_argument("strategy", help="策略类路径, 如 Bollinger.strategy.BollingerStrategy")
+    parser.add_argument("grid", nargs="+", help="参数网格, 如 MDAY=10,15,20 NSTD=1.5,2.0")
+    parser.add_argument("--initial-days", type=int, default=60, help="第一轮抽样交易日数")
+    parser.add_argument("--eta", type=float, default=2, help="每轮交易日增长倍数 / 淘汰比例")
+    parser.add_argument("--metric", choices=METRICS, default="sharpe")
+    parser.add_argument("--min-survivors", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数, -1 为全部CPU核")
+    parser.add_argument("--min-date", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    strategy_cls = load_strategy(args.strategy)
+    tds = load_tradedates(args.min_date or strategy_cls.min_date)
+    report = successive_halving(strategy_cls, parse_grid(args.grid), args.initial_days, args.eta,
+                                args.metric, args.min_survivors, args.jobs, tds, args.seed)
+    cols = ["rank", "name", "status", "days_evaluated", "score", "pruned_round"]
+    print(report[cols].head(20).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
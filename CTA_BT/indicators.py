@@ -0,0 +1,451 @@
+"""
+流式指标库 (Streaming Indicators)
+
+每个指标有两种形式, 数值完全一致:
+    流式对象: 逐根K线 update(x), 均摊 O(1), 可直接用于实盘逐分钟推送
+    批量函数: 对整日序列一次计算, 结果与原先 pandas 写法逐位相同
+
+    EMA            <-> ema(x, span / alpha)        pd.Series.ewm(adjust=False).mean()
+    RollingMean    <-> rolling_mean(x, n)          pd.Series.rolling(n).mean()
+    RollingStd     <-> rolling_std(x, n, ddof)     pd.Series.rolling(n).std(ddof)
+    RollingMax/Min <-> rolling_max / rolling_min
+    RollingArgMax  <-> rolling_argmax(x, n)        rolling(n).apply(np.argmax, raw=True)
+    RollingArgMin  <-> rolling_argmin(x, n)        rolling(n).apply(np.argmin, raw=True)
+
+    LastTrough     <-> last_trough(x)              零轴同侧最近局部低点的位置 (滞后一根)
+    LastPeak       <-> last_peak(x)                零轴同侧最近局部高点的位置 (滞后一根)
+
+另有只提供批量形式的整日工具: rolling_ols (滚动线性回归)。
+
+流式均值 / 方差沿用 pandas 的 Kahan 补偿求和与 Welford 更新 (均值含连续相同值的
+处理, 方差含病态时的整窗重算, 对应 pandas 3.x), 极值类使用单调双端队列, 窗口内相同极值取最早出现的位置 (与 np.argmax 一致)。
+"""
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class StreamIndicator:
+
+    def update(self, x):
+        raise NotImplementedError
+
+    def feed(self, values):
+        # 把整段序列逐个推入, 返回每一步的输出 (用于与批量形式核对)
+        return np.array([self.update(x) for x in values], dtype=np.float64)
+
+
+# ---------------------------------------------
+# 指数平滑
+# ---------------------------------------------
+
+def _ewm_com(span=None, alpha=None):
+    # 与 pandas 一致: 先换算为质心 com, 再由 com 得到实际使用的 alpha
+    if (span is None) == (alpha is None):
+        raise ValueError("span 与 alpha 必须且只能指定一个")
+    return (span - 1) / 2.0 if span is not None else (1 - alpha) / alpha
+
+
+class EMA(StreamIndicator):
+    """指数移动平均, adjust=False; span 为常规 EMA, alpha=1/N 为 Wilder / MEMA。"""
+
+    def __init__(self, span=None, alpha=None):
+        self.com = _ewm_com(span, alpha)
+        self.alpha = 1.0 / (1.0 + self.com)
+        self.old_wt_factor = 1.0 - self.alpha
+        self.old_wt = 1.0
+        self.value = np.nan
+
+    def update(self, x):
+        weighted = self.value
+        if weighted == weighted:
+            # 缺失值不更新均值, 但旧权重照常衰减 (ignore_na=False)
+            self.old_wt *= self.old_wt_factor
+            if x == x:
+                # 与 pandas 相同的加权形式, 常数序列时保持不变以避免舍入漂移
+                if weighted != x:
+                    old_wt = self.old_wt
+                    new_wt = 1.0 - old_wt if self.com == 1 else self.alpha
+                    weighted = (old_wt * weighted + new_wt * x) / (old_wt + new_wt)
+                self.old_wt = 1.0
+        elif x == x:
+            weighted = x
+        self.value = weighted
+        return weighted
+
+
+def wilder(n):
+    # Wilder 平滑 (MEMA): alpha = 1 / N
+    return EMA(alpha=1.0 / n)
+
+
+def ema(x, span=None, alpha=None):
+    return pd.Series(x, dtype=np.float64).ewm(span=span, alpha=alpha, adjust=False).mean().values
+
+
+# ---------------------------------------------
+# 滚动均值 / 标准差
+# ---------------------------------------------
+
+class _RollingWindow(StreamIndicator):
+    # 固定长度窗口: 记录进入窗口的值, 满 n 个后每步移出最早的一个
+
+    def __init__(self, n):
+        self.n = n
+        self.buf = deque()
+
+    def _push(self, x):
+        self.buf.append(x)
+        return self.buf.popleft() if len(self.buf) > self.n else None
+
+
+class RollingMean(_RollingWindow):
+    """滚动均值, 窗口内不足 n 个有效值时为 NaN。"""
+
+    def __init__(self, n):
+        super().__init__(n)
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.n_same = 0
+        self.prev = None
+
+    def update(self, x):
+        old = self._push(x)
+        if old is not None and old == old:
+            self.nobs -= 1
+            y = -old - self.comp_remove
+            t = self.sum_x + y
+            self.comp_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, old) < 0:
+                self.neg_ct -= 1
+
+        if self.prev is None:
+            self.prev = x
+        if x == x:
+            self.nobs += 1
+            y = x - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, x) < 0:
+                self.neg_ct += 1
+            self.n_same = self.n_same + 1 if x == self.prev else 1
+            self.prev = x
+
+        if self.nobs < self.n or self.nobs == 0:
+            return np.nan
+        result = self.sum_x / self.nobs
+        if self.n_same >= self.nobs:
+            result = self.prev
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.0
+        return result
+
+
+# 与 pandas 一致: 单步更新后平方和骤降到 1e3*eps 以下视为病态, 改为整窗重算
+_INV_COND_TOL = np.finfo(np.float64).eps * 1e3
+
+
+class RollingVar(_RollingWindow):
+    """滚动方差 (Welford 在线更新 + Kahan 补偿, 病态时整窗重算), ddof 默认 1。"""
+
+    def __init__(self, n, ddof=1):
+        super().__init__(n)
+        self.ddof = ddof
+        self._reset()
+
+    def _reset(self):
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.unstable = False
+
+    def _add(self, x):
+        if x != x:
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs += 1
+        prev_mean = self.mean_x - self.comp_add
+        y = x - self.comp_add
+        t = y - self.mean_x
+        self.comp_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm_x = self.ssqdm_x + (x - prev_mean) * (x - self.mean_x)
+        if prev_m2 * _INV_COND_TOL > self.ssqdm_x:
+            self.unstable = True
+
+    def _remove(self, x):
+        if x != x:
+            return
+        prev_m2 = self.ssqdm_x
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.comp_remove
+            y = x - self.comp_remove
+            t = y - self.mean_x
+            self.comp_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm_x = self.ssqdm_x - (x - prev_mean) * (x - self.mean_x)
+            if prev_m2 * _INV_COND_TOL > self.ssqdm_x:
+                self.unstable = True
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+            self.unstable = False
+
+    def update(self, x):
+        old = self._push(x)
+        if old is not None:
+            self._remove(old)
+        self._add(x)
+
+        if self.unstable:
+            # 抵消误差过大, 用当前窗口的值从头累计
+            self._reset()
+            for v in self.buf:
+                self._add(v)
+            self.unstable = False
+
+        if self.nobs < max(self.n, 1) or self.nobs <= self.ddof:
+            return np.nan
+        return self.ssqdm_x / (self.nobs - self.ddof)
+
+
+class RollingStd(RollingVar):
+
+    def update(self, x):
+        var = super().update(x)
+        # 与 pandas 的 zsqrt 一致: 负的舍入误差截为 0
+        return 0.0 if var < 0 else math.sqrt(var)
+
+
+def rolling_mean(x, n):
+    return pd.Series(x, dtype=np.float64).rolling(n).mean().values
+
+
+def rolling_std(x, n, ddof=1):
+    return pd.Series(x, dtype=np.float64).rolling(n).std(ddof=ddof).values
+
+
+# ---------------------------------------------
+# 滚动极值及其位置 (单调双端队列)
+# ---------------------------------------------
+
+class _RollingExtremum(StreamIndicator):
+    # 队列中保存 (序号, 值), 值单调; 队首即窗口极值, 相同值保留更早的一个
+
+    def __init__(self, n, is_max, as_index):
+        self.n = n
+        self.is_max = is_max
+        self.as_index = as_index
+        self.q = deque()
+        self.t = -1
+        self.last_nan = -n - 1
+
+    def update(self, x):
+        self.t += 1
+        t, q = self.t, self.q
+        if x != x:
+            self.last_nan = t
+        elif self.is_max:
+            while q and q[-1][1] < x:
+                q.pop()
+            q.append((t, x))
+        else:
+            while q and q[-1][1] > x:
+                q.pop()
+            q.append((t, x))
+
+        start = t - self.n + 1
+        while q and q[0][0] < start:
+            q.popleft()
+        # 窗口未满或窗口内有 NaN 时无输出 (同 pandas min_periods=n)
+        if start < 0 or self.last_nan >= start:
+            return np.nan
+        idx, val = q[0]
+        return float(idx - start) if self.as_index else val
+
+
+class RollingMax(_RollingExtremum):
+    def __init__(self, n):
+        super().__init__(n, is_max=True, as_index=False)
+
+
+class RollingMin(_RollingExtremum):
+    def __init__(self, n):
+        super().__init__(n, is_max=False, as_index=False)
+
+
+class RollingArgMax(_RollingExtremum):
+    """窗口内最大值的位置 (0 为窗口最早一根)。"""
+
+    def __init__(self, n):
+        super().__init__(n, is_max=True, as_index=True)
+
+
+class RollingArgMin(_RollingExtremum):
+    """窗口内最小值的位置 (0 为窗口最早一根)。"""
+
+    def __init__(self, n):
+        super().__init__(n, is_max=False, as_index=True)
+
+
+def _rolling_reduce(x, n, fn):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if n > len(x):
+        return out
+    windows = sliding_window_view(x, n)
+    res = fn(windows, axis=1).astype(np.float64)
+    # 窗口内含 NaN 时为 NaN
+    has_nan = sliding_window_view(np.isnan(x), n).any(axis=1)
+    res[has_nan] = np.nan
+    out[n - 1:] = res
+    return out
+
+
+def rolling_max(x, n):
+    return _rolling_reduce(x, n, np.max)
+
+
+def rolling_min(x, n):
+    return _rolling_reduce(x, n, np.min)
+
+
+def rolling_argmax(x, n):
+    return _rolling_reduce(x, n, np.argmax)
+
+
+def rolling_argmin(x, n):
+    return _rolling_reduce(x, n, np.argmin)
+
+
+# ---------------------------------------------
+# 滚动线性回归 (闭式解)
+# ---------------------------------------------
+
+def rolling_ols(y, n):
+    """对每个长度 n 的窗口以 x = 1..n 做一元线性回归, 返回 (斜率, 截距, R²)。
+
+    第 i 个输出对应窗口 y[i-n+1 : i+1], 前 n-1 个为 NaN。
+    由窗口内的去均值交叉和直接给出闭式解, 整日一次计算, 结果与逐窗口
+    sklearn LinearRegression 的 coef_ / intercept_ / score 在浮点精度内一致;
+    窗口内 y 为常数时 R² 记为 1 (与 sklearn r2_score 一致)。
+    """
+    y = np.asarray(y, dtype=np.float64)
+    m = len(y)
+    slope = np.full(m, np.nan)
+    intercept = np.full(m, np.nan)
+    r2 = np.full(m, np.nan)
+    if n < 2 or n > m:
+        return slope, intercept, r2
+
+    k = np.arange(1, n + 1, dtype=np.float64)
+    kc = k - k.mean()
+    sxx = kc @ kc
+
+    windows = sliding_window_view(y, n)
+    y_mean = windows.mean(axis=1)
+    yc = windows - y_mean[:, None]
+    sxy = yc @ kc
+    syy = np.einsum("ij,ij->i", yc, yc)
+
+    b = sxy / sxx
+    slope[n - 1:] = b
+    intercept[n - 1:] = y_mean - b * k.mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2[n - 1:] = np.where(syy > 0, sxy * sxy / (sxx * syy), 1.0)
+    return slope, intercept, r2
+
+
+# ---------------------------------------------
+# 零轴同侧的最近局部极值 (双峰 / 双底)
+# ---------------------------------------------
+
+def _last_extremum(x, is_peak):
+    x = np.asarray(x, dtype=np.float64)
+    idx = np.arange(len(x))
+    prev = np.concatenate([[np.nan], x[:-1]])
+    nxt = np.concatenate([x[1:], [np.nan]])
+    if is_peak:
+        is_ext = (x > prev) & (x > nxt) & (x > 0)
+        cross = x <= 0
+    else:
+        is_ext = (x < prev) & (x < nxt) & (x < 0)
+        cross = x >= 0
+    # 一遍前向扫描: 记录最近一次 "穿越零轴" 或 "局部极值" 的位置,
+    # 若最近一次是穿越零轴, 则自那以后尚无极值, 记为 -1
+    last = np.maximum.accumulate(np.where(cross | is_ext, idx, -1))
+    found = last >= 0
+    found[found] = is_ext[last[found]]
+    return np.where(found, last, -1)
+
+
+class _LastExtremum(StreamIndicator):
+    # 判断第 j 个值是否为局部极值需要第 j+1 个值, 因此 update(x[k]) 返回的是 last[k-1]
+    # (首次调用返回 -1); 与批量形式对已收盘位置的结果相同
+
+    def __init__(self, is_peak):
+        self.is_peak = is_peak
+        self.prev2 = np.nan
+        self.prev = np.nan
+        self.started = False
+        self.last = -1
+        self.k = -1
+
+    def update(self, x):
+        if self.started:
+            prev2, prev = self.prev2, self.prev
+            if self.is_peak:
+                is_ext = prev > prev2 and prev > x and prev > 0
+                cross = prev <= 0
+            else:
+                is_ext = prev < prev2 and prev < x and prev < 0
+                cross = prev >= 0
+            if cross:
+                self.last = -1
+            elif is_ext:
+                self.last = self.k
+        self.started = True
+        self.prev2, self.prev = self.prev, x
+        self.k += 1
+        return self.last
+
+
+class LastTrough(_LastExtremum):
+    """last_trough 的流式形式; update(x[k]) 返回 last_trough(x)[k-1]。"""
+
+    def __init__(self):
+        super().__init__(is_peak=False)
+
+
+class LastPeak(_LastExtremum):
+    """last_peak 的流式形式; update(x[k]) 返回 last_peak(x)[k-1]。"""
+
+    def __init__(self):
+        super().__init__(is_peak=True)
+
+
+def last_trough(x):
+    """last[k]: 截至 k (含), 自 x 最近一次 >= 0 以来最后一个严格局部低点的位置, 无则为 -1。
+
+    局部低点指 x[j] < x[j-1] 且 x[j] < x[j+1]; 判断 j 需要 x[j+1], 因此对 k
+    只有 j <= k-1 的结果才不含未来信息, 调用方应查询 last[i-2] 一类已收盘位置。
+    """
+    return _last_extremum(x, is_peak=False)
+
+
+def last_peak(x):
+    """last[k]: 截至 k (含), 自 x 最近一次 <= 0 以来最后一个严格局部高点的位置, 无则为 -1。"""
+    return _last_extremum(x, is_peak=True)
@@ -0,0 +1,153 @@
+"""
+分钟交易明细的二进制日志 (Trade Journal)
+
+每个交易日的交易明细是一个定长结构化数组 (TRADE_DTYPE), 字段与原 CSV 列一致:
+    date, minute_i, open_price, close_price, position, minute_ret
+回测时逐日追加到 TradeJournal: 先写入预分配的缓冲区, 满 segment_rows 行落盘为
+一个 .npy 分段 (只追加, 不改写), 内存占用与回测天数无关。
+
+目录结构:
+    {name}_trades/part-00000.npy, part-00001.npy, ...
+
+用法:
+    from CTA_BT.journal import load_journal
+    rec = load_journal("ADX/IM_ADX_16_trades")       # 结构化数组, 毫秒级读取
+    df = to_frame(rec)
+
+    python -m CTA_BT.journal ADX/IM_ADX_16_trades     # 导出为 IM_ADX_16_trades.csv
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+TRADE_DTYPE = np.dtype([
+    ("date", "i8"),
+    ("minute_i", "i4"),
+    ("open_price", "f8"),
+    ("close_price", "f8"),
+    ("position", "f8"),
+    ("minute_ret", "f8"),
+])
+
+
+def empty_records(n=0):
+    return np.zeros(n, dtype=TRADE_DTYPE)
+
+
+def make_records(td, minute_i, open_price, close_price, position, minute_ret):
+    # 由等长数组整体构造当日交易明细
+    rec = empty_records(len(minute_i))
+    rec["date"] = td
+    rec["minute_i"] = minute_i
+    rec["open_price"] = open_price
+    rec["close_price"] = close_price
+    rec["position"] = position
+    rec["minute_ret"] = minute_ret
+    return rec
+
+
+def to_frame(records):
+    return pd.DataFrame(records)
+
+
+def _segment_paths(path):
+    return sorted(glob.glob(os.path.join(path, "part-*.npy")))
+
+
+class TradeJournal:
+    """只追加的分段交易日志; mode="w" 清空已有分段, "a" 在其后继续追加。"""
+
+    def __init__(self, path, segment_rows=100_000, mode="w"):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        segments = _segment_paths(path)
+        if mode == "w":
+            for seg in segments:
+                os.remove(seg)
+            segments = []
+        self.n_segments = len(segments)
+        self.n_rows = 0
+        self._buf = empty_records(segment_rows)
+        self._n_buf = 0
+
+    def append(self, records):
+        records = np.asarray(records, dtype=TRADE_DTYPE)
+        size = len(self._buf)
+        while len(records):
+            take = min(size - self._n_buf, len(records))
+            self._buf[self._n_buf:self._n_buf + take] = records[:take]
+            self._n_buf += take
+            self.n_rows += take
+            records = records[take:]
+            if self._n_buf == size:
+                self.flush()
+
+    def flush(self):
+        if self._n_buf == 0:
+            return
+        seg_path = os.path.join(self.path, f"part-{self.n_segments:05d}.npy")
+        # 先写临时文件再改名, 中断时不会留下半个分段
+        tmp_path = seg_path + ".tmp.npy"
+        np.save(tmp_path, self._buf[:self._n_buf])
+        os.replace(tmp_path, seg_path)
+        self.n_segments += 1
+        self._n_buf = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_segments(path):
+    # 逐段返回只读内存映射, 导出或统计时不必一次载入全部
+    for seg in _segment_paths(path):
+        yield np.load(seg, mmap_mode="r")
+
+
+def load_journal(path):
+    """读取全部分段, 返回一个结构化数组。"""
+    segments = list(iter_segments(path))
+    if not segments:
+        return empty_records()
+    return np.concatenate(segments)
+
+
+def _whole_positions(path):
+    # 仓位全为整数 (-1 / 0 / 1 一类) 时为 True; 按 R2 等定仓的策略含小数仓位
+    for seg in iter_segments(path):
+        position = seg["position"]
+        if not np.array_equal(position, np.trunc(position)):
+            return False
+    return True
+
+
+def export_csv(path, csv_path=None):
+    """逐段导出为 CSV (列与原 *_trades.csv 一致), 返回 CSV 路径。
+
+    日志中仓位统一存为浮点数; 全部为整数时按整数写出 (-1 而非 -1.0), 与原 CSV 相同。
+    """
+    if csv_path is None:
+        csv_path = path.rstrip("/\\") + ".csv"
+    whole = _whole_positions(path)
+    with open(csv_path, "w", newline="") as f:
+        f.write(",".join(TRADE_DTYPE.names) + "\n")
+        for seg in iter_segments(path):
+            frame = to_frame(seg)
+            if whole:
+                frame["position"] = frame["position"].astype(np.int64)
+            frame.to_csv(f, header=False, index=False)
+    return csv_path
+
+
+if __name__ == "__main__":
+    for journal_path in sys.argv[1:]:
+        print(f"已导出：{export_csv(journal_path)}")
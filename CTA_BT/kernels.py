@@ -0,0 +1,129 @@
+"""
+仓位状态机内核 (Position Kernels)
+
+把逐分钟 GetSig 中的路径依赖仓位逻辑写成整日数组运算, 供 GetPositions 使用:
+    latch(sig, start)                               持有直到反向信号 (ADX / Aroon / Bollinger / AO)
+    exit_on(entry, exit_long, exit_short, start)    持有直到反向信号或出场条件 (AC 的强制出场)
+    size_by(direction, strength, threshold)         按信号强度定仓 (QJTP 以 R2 为仓位)
+
+每个内核有两种实现, 结果逐位相同:
+    numba: 安装了 numba 时对逐分钟循环做 JIT 编译 (首次调用有编译开销, 结果缓存到 __pycache__)
+    numpy: 未安装时的纯 NumPy 实现, 用 maximum.accumulate 求"最近一次信号"的位置, 无 Python 循环
+设置环境变量 CTA_BT_KERNELS=numpy 可强制使用 NumPy 实现。
+
+约定: start 之前的信号全部忽略、仓位为 0, 与逐分钟循环从 start 开始调用 GetSig 一致。
+"""
+import os
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKEND = "numba" if numba is not None and os.environ.get("CTA_BT_KERNELS", "").lower() != "numpy" \
+    else "numpy"
+
+
+# ---------------------------------------------
+# 逐分钟循环 (numba 编译的实现, 同时作为 NumPy 实现的对照)
+# ---------------------------------------------
+
+def _latch_loop(sig, start):
+    n = len(sig)
+    pos = np.zeros(n)
+    cur = 0.0
+    for i in range(start, n):
+        if sig[i] != 0:
+            cur = sig[i]
+        pos[i] = cur
+    return pos
+
+
+def _exit_on_loop(entry, exit_long, exit_short, start):
+    n = len(entry)
+    pos = np.zeros(n)
+    cur = 0.0
+    for i in range(start, n):
+        # 先检查出场, 同一分钟的入场信号优先
+        if cur > 0 and exit_long[i]:
+            cur = 0.0
+        elif cur < 0 and exit_short[i]:
+            cur = 0.0
+        if entry[i] != 0:
+            cur = entry[i]
+        pos[i] = cur
+    return pos
+
+
+# ---------------------------------------------
+# NumPy 实现
+# ---------------------------------------------
+
+def _last_true(mask):
+    # 每个位置之前 (含) 最近一个 True 的索引, 没有时为 -1
+    idx = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(idx) if len(idx) else idx
+
+
+def _latch_numpy(sig, start):
+    active = sig != 0
+    active[:start] = False
+    last = _last_true(active)
+    return np.where(last >= 0, sig[np.maximum(last, 0)], 0.0)
+
+
+def _exit_on_numpy(entry, exit_long, exit_short, start):
+    # 仓位 = 最近一次入场的方向, 除非其后 (不含入场当分钟) 出现了对应方向的出场条件
+    active = entry != 0
+    active[:start] = False
+    last = _last_true(active)
+    side = np.where(last >= 0, entry[np.maximum(last, 0)], 0.0)
+    exited = np.where(side > 0, _last_true(exit_long) > last,
+                      np.where(side < 0, _last_true(exit_short) > last, False))
+    return np.where(exited, 0.0, side)
+
+
+if BACKEND == "numba":
+    _latch_impl = numba.njit(cache=True)(_latch_loop)
+    _exit_on_impl = numba.njit(cache=True)(_exit_on_loop)
+else:
+    _latch_impl = _latch_numpy
+    _exit_on_impl = _exit_on_numpy
+
+
+# ---------------------------------------------
+# 公开接口
+# ---------------------------------------------
+
+def latch(sig, start=0):
+    """持有直到反向信号: pos[i] 为 [start, i] 内最近一个非零 sig, 没有时为 0。"""
+    sig = np.asarray(sig, dtype=np.float64)
+    return _latch_impl(sig, max(0, int(start)))
+
+
+def exit_on(entry, exit_long, exit_short, start=0):
+    """持有直到反向信号或出场条件。
+
+    entry: 非零处为新仓位; exit_long / exit_short: 持多 / 持空时满足即平仓 (布尔数组)。
+    同一分钟先检查出场、再检查入场, 与 AC 原先的逐分钟状态机一致。
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    exit_long = np.asarray(exit_long, dtype=np.bool_)
+    exit_short = np.asarray(exit_short, dtype=np.bool_)
+    return _exit_on_impl(entry, exit_long, exit_short, max(0, int(start)))
+
+
+def size_by(direction, strength, threshold=None):
+    """按信号强度定仓: pos = direction * strength; strength 未超过 threshold (或为 NaN) 时为 0。
+
+    direction 取 -1 / 0 / +1, strength 一般为 [0, 1] 内的置信度 (如回归 R2)。
+    无路径依赖, 两种后端共用同一实现。
+    """
+    direction = np.asarray(direction)
+    strength = np.asarray(strength, dtype=np.float64)
+    pos = np.where(direction != 0, direction * strength, 0.0)
+    if threshold is not None:
+        pos = np.where(strength > threshold, pos, 0.0)
+    return pos
@@ -0,0 +1,241 @@
+"""
+实盘逐根推送 (Live Bar Feed)
+
+现有策略类不做修改即可逐分钟运行: 每根分钟线收盘后调用 LiveEngine.on_bar(td, bar),
+引擎更新指标、调用 GetSig, 立即给出下一分钟的目标仓位, 并记录每根K线的处理延迟。
+
+    指标更新: 策略实现 init_stream / update_stream (见 BaseStrategy) 时逐根增量更新,
+              单根耗时为常数 (内置策略均已实现); 未实现的策略每根K线对当日已到达的
+              K线 (含预热历史) 重算 prepare_data, 单根耗时随已到达K线数线性增长, 仅作兼容
+    仓位语义: 与 run_backtest 的逐分钟循环一致 —— 第 5 ~ 228 分钟调用 GetSig,
+              第 m 分钟收盘后的目标仓位即回测中第 m+1 分钟的持仓; 第 228 分钟起目标为空仓
+    预热历史: warmup_bars > 0 时, 当日首根K线到达后按隔夜规则拼接历史 (同 warmup.py),
+              收盘后把当日K线并入缓冲区
+
+ReplaySource 按交易日顺序回放 Data/ 下的历史行情, 代替实时行情源; speed 为相对
+实际时间的倍速 (60 即每秒一根), 0 为不等待。verify 逐日比较回放结果与批量回测的持仓。
+
+用法:
+    python -m CTA_BT.live ADX.strategy.ADXStrategy --days 20 --verify
+    python -m CTA_BT.live Bollinger --speed 60
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.bar_store import N_COLS, N_MINUTES, load_day
+from CTA_BT.CTA_BTv3 import load_tradedates, run_day, trade_calendar
+from CTA_BT.day_cache import DayCache
+from CTA_BT.profiler import PhaseTimer
+from CTA_BT.warmup import BarHistory
+
+
+START_MINUTE = 5    # 与 run_backtest 相同: 前 5 分钟不交易
+LAST_MINUTE = 228   # 回测最后一次调用 GetSig 的分钟, 其后不再持仓
+
+
+class ReplaySource:
+    """按交易日顺序逐根回放历史分钟线, 产出 (交易日, 单根K线); 缺数据的交易日跳过。"""
+
+    def __init__(self, symbol, tradedates, data_dir, store_dir=None, speed=0.0):
+        self.symbol = symbol
+        self.tradedates = list(tradedates)
+        self.data_dir = data_dir
+        self.store_dir = store_dir
+        self.speed = speed
+        self.skipped = []
+
+    def __iter__(self):
+        interval = 60.0 / self.speed if self.speed > 0 else 0.0
+        next_t = time.perf_counter()
+        for td in self.tradedates:
+            try:
+                bars = load_day(self.symbol, td, self.data_dir, self.store_dir)
+            except (FileNotFoundError, pd.errors.EmptyDataError):
+                self.skipped.append(td)
+                continue
+            for bar in bars:
+                if interval:
+                    # 按固定节拍推送, 处理耗时不累积到下一根
+                    next_t += interval
+                    delay = next_t - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                yield td, bar
+
+
+class LiveEngine:
+    """单个策略的逐根推送引擎; 每个交易日新建一个策略实例, 仓位不跨日。
+
+    on_position(td, minute, target, latency): 每根K线处理完后的回调 (可选)
+    targets[td]: 当日每分钟收盘后的目标仓位, (240,) 数组
+    """
+
+    def __init__(self, strategy_cls, on_position=None, start_minute=START_MINUTE):
+        if strategy_cls.bar_period > 1:
+            raise ValueError("逐根推送只支持分钟策略 (bar_period = 1)")
+        self.strategy_cls = strategy_cls
+        self.on_position = on_position
+        self.start_minute = start_minute
+        self.timer = PhaseTimer()
+        self.targets = {}
+
+        cls = strategy_cls
+        self.history = None
+        if cls.warmup_bars > 0:
+            self.history = BarHistory(cls.symbol, cls.warmup_bars, trade_calendar(),
+                                      cls.data_dir, cls.store_dir, cls.gap_mode)
+        self.td = None
+        self.stg = None
+
+    # ---------------------------------------------
+    # 交易日切换
+    # ---------------------------------------------
+
+    def _begin_day(self, td, first_bar):
+        cls = self.strategy_cls
+        prefix = np.empty((0, N_COLS))
+        if self.history is not None:
+            prefix = self.history.prefix(td, first_bar[None, :])
+
+        # 预分配 "预热历史 + 整日" 缓冲区, K线到达后依次写入, 不再扩容
+        buf = np.full((len(prefix) + N_MINUTES, N_COLS), np.nan)
+        buf[:len(prefix)] = prefix
+        stg = cls(td, cls.symbol)
+        stg.offset = len(prefix)
+        stg.raw_data = buf
+        self.streaming = bool(stg.init_stream())
+        if self.streaming:
+            for i in range(stg.offset):
+                stg.update_stream(i)
+
+        self.td = td
+        self.stg = stg
+        self.buf = buf
+        self.n_today = 0
+        self.targets[td] = np.zeros(N_MINUTES)
+
+    def end_day(self):
+        # 收盘: 当日K线并入预热缓冲区
+        if self.stg is None:
+            return
+        if self.history is not None:
+            offset = self.stg.offset
+            self.history.push(self.td, self.buf[offset:offset + self.n_today])
+        self.td = None
+        self.stg = None
+
+    # ---------------------------------------------
+    # 逐根处理
+    # ---------------------------------------------
+
+    def on_bar(self, td, bar):
+        """处理一根刚收盘的分钟线 (MinInt, open, close, high, low, volume, oi), 返回目标仓位。"""
+        t0 = time.perf_counter()
+        if td != self.td:
+            self.end_day()
+            self._begin_day(td, np.asarray(bar, dtype=np.float64))
+        stg = self.stg
+        m = self.n_today
+        if m >= N_MINUTES:
+            raise ValueError(f"{td} 收到第 {m + 1} 根K线, 超过每日 {N_MINUTES} 根")
+        i = stg.offset + m
+        self.buf[i] = bar
+        self.n_today += 1
+
+        trade = self.start_minute <= m <= LAST_MINUTE
+        if self.streaming:
+            stg.update_stream(i)
+        elif trade:
+            # 兼容未实现流式接口的策略: 只用已到达的K线重算 (O(已到达K线数)),
+            # 指标与整日计算逐位相同 (均为因果计算)
+            stg.raw_data = self.buf[:i + 1]
+            stg.cache = DayCache()
+            stg.prepare_data()
+        if trade:
+            stg.GetSig(i)
+        target = stg.position if m < LAST_MINUTE else 0.0
+        self.targets[td][m] = target
+
+        latency = time.perf_counter() - t0
+        self.timer.add("bar", latency)
+        if self.on_position is not None:
+            self.on_position(td, m, target, latency)
+        return target
+
+    def run(self, source):
+        for td, bar in source:
+            self.on_bar(td, bar)
+        self.end_day()
+        return self.targets
+
+    def latency(self):
+        """每根K线处理延迟的统计 (毫秒), 含换日时的预热与初始化。"""
+        return self.timer.summary()["phases"].get("bar", {})
+
+
+def replay(strategy_cls, tradedates, speed=0.0, on_position=None):
+    cls = strategy_cls
+    engine = LiveEngine(cls, on_position)
+    engine.run(ReplaySource(cls.symbol, tradedates, cls.data_dir, cls.store_dir, speed))
+    return engine
+
+
+def verify(strategy_cls, tradedates):
+    """回放 tradedates 并与批量回测比较, 返回 (engine, 持仓不一致的交易日)。
+
+    批量回测第 m+1 分钟的持仓应等于实盘第 m 分钟收盘后的目标仓位。
+    """
+    engine = replay(strategy_cls, tradedates)
+    mismatched = []
+    for td in tradedates:
+        res = run_day(strategy_cls, td)
+        live = engine.targets.get(td)
+        if res is None or live is None:
+            if (res is None) != (live is None):
+                mismatched.append(td)
+            continue
+        expected = np.append(res[2][1:], 0.0)
+        if not np.array_equal(live, expected):
+            mismatched.append(td)
+    return engine, mismatched
+
+
+def main(argv=None):
+    from CTA_BT.strategies import load_strategy
+
+    parser = argparse.ArgumentParser(description="逐根回放历史行情, 模拟实盘推送")
+    parser.add_argument("strategy", help="策略类路径, 如 ADX.strategy.ADXStrategy")
+    parser.add_argument("--start", type=int, default=None, help="起始交易日, 默认策略 min_date")
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=0.0, help="回放倍速, 0 为不等待")
+    parser.add_argument("--verify", action="store_true", help="与批量回测逐日比较持仓")
+    parser.add_argument("--print", dest="echo", action="store_true", help="打印每次仓位变化")
+    args = parser.parse_args(argv)
+
+    strategy_cls = load_strategy(args.strategy)
+    tds = load_tradedates(args.start or strategy_cls.min_date)[:args.days]
+
+    last = {}
+
+    def echo(td, minute, target, latency):
+        if target != last.get(td, 0.0):
+            print(f"{td} 第{minute}分钟 目标仓位 {target:+.3f}  ({latency * 1000:.2f} ms)")
+        last[td] = target
+
+    on_position = echo if args.echo else None
+    if args.verify:
+        engine, mismatched = verify(strategy_cls, tds)
+    else:
+        engine, mismatched = replay(strategy_cls, tds, args.speed, on_position), []
+    engine.timer.report(f"{strategy_cls.name} 逐根延迟")
+    if args.verify:
+        print("与批量回测一致" if not mismatched else f"与批量回测不一致: {mismatched}")
+        return 1 if mismatched else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
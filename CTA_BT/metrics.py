@@ -0,0 +1,227 @@
+"""
+流式绩效指标 (Streaming Metrics)
+
+MetricsAccumulator 随回测逐日 / 逐笔更新, 每次 O(1), 任意时刻都可读出当前指标:
+    日度: 年化收益、夏普 (Welford 均值方差)、最大回撤 (运行峰值)、卡玛,
+          滚动 window 日夏普 (滚动均值 / 标准差, 不回看全部历史)
+    逐笔: 胜率、盈亏比 (平均盈利 / 平均亏损)、单笔平均收益、平均持仓分钟数、
+          多空持仓分钟占比、最大连续亏损笔数
+    换手: 日均换手 (Σ|Δ仓位|), 盈亏平衡成本 (每单位换手的成本达到该值时累计收益归零)
+
+"一笔交易" 为当日内仓位方向不变的一段连续持仓 (由每分钟持仓 held 切分), 反手计为两笔;
+仓位不跨日, 收盘前的持仓在当日结束。日度指标与 calc_metrics 的定义一致 (242 个交易日年化,
+回撤自首日累计收益起算), 数值仅有浮点舍入差异。
+
+用法:
+    acc = MetricsAccumulator(window=60)
+    for td, res in iter_days(...):
+        acc.add_result(td, res)          # res = (当日收益, 交易明细, 分钟持仓)
+        if acc.days > 120 and acc.sharpe < 0: break    # 提前停止
+    acc.summary()
+
+另有 column_metrics: 对 (天数, 组合数) 的日收益矩阵一次算出每列的日度指标 (参数扫描、
+滚动前推、逐轮淘汰时按列打分)。
+"""
+import math
+
+import numpy as np
+
+from CTA_BT.indicators import RollingMean, RollingStd
+
+
+ANNUAL_DAYS = 242
+
+
+def minute_turnover(held):
+    """单日每分钟开盘时的调仓量 |held[m] - held[m-1]|, 日初为空仓起算。"""
+    held = np.asarray(held, dtype=np.float64)
+    return np.abs(np.diff(held, prepend=0.0))
+
+
+def day_turnover(held):
+    # 当日换手 Σ|Δ仓位|, 含最后一分钟之后的平仓 (与 portfolio.turnover 一致)
+    return float(minute_turnover(held).sum() + abs(held[-1]))
+
+
+def day_trades(trade_records, held):
+    """把单日分钟持仓切分为逐笔交易, 返回 (每笔收益, 每笔持仓分钟数, 每笔方向)。"""
+    held = np.asarray(held, dtype=np.float64)
+    side = np.sign(held)
+    # 交易明细只含收益非零的分钟, 其余分钟收益为 0
+    pnl = np.zeros(len(held))
+    pnl[trade_records["minute_i"]] = trade_records["minute_ret"]
+
+    # 方向变化处即一段的起点; 首尾补空仓, 末个切点为 len(held)
+    cuts = np.flatnonzero(np.diff(np.concatenate([[0.0], side, [0.0]])))
+    if len(cuts) < 2:
+        return np.empty(0), np.empty(0, dtype=np.int64), np.empty(0)
+    starts, ends = cuts[:-1], cuts[1:]
+    seg_side = side[starts]
+    keep = seg_side != 0
+    seg_pnl = np.add.reduceat(pnl, starts)
+    return seg_pnl[keep], (ends - starts)[keep], seg_side[keep]
+
+
+class MetricsAccumulator:
+    """逐日 / 逐笔增量更新的绩效指标。"""
+
+    def __init__(self, window=60, annual_days=ANNUAL_DAYS):
+        self.window = window
+        self.annual_days = annual_days
+
+        # 日度
+        self.days = 0
+        self.start_date = None
+        self.end_date = None
+        self.cum_ret = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self._roll_mean = RollingMean(window)
+        self._roll_std = RollingStd(window)
+        self.rolling_sharpe = math.nan
+
+        # 逐笔
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.hold_bars = 0
+        self.long_bars = 0
+        self.short_bars = 0
+        self.losing_streak = 0
+        self.max_losing_streak = 0
+
+        # 换手
+        self.turnover = 0.0
+
+    # ---------------------------------------------
+    # 更新
+    # ---------------------------------------------
+
+    def add_day(self, td, ret):
+        if self.start_date is None:
+            self.start_date = td
+        self.end_date = td
+        self.days += 1
+
+        # Welford: 样本均值与离差平方和
+        delta = ret - self._mean
+        self._mean += delta / self.days
+        self._m2 += delta * (ret - self._mean)
+
+        self.cum_ret += ret
+        self.peak = max(self.peak, self.cum_ret)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.cum_ret)
+
+        mean = self._roll_mean.update(ret)
+        std = self._roll_std.update(ret)
+        self.rolling_sharpe = mean / std * math.sqrt(self.annual_days) if std else math.nan
+
+    def add_trade(self, pnl, bars, side):
+        self.trades += 1
+        self.hold_bars += bars
+        if side > 0:
+            self.long_bars += bars
+        else:
+            self.short_bars += bars
+
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+            self.losing_streak = 0
+        elif pnl < 0:
+            self.losses += 1
+            self.gross_loss -= pnl
+            self.losing_streak += 1
+            self.max_losing_streak = max(self.max_losing_streak, self.losing_streak)
+        else:
+            self.losing_streak = 0
+
+    def add_result(self, td, res):
+        """加入一个交易日的 (当日收益, 交易明细, 分钟持仓); None (无数据) 时忽略。"""
+        if res is None:
+            return
+        ret, trade_records, held = res
+        self.add_day(td, ret)
+        self.turnover += day_turnover(held)
+        for pnl, bars, side in zip(*day_trades(trade_records, held)):
+            self.add_trade(float(pnl), int(bars), side)
+
+    # ---------------------------------------------
+    # 读取
+    # ---------------------------------------------
+
+    @property
+    def annual_ret(self):
+        return self.cum_ret * self.annual_days / self.days if self.days else math.nan
+
+    @property
+    def sharpe(self):
+        if self.days < 2:
+            return math.nan
+        std = math.sqrt(self._m2 / (self.days - 1))
+        return self._mean / std * math.sqrt(self.annual_days) if std else math.nan
+
+    @property
+    def calmar(self):
+        return self.annual_ret / self.max_drawdown if self.max_drawdown else math.nan
+
+    def trade_stats(self):
+        n = self.trades
+        avg_win = self.gross_profit / self.wins if self.wins else math.nan
+        avg_loss = self.gross_loss / self.losses if self.losses else math.nan
+        position_bars = self.long_bars + self.short_bars
+        return {
+            "trades": n,
+            "win_rate": self.wins / n if n else math.nan,
+            "pl_ratio": avg_win / avg_loss if self.wins and self.losses else math.nan,
+            "avg_trade": (self.gross_profit - self.gross_loss) / n if n else math.nan,
+            "avg_hold_minutes": self.hold_bars / n if n else math.nan,
+            "long_share": self.long_bars / position_bars if position_bars else math.nan,
+            "max_losing_streak": self.max_losing_streak,
+            "turnover_per_day": self.turnover / self.days if self.days else math.nan,
+            "breakeven_cost": self.cum_ret / self.turnover if self.turnover else math.nan,
+        }
+
+    def summary(self):
+        return {
+            "annual_ret": self.annual_ret,
+            "sharpe": self.sharpe,
+            "calmar": self.calmar,
+            "max_drawdown": self.max_drawdown,
+            "rolling_sharpe": self.rolling_sharpe,
+            "start_date": str(self.start_date),
+            "end_date": str(self.end_date),
+            "days": self.days,
+            **self.trade_stats(),
+        }
+
+
+def column_metrics(rets, annual_days=ANNUAL_DAYS):
+    """(天数, 组合数) 日收益矩阵逐列计算指标, 定义同 calc_metrics; 返回 {指标: (组合数,) 数组}。
+
+    NaN 表示该组合当日无数据 (如网格含 symbol 而该品种缺这一天), 各列只统计自己的交易日;
+    无数据的交易日净值不变, 不影响回撤。
+    """
+    rets = np.asarray(rets, dtype=np.float64)
+    valid = ~np.isnan(rets)
+    n_days = valid.sum(axis=0)
+    if rets.shape[0] == 0:
+        nan = np.full(rets.shape[1], np.nan)
+        return {"annual_ret": nan, "sharpe": nan, "calmar": nan, "max_drawdown": nan}
+    filled = np.where(valid, rets, 0.0)
+    cum = np.cumsum(filled, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annual_ret = cum[-1] * annual_days / n_days
+        mean = filled.sum(axis=0) / n_days
+        dev = np.where(valid, rets - mean, 0.0)
+        std = np.where(n_days > 1, np.sqrt((dev * dev).sum(axis=0) / (n_days - 1)), 0.0)
+        sharpe = np.where(std != 0, mean / std * np.sqrt(annual_days), np.nan)
+        max_drawdown = np.where(n_days > 0, (np.maximum.accumulate(cum, axis=0) - cum).max(axis=0),
+                                np.nan)
+        calmar = np.where(max_drawdown != 0, annual_ret / max_drawdown, np.nan)
+    return {"annual_ret": annual_ret, "sharpe": sharpe, "calmar": calmar,
+            "max_drawdown": max_drawdown}
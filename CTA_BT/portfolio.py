@@ -0,0 +1,161 @@
+"""
+分钟级组合 (Portfolio Combination)
+
+回测时可把每天每分钟实际持有的仓位保存为紧凑的仓位矩阵:
+    {name}_positions.npz
+        dates     : (天数,) int64
+        positions : (天数, 240) int8 (仓位全为整数时) 或 float32, 第 i 列为当日第 i 分钟持仓
+        symbol    : 品种
+组合时按品种读取一次分钟收益矩阵 (close / open - 1), 之后任意权重的组合都只是矩阵运算:
+    组合仓位   = Σ w_k · positions_k
+    分钟收益   = 组合仓位 · 分钟收益矩阵
+    净换手     = Σ |Δ组合仓位| (日初、日末视为空仓), 不同策略的反向交易互相抵消
+    毛换手     = Σ w_k · Σ |Δpositions_k|, 两者之差即为净额轧差节省的交易量
+
+用法:
+    run_backtest(ADXStrategy, save_positions=True)
+    pf = Portfolio.from_files(["ADX/IM_ADX_16_positions.npz",
+                               "Bollinger/IM_Bollinger_15_21_2.125_positions.npz"])
+    daily, metrics = pf.evaluate([0.5, 0.5])
+    python -m CTA_BT.portfolio ADX/IM_ADX_16_positions.npz AO/IM_AO_25_60_positions.npz --weights 0.6 0.4
+
+组合收益按默认的 CmpRet (无费用) 计算; 策略自定义 CmpRet 时以其日结果为准。
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.bar_store import N_MINUTES, load_day
+from CTA_BT.CTA_BTv3 import DATA_DIR, calc_metrics
+
+
+def compact_positions(held):
+    # 仓位全为 [-127, 127] 内的整数时存为 int8, 否则为 float32
+    held = np.asarray(held, dtype=np.float64)
+    if np.all(held == np.round(held)) and np.all(np.abs(held) <= 127):
+        return held.astype(np.int8)
+    return held.astype(np.float32)
+
+
+def save_positions(path, dates, held_rows, symbol, name=""):
+    held = np.vstack(held_rows) if len(held_rows) else np.zeros((0, N_MINUTES))
+    np.savez(path, dates=np.asarray(dates, dtype=np.int64),
+             positions=compact_positions(held), symbol=symbol, name=name)
+    return path
+
+
+class PositionSet:
+    """单个策略的仓位矩阵。"""
+
+    def __init__(self, name, symbol, dates, positions):
+        self.name = name
+        self.symbol = symbol
+        self.dates = np.asarray(dates, dtype=np.int64)
+        self.positions = positions
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(str(f["name"]), str(f["symbol"]), f["dates"], f["positions"])
+
+
+def bar_returns(symbol, dates, data_dir=DATA_DIR, store_dir=None):
+    """(天数, 240) 分钟收益 close / open - 1; 缺失的交易日或分钟为 0。"""
+    out = np.zeros((len(dates), N_MINUTES))
+    for k, td in enumerate(dates):
+        try:
+            arr = load_day(symbol, int(td), data_dir, store_dir)
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            continue
+        n = min(len(arr), N_MINUTES)
+        r = arr[:n, 2] / arr[:n, 1] - 1
+        out[k, :n] = np.where(np.isfinite(r), r, 0.0)
+    return out
+
+
+def turnover(positions):
+    # 每日 Σ|Δ仓位|, 日初从空仓建仓、日末平仓计入
+    n_days = positions.shape[0]
+    padded = np.zeros((n_days, positions.shape[1] + 2))
+    padded[:, 1:-1] = positions
+    return np.abs(np.diff(padded, axis=1)).sum(axis=1)
+
+
+class Portfolio:
+    """同一品种的若干仓位矩阵; 构造时对齐日期并读取分钟收益, evaluate 只做矩阵运算。"""
+
+    def __init__(self, position_sets, data_dir=DATA_DIR, store_dir=None):
+        symbols = {p.symbol for p in position_sets}
+        if len(symbols) != 1:
+            raise ValueError(f"组合中的仓位矩阵须为同一品种, 实际为 {sorted(symbols)}")
+        self.symbol = symbols.pop()
+        self.names = [p.name for p in position_sets]
+
+        # 日期取并集, 某策略当天没有结果时视为空仓
+        self.dates = np.unique(np.concatenate([p.dates for p in position_sets]))
+        self.stack = np.zeros((len(position_sets), len(self.dates), N_MINUTES), dtype=np.float32)
+        for k, p in enumerate(position_sets):
+            rows = np.searchsorted(self.dates, p.dates)
+            self.stack[k, rows] = p.positions
+        self.bar_ret = bar_returns(self.symbol, self.dates, data_dir, store_dir)
+        # 各策略单独的毛换手, 组合时按权重线性相加
+        self.single_turnover = np.stack([turnover(self.stack[k]) for k in range(len(position_sets))])
+
+    @classmethod
+    def from_files(cls, paths, data_dir=DATA_DIR, store_dir=None):
+        return cls([PositionSet.load(p) for p in paths], data_dir, store_dir)
+
+    def combined_positions(self, weights):
+        w = np.asarray(weights, dtype=np.float64)
+        if w.shape != (len(self.names),):
+            raise ValueError(f"权重个数 {w.shape} 与策略个数 {len(self.names)} 不一致")
+        return np.tensordot(w, self.stack, axes=1)
+
+    def evaluate(self, weights):
+        """返回 (日结果 DataFrame, 指标 dict); 日结果含 ret, cum_ret, turnover, gross_turnover。"""
+        pos = self.combined_positions(weights)
+        minute_pnl = pos * self.bar_ret
+        daily = pd.DataFrame({
+            "date": self.dates,
+            "ret": minute_pnl.sum(axis=1),
+        })
+        daily["cum_ret"] = np.cumsum(daily["ret"])
+        daily["turnover"] = turnover(pos)
+        daily["gross_turnover"] = np.abs(np.asarray(weights, dtype=np.float64)) @ self.single_turnover
+
+        metrics = calc_metrics(daily)
+        metrics["turnover_per_day"] = float(daily["turnover"].mean())
+        metrics["netting_saving"] = float(
+            1 - daily["turnover"].sum() / daily["gross_turnover"].sum()
+        ) if daily["gross_turnover"].sum() else 0.0
+        return daily, metrics
+
+    def equal_weight(self):
+        n = len(self.names)
+        return self.evaluate(np.full(n, 1.0 / n))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多策略分钟级组合")
+    parser.add_argument("paths", nargs="+", help="{name}_positions.npz 文件")
+    parser.add_argument("--weights", nargs="+", type=float, default=None, help="默认等权")
+    parser.add_argument("--data", default=DATA_DIR, help="行情目录")
+    parser.add_argument("--out", default=None, help="组合日结果 CSV 路径")
+    args = parser.parse_args(argv)
+
+    pf = Portfolio.from_files(args.paths, data_dir=args.data)
+    if args.weights is None:
+        daily, metrics = pf.equal_weight()
+    else:
+        daily, metrics = pf.evaluate(args.weights)
+    for key, value in metrics.items():
+        print(f"{key}: {value}")
+    if args.out:
+        daily.to_csv(args.out, index=False)
+        print(f"组合日结果已保存到：{args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+"""
+行情预读 (Prefetching Loader)
+
+逐日回测时, 当日行情的读取与解析原本在 getOrgData 中同步进行, 磁盘读取与计算不重叠。
+DayLoader 在后台线程中提前读取其后 depth 个交易日, 主线程计算当日时下一天已在读取:
+    背压: 当日之外已读好或正在读取的交易日最多 depth 个, 消费慢时后台自动停下, 内存有上界
+    缺数据: 读取时的 FileNotFoundError / EmptyDataError 原样交给消费方, 在原先的位置
+            抛出并按原规则跳过 (见 run_day)
+    自定义读取: 预读的是 load_day 的结果; 策略重写了 getOrgData 时 iter_days 不预读,
+            当日行情仍由 getOrgData 读取
+    列式存储: 内存映射视图在后台线程中复制一份, 缺页读取也发生在后台
+
+用法:
+    run_backtest(ADXStrategy, prefetch=4)    # 默认即预读 4 天, 0 为关闭
+    loader = DayLoader("IM", DATA_DIR, depth=8)
+    for td, today in loader.iter(tds): ...
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.bar_store import load_day
+
+
+def _read(symbol, td, data_dir, store_dir):
+    try:
+        return np.array(load_day(symbol, td, data_dir, store_dir))
+    except (FileNotFoundError, pd.errors.EmptyDataError) as e:
+        return e
+
+
+class DayLoader:
+    """按交易日顺序预读单个品种的行情; 只含路径与参数, 可随任务发送到子进程。"""
+
+    def __init__(self, symbol, data_dir, store_dir=None, depth=4, workers=2):
+        if depth < 1:
+            raise ValueError(f"预读深度须为正整数, 实际为 {depth}")
+        self.symbol = symbol
+        self.data_dir = data_dir
+        self.store_dir = store_dir
+        self.depth = depth
+        self.workers = max(1, min(workers, depth))
+
+    @classmethod
+    def for_strategy(cls, strategy_cls, depth=4, workers=2):
+        return cls(strategy_cls.symbol, strategy_cls.data_dir, strategy_cls.store_dir,
+                   depth, workers)
+
+    def iter(self, tds):
+        """按顺序产出 (td, 当日行情数组); 缺数据时第二项为读取时捕获的异常。"""
+        tds = list(tds)
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="prefetch") as ex:
+            pending = deque()
+            submitted = 0
+
+            def fill():
+                # 补足在途任务到 depth 个; 其余交易日等消费方取走后再提交
+                nonlocal submitted
+                while submitted < len(tds) and len(pending) < self.depth:
+                    td = tds[submitted]
+                    pending.append((td, ex.submit(_read, self.symbol, td,
+                                                  self.data_dir, self.store_dir)))
+                    submitted += 1
+
+            try:
+                fill()
+                while pending:
+                    td, fut = pending.popleft()
+                    # 先补位再交出当日: 计算当日期间后台始终有 depth 天在读
+                    fill()
+                    yield td, fut.result()
+            finally:
+                # 消费方提前退出时取消尚未开始的读取
+                for _, fut in pending:
+                    fut.cancel()
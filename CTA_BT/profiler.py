@@ -0,0 +1,187 @@
+"""
+分阶段性能剖析 (Phase Profiling)
+
+run_backtest(..., profile=True) 时记录每个交易日各阶段耗时:
+    load       getOrgData 读取行情
+    prepare    prepare_data 指标计算
+    signal     GetSig / CmpRet 逐分钟循环或向量化结算
+    cache_read 从结果缓存读取
+    aggregate  日结果汇总、交易明细写入日志、DataFrame 与指标计算
+    report     逐日进度输出 / 交互图重绘
+    save       保存日结果 CSV
+    plot       最终结果图
+并计数因 FileNotFoundError / EmptyDataError 跳过的交易日。结束时打印汇总表,
+并保存 {name}_profile.json。关闭时使用 NULL_TIMER, 各处调用均为空操作。
+
+load / prepare / signal 在工作进程中计时后随结果带回, 多进程时其合计为各进程
+耗时之和, 可能大于墙钟时间。
+
+单个策略的函数级剖析:
+    python -m CTA_BT.profiler ADX.strategy.ADXStrategy --days 100
+    python -m CTA_BT.profiler ADX.strategy.ADXStrategy --sampler   # 需安装 pyinstrument
+"""
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+class PhaseTimer:
+    """按阶段累计每次耗时 (秒) 与计数器。"""
+
+    enabled = True
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counters = Counter()
+        self.t0 = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(time.perf_counter() - t)
+
+    def add(self, name, seconds):
+        self.samples[name].append(seconds)
+
+    def add_day(self, times):
+        # 工作进程带回的单日各阶段耗时; "skip" 为跳过原因
+        for name, value in times.items():
+            if name == "skip":
+                self.count(f"skip_{value}")
+            else:
+                self.add(name, value)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def summary(self):
+        wall = time.perf_counter() - self.t0
+        total = sum(sum(v) for v in self.samples.values()) or 1.0
+        phases = {}
+        for name, values in self.samples.items():
+            ms = np.asarray(values) * 1000
+            phases[name] = {
+                "total_s": float(ms.sum() / 1000),
+                "count": len(values),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+                "share": float(ms.sum() / 1000 / total),
+            }
+        return {"wall_s": wall, "phases": phases, "counters": dict(self.counters)}
+
+    def report(self, name="", stream=None):
+        stream = stream or sys.stdout
+        summary = self.summary()
+        print(f"---- 阶段耗时 {name} (墙钟 {summary['wall_s']:.2f}s) ----", file=stream)
+        print(f"{'阶段':<12}{'合计(s)':>10}{'次数':>8}{'均值(ms)':>10}{'p95(ms)':>10}{'占比':>8}",
+              file=stream)
+        rows = sorted(summary["phases"].items(), key=lambda kv: -kv[1]["total_s"])
+        for phase, s in rows:
+            print(f"{phase:<12}{s['total_s']:>10.3f}{s['count']:>8}{s['mean_ms']:>10.3f}"
+                  f"{s['p95_ms']:>10.3f}{s['share']:>8.1%}", file=stream)
+        for key, n in sorted(summary["counters"].items()):
+            print(f"{key}: {n}", file=stream)
+
+    def save(self, path, **meta):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**meta, **self.summary()}, f, ensure_ascii=False, indent=2)
+
+
+class NullTimer:
+    """关闭剖析时的空实现。"""
+
+    enabled = False
+    _ctx = nullcontext()
+
+    def phase(self, name):
+        return self._ctx
+
+    def add(self, name, seconds):
+        pass
+
+    def add_day(self, times):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+# ---------------------------------------------
+# 函数级剖析 (cProfile / 采样)
+# ---------------------------------------------
+
+def profile_strategy(strategy_cls, tds, sampler=False, out=None, top=30, stream=None):
+    """在当前进程中顺序运行 tds, 用 cProfile (或 pyinstrument 采样) 包裹, 打印热点函数。
+
+    out: cProfile 时保存 .prof (可用 snakeviz 等查看), 采样时保存 HTML 报告
+    """
+    from CTA_BT.CTA_BTv3 import run_day
+
+    stream = stream or sys.stdout
+    if sampler:
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("采样剖析需要安装 pyinstrument: pip install pyinstrument")
+        prof = Profiler()
+        prof.start()
+        for td in tds:
+            run_day(strategy_cls, td)
+        prof.stop()
+        print(prof.output_text(unicode=True), file=stream)
+        if out:
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(prof.output_html())
+        return prof
+
+    prof = cProfile.Profile()
+    prof.enable()
+    for td in tds:
+        run_day(strategy_cls, td)
+    prof.disable()
+
+    buf = io.StringIO()
+    pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(top)
+    print(buf.getvalue(), file=stream)
+    if out:
+        prof.dump_stats(out)
+    return prof
+
+
+def main(argv=None):
+    from CTA_BT.CTA_BTv3 import load_tradedates
+    from CTA_BT.strategies import load_strategy
+
+    parser = argparse.ArgumentParser(description="单个策略的函数级剖析")
+    parser.add_argument("strategy", help="策略类路径, 如 ADX.strategy.ADXStrategy")
+    parser.add_argument("--days", type=int, default=100, help="从 min_date 起运行的交易日数")
+    parser.add_argument("--sampler", action="store_true", help="使用 pyinstrument 采样剖析")
+    parser.add_argument("--out", default=None, help=".prof / .html 输出路径")
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    strategy_cls = load_strategy(args.strategy)
+    tds = load_tradedates(strategy_cls.min_date)[:args.days]
+    profile_strategy(strategy_cls, tds, sampler=args.sampler, out=args.out, top=args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+"""
+回测进度报告与结果绘图
+
+run_backtest 逐日把结果交给 reporter, 可选:
+    NullReporter      : 不输出任何进度
+    TextReporter      : 文本或 JSON 行, 按天数 / 时间间隔节流; 附带当前夏普、最大回撤与
+                        滚动夏普 (MetricsAccumulator 逐日 O(1) 更新, 见 metrics.py)
+    LiveChartReporter : 交互式累计收益图, 按时间间隔节流重绘
+最终结果图由 plot_result 在回测结束后只绘制一次; 无界面环境使用 Agg 后端。
+matplotlib 只在真正需要绘图时才导入。
+"""
+import json
+import os
+import sys
+import time
+
+from CTA_BT.metrics import MetricsAccumulator
+
+
+def is_headless():
+    # 无图形界面: 显式指定 Agg, 或 Linux 下没有 DISPLAY
+    if os.environ.get("MPLBACKEND", "").lower() == "agg":
+        return True
+    return sys.platform.startswith("linux") and not os.environ.get("DISPLAY")
+
+
+def get_pyplot(headless=False):
+    import matplotlib
+    if headless:
+        matplotlib.use("Agg")
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    from matplotlib import pyplot as plt
+    return plt
+
+
+def _set_date_ticks(ax, dates):
+    step = max(1, len(dates) // 10)
+    ax.set_xticks(range(0, len(dates), step))
+    ax.set_xticklabels(dates[::step], rotation=45, fontsize=8)
+
+
+class NullReporter:
+    """不输出进度, 参数扫描和 CI 默认使用。"""
+
+    def start(self, name, n_days, skipped=0):
+        pass
+
+    def day(self, td, ret):
+        pass
+
+    def skip(self, td, symbol):
+        pass
+
+    def finish(self, metrics):
+        pass
+
+
+class TextReporter(NullReporter):
+    """文本 / JSON 行进度; 距上次输出满 every_days 天或 interval 秒时才输出。"""
+
+    def __init__(self, every_days=None, interval=1.0, fmt="text", stream=None):
+        self.every_days = every_days
+        self.interval = interval
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+
+    def start(self, name, n_days, skipped=0):
+        # skipped: 回测前已按数据目录索引剔除的无数据交易日数
+        self.name = name
+        self.n_days = n_days
+        self.n_done = 0
+        self.n_skip = skipped
+        self.cum_ret = 0.0
+        self.metrics = MetricsAccumulator()
+        self.t0 = self._last_t = time.perf_counter()
+        self._last_n = 0
+
+    def _emit(self, record, text):
+        if self.fmt == "json":
+            print(json.dumps(record, ensure_ascii=False), file=self.stream, flush=True)
+        else:
+            print(text, file=self.stream, flush=True)
+
+    def _due(self):
+        if self.every_days and self.n_done - self._last_n >= self.every_days:
+            return True
+        return self.interval is not None and time.perf_counter() - self._last_t >= self.interval
+
+    def day(self, td, ret):
+        self.n_done += 1
+        self.metrics.add_day(td, ret)
+        self.cum_ret = self.metrics.cum_ret
+        if not self._due():
+            return
+        self._last_n = self.n_done
+        self._last_t = time.perf_counter()
+        m = self.metrics
+        self._emit(
+            {"event": "progress", "name": self.name, "date": int(td), "ret": float(ret),
+             "cum_ret": self.cum_ret, "sharpe": m.sharpe, "max_drawdown": m.max_drawdown,
+             "rolling_sharpe": m.rolling_sharpe, "done": self.n_done, "skipped": self.n_skip,
+             "total": self.n_days, "elapsed": round(self._last_t - self.t0, 3)},
+            f"{td} 收益: {ret:.6f}  累计: {self.cum_ret:.4f}  夏普: {m.sharpe:.2f}  "
+            f"回撤: {m.max_drawdown:.4f}  [{self.n_done + self.n_skip}/{self.n_days}]",
+        )
+
+    def skip(self, td, symbol):
+        self.n_skip += 1
+        if self.fmt != "json":
+            print(f"跳过 {td}, {symbol} 无数据", file=self.stream)
+
+    def finish(self, metrics):
+        elapsed = time.perf_counter() - self.t0
+        self._emit(
+            {"event": "finish", "name": self.name, "done": self.n_done,
+             "skipped": self.n_skip, "elapsed": round(elapsed, 3),
+             **{k: (v if isinstance(v, (str, int)) else float(v)) for k, v in metrics.items()}},
+            f"{self.name} 完成: {self.n_done} 天, 跳过 {self.n_skip} 天, 用时 {elapsed:.1f}s",
+        )
+
+
+class LiveChartReporter(TextReporter):
+    """交互式累计收益曲线; 每天打印收益, 图形最多每 interval 秒重绘一次。"""
+
+    def __init__(self, interval=1.0):
+        super().__init__(every_days=1, interval=None)
+        self.redraw_interval = interval
+
+    def start(self, name, n_days, skipped=0):
+        super().start(name, n_days, skipped)
+        self.plt = get_pyplot()
+        self.fig, self.ax = self.plt.subplots(figsize=(10, 5))
+        self.ax.set_title(f'Cumulative Return - {name}')
+        self.plt.ion()
+        self.dates = []
+        self.cum = []
+        self._last_draw = 0.0
+
+    def day(self, td, ret):
+        super().day(td, ret)
+        self.dates.append(str(td))
+        self.cum.append(self.cum_ret)
+        if time.perf_counter() - self._last_draw >= self.redraw_interval:
+            self._redraw(td)
+
+    def _redraw(self, td):
+        ax = self.ax
+        ax.clear()
+        ax.plot(self.dates, self.cum, linewidth=1, color='#8B0000', label='Cumulative Return')
+        ax.set_title(f'Cumulative Return - {self.name} (Current Date: {td})')
+        _set_date_ticks(ax, self.dates)
+        ax.grid(True, linestyle='--', alpha=0.6)
+        self.plt.tight_layout()
+        self.plt.pause(0.015)
+        self._last_draw = time.perf_counter()
+
+    def finish(self, metrics):
+        super().finish(metrics)
+        self.plt.ioff()
+        self.plt.close(self.fig)
+
+
+def make_reporter(progress, headless):
+    # progress: reporter 实例, 或 "chart" / "text" / "json" / "none"; None 时按环境选择
+    if progress is None:
+        progress = "text" if headless else "chart"
+    if not isinstance(progress, str):
+        return progress
+    if progress == "chart":
+        if headless:
+            raise ValueError("无界面模式不能使用交互式图表进度")
+        return LiveChartReporter()
+    if progress == "text":
+        return TextReporter(every_days=20, interval=2.0)
+    if progress == "json":
+        return TextReporter(every_days=20, interval=2.0, fmt="json")
+    if progress == "none":
+        return NullReporter()
+    raise ValueError(f"未知的进度模式: {progress}")
+
+
+def plot_result(df, metrics, name, save_path, show=False):
+    """回测结束后绘制一次累计收益图并保存; show=False 时使用 Agg 后端, 不弹出窗口。"""
+    plt = get_pyplot(headless=not show)
+    fig, ax = plt.subplots(figsize=(10, 5))
+
+    dates = df["date"].astype(str).to_list()
+    ax.set_title(f'Cumulative Return - {name}')
+    ax.plot(dates, df["cum_ret"], linewidth=1, color='#8B0000')
+
+    text_str = (
+        f"年化收益率: {metrics['annual_ret']:.2%}\n"
+        f"夏普比率: {metrics['sharpe']:.2f}\n"
+        f"卡玛比率: {metrics['calmar']:.2f}\n"
+        f"最大回撤: {metrics['max_drawdown']:.2%}\n"
+        f"{metrics['start_date']} - {metrics['end_date']}({metrics['days']}天)"
+    )
+    ax.text(0.01, 0.97, text_str, transform=ax.transAxes,
+            verticalalignment='top', fontsize=9,
+            bbox=dict(facecolor='white', alpha=0.9, edgecolor='none', boxstyle='round,pad=0.5'))
+
+    _set_date_ticks(ax, dates)
+    ax.grid(True, linestyle='--', alpha=0.6)
+    fig.tight_layout()
+    fig.savefig(save_path)
+    if show:
+        plt.show()
+    plt.close(fig)
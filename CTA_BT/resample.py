@@ -0,0 +1,122 @@
+"""
+多周期K线 (Bar Resampling)
+
+由分钟线合成任意周期的K线, 按 MinInt 分组:
+    上午 931-1130、下午 1301-1500 各自从第一分钟起每 period 分钟一根, 不跨午休;
+    不能整除时每个时段最后一根不足 period 分钟 (如 7 分钟线上午第 18 根只含 1130)
+    MinInt 取该K线最后一分钟 (即收盘时刻), 开盘取首分钟开盘, 收盘、持仓量取末分钟,
+    最高 / 最低取极值, 成交量求和; 缺失的分钟不补齐, 只影响所在的那根K线
+
+每个工作进程为每个 (品种, 周期, 数据目录) 保留一个 ResampleCache, 同一交易日只合成一次,
+参数扫描、批量回测中同日的各组合与各策略共用结果。
+
+策略设置 bar_period = P (> 1) 后 (见 BaseStrategy):
+    prepare_data / GetSig / GetPositions 看到的 raw_data 为 P 分钟K线, 下标为K线位置;
+    第 j 根K线收盘时给出的仓位从下一分钟开始持有, 直到下一根K线收盘, 收益仍按分钟结算,
+    交易明细与分钟持仓 held 与分钟策略格式相同 (第 228 分钟后平仓的规则不变)。
+bar_period = 1 即原分钟逻辑。
+
+用法:
+    class ADX5(ADXStrategy):
+        bar_period = 5
+        name = "IM_ADX_16_5m"
+    run_backtest(ADX5)
+
+    bars, ends = resample(minute_bars, 15)    # ends 为每根K线最后一分钟在分钟数组中的行号
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from CTA_BT.bar_store import N_COLS
+
+
+_MORNING_OPEN = 9 * 60 + 31
+_AFTERNOON_OPEN = 13 * 60 + 1
+_LUNCH = 12 * 60
+_SESSION_KEY = 1000   # 上下午分组键的间隔, 大于任一时段内的分组数即可
+
+
+def resample(bars, period):
+    """(n, 7) 分钟线 -> (合成K线 (k, 7), 每根K线最后一分钟的行号 (k,))。
+
+    可含多个交易日 (如预热历史): MinInt 回落处视为新的一天。
+    """
+    bars = np.asarray(bars, dtype=np.float64)
+    if period < 1:
+        raise ValueError(f"K线周期须为正整数, 实际为 {period}")
+    n = len(bars)
+    if n == 0:
+        return np.empty((0, N_COLS)), np.empty(0, dtype=np.int64)
+
+    min_int = bars[:, 0].astype(np.int64)
+    mins = (min_int // 100) * 60 + min_int % 100
+    afternoon = mins > _LUNCH
+    pos = np.where(afternoon, mins - _AFTERNOON_OPEN, mins - _MORNING_OPEN)
+    key = afternoon * _SESSION_KEY + pos // period
+
+    new = np.ones(n, dtype=bool)
+    new[1:] = (key[1:] != key[:-1]) | (min_int[1:] < min_int[:-1])
+    starts = np.flatnonzero(new)
+    ends = np.append(starts[1:], n) - 1
+
+    out = np.empty((len(starts), N_COLS))
+    out[:, 0] = bars[ends, 0]
+    out[:, 1] = bars[starts, 1]
+    out[:, 2] = bars[ends, 2]
+    out[:, 3] = np.maximum.reduceat(bars[:, 3], starts)
+    out[:, 4] = np.minimum.reduceat(bars[:, 4], starts)
+    out[:, 5] = np.add.reduceat(bars[:, 5], starts)
+    out[:, 6] = bars[ends, 6]
+    return out, ends
+
+
+class ResampleCache:
+    """单品种、单周期的逐日合成K线; 最多保留 max_days 天, 超出时淘汰最早使用的。"""
+
+    def __init__(self, period, max_days=512):
+        self.period = period
+        self.max_days = max_days
+        self._days = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def day(self, td, today):
+        # 当日分钟线 -> (合成K线, 末分钟行号); 同一交易日只合成一次
+        res = self._days.get(td)
+        if res is not None:
+            self._days.move_to_end(td)
+            self.hits += 1
+            return res
+        self.misses += 1
+        res = resample(today, self.period)
+        for arr in res:
+            arr.flags.writeable = False
+        self._days[td] = res
+        if len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+        return res
+
+
+_caches = {}
+
+
+def get_cache(symbol, period, data_dir, store_dir=None):
+    key = (symbol, period, data_dir, store_dir)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = ResampleCache(period)
+    return cache
+
+
+def resample_day(symbol, td, period, data, offset, data_dir, store_dir=None):
+    """分钟行情 (前 offset 行为预热历史) -> (合成K线, 预热K线根数, 每根K线末分钟的当日分钟索引)。
+
+    当日部分取自缓存; 预热历史随当日拼接而变, 每次单独合成, 其末分钟索引记为 -1。
+    """
+    bars, ends = get_cache(symbol, period, data_dir, store_dir).day(td, data[offset:])
+    if offset == 0:
+        return bars, 0, ends
+    prefix, _ = resample(data[:offset], period)
+    return (np.concatenate([prefix, bars]), len(prefix),
+            np.concatenate([np.full(len(prefix), -1), ends]))
@@ -0,0 +1,160 @@
+"""
+逐日结果缓存 (Result Cache)
+
+每个交易日的 (日收益, 交易明细, 分钟持仓) 按内容寻址保存, 重跑时只计算缺失或失效的交易日:
+    策略键 = hash(策略及其基类所在源文件 + 计算相关的引擎模块源码, 类参数, 品种)
+    日指纹 = 当日行情的指纹 (列式存储的 CRC / CSV 的大小与修改时间 / 缺失)
+同一策略键的结果存放在一个 SQLite 文件中, 每行一个交易日; 日指纹不一致即视为失效。
+写入按批提交, 长回测中途中断后重跑会从最后一次提交处继续 (断点续跑)。
+
+缓存目录默认为策略目录下的 _cache/, 删除即可全部重算。
+日指纹只覆盖 load_day 读取的文件; 重写了 getOrgData 的策略 run_backtest 不使用缓存。
+"""
+import hashlib
+import inspect
+import math
+import os
+import sqlite3
+
+import numpy as np
+
+from CTA_BT.bar_store import N_MINUTES, get_store
+from CTA_BT.journal import TRADE_DTYPE
+
+
+# 影响计算结果的引擎模块; 其源码变化时全部缓存失效
+# (含本模块与 journal: 缓存表结构或交易明细格式变化时旧缓存自然失效)
+ENGINE_MODULES = ("CTA_BTv3", "bar_store", "day_cache", "indicators", "journal", "kernels",
+                  "resample", "result_cache", "warmup")
+
+# 不影响单日结果的类属性 (路径、回测区间、名称、结算方式)
+_NON_RESULT_ATTRS = {"name", "data_dir", "store_dir", "min_date", "max_date", "vectorized"}
+_PARAM_TYPES = (bool, int, float, str, tuple, list, dict, type(None))
+
+
+def _file_digest(path, h):
+    with open(path, "rb") as f:
+        h.update(f.read())
+
+
+def source_hash(strategy_cls):
+    """策略类及其基类所在源文件、以及 ENGINE_MODULES 的源码哈希。"""
+    h = hashlib.sha256()
+    engine_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = [os.path.join(engine_dir, f"{m}.py") for m in ENGINE_MODULES]
+    for klass in strategy_cls.__mro__:
+        if klass is object:
+            continue
+        try:
+            paths.append(os.path.abspath(inspect.getfile(klass)))
+        except (OSError, TypeError):
+            # 交互环境中定义的类没有源文件, 参数仍由 class_params 覆盖
+            continue
+    for path in sorted(set(paths)):
+        _file_digest(path, h)
+    return h.hexdigest()
+
+
+def class_params(strategy_cls):
+    # 沿继承链收集简单类型的公开类属性 (子类覆盖父类)
+    params = {}
+    for klass in reversed(strategy_cls.__mro__):
+        for key, value in vars(klass).items():
+            if key.startswith("_") or key in _NON_RESULT_ATTRS:
+                continue
+            if isinstance(value, _PARAM_TYPES):
+                params[key] = value
+    return params
+
+
+def strategy_key(strategy_cls):
+    h = hashlib.sha256()
+    h.update(source_hash(strategy_cls).encode())
+    h.update(repr(sorted(class_params(strategy_cls).items())).encode())
+    h.update(str(strategy_cls.symbol).encode())
+    return h.hexdigest()[:24]
+
+
+def day_fingerprint(symbol, td, data_dir, store_dir=None):
+    """单日行情指纹: 优先列式存储中的 CRC, 否则 CSV 大小与修改时间, 无文件为 "missing"。"""
+    if store_dir is None:
+        store_dir = os.path.join(data_dir, "_store")
+    store = get_store(symbol, store_dir)
+    if store is not None and td in store:
+        return f"crc:{store.crc(td)}"
+    path = os.path.join(data_dir, f"{symbol}_{td}.csv")
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    return f"csv:{st.st_size}:{st.st_mtime_ns}"
+
+
+class ResultCache:
+    """单个策略键下的逐日结果; commit_every 天提交一次作为断点。"""
+
+    def __init__(self, strategy_cls, cache_dir, calendar=None, commit_every=20):
+        self.strategy_cls = strategy_cls
+        self.key = strategy_key(strategy_cls)
+        self.calendar = list(calendar) if calendar is not None else []
+        self._cal_pos = {td: k for k, td in enumerate(self.calendar)}
+        self.commit_every = commit_every
+        self._pending = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{self.key}.sqlite")
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS days ("
+            "date INTEGER PRIMARY KEY, fingerprint TEXT, ret REAL, trades BLOB, held BLOB)"
+        )
+        self.conn.commit()
+        self._rows = {
+            td: fp for td, fp in self.conn.execute("SELECT date, fingerprint FROM days")
+        }
+
+    def fingerprint(self, td):
+        cls = self.strategy_cls
+        fps = [day_fingerprint(cls.symbol, td, cls.data_dir, cls.store_dir)]
+        # 开启预热时当日结果还取决于此前若干交易日的行情
+        n_prev = math.ceil(cls.warmup_bars / N_MINUTES) + 1 if cls.warmup_bars > 0 else 0
+        pos = self._cal_pos.get(td)
+        if n_prev and pos is not None:
+            for prev in self.calendar[max(0, pos - n_prev):pos]:
+                fps.append(day_fingerprint(cls.symbol, prev, cls.data_dir, cls.store_dir))
+        return "|".join(fps)
+
+    def is_valid(self, td, fp):
+        return self._rows.get(td) == fp
+
+    def get(self, td):
+        # 返回与 run_day 相同的结构: (当日收益, 交易明细, 分钟持仓) 或 None (无数据)
+        ret, trades, held = self.conn.execute(
+            "SELECT ret, trades, held FROM days WHERE date = ?", (td,)
+        ).fetchone()
+        if ret is None:
+            return None
+        return (ret, np.frombuffer(trades, dtype=TRADE_DTYPE).copy(),
+                np.frombuffer(held, dtype=np.float64).copy())
+
+    def put(self, td, fp, res):
+        if res is None:
+            row = (td, fp, None, None, None)
+        else:
+            ret, trades, held = res
+            trades = np.ascontiguousarray(trades, dtype=TRADE_DTYPE)
+            held = np.ascontiguousarray(held, dtype=np.float64)
+            row = (td, fp, float(ret), trades.tobytes(), held.tobytes())
+        self.conn.execute("INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?)", row)
+        self._rows[td] = fp
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,49 @@
+"""
+策略发现: 扫描项目根目录下各策略文件夹的 strategy.py, 收集其中定义的 BaseStrategy 子类。
+
+策略模块以 "文件夹名.strategy" 导入 (根目录加入 sys.path 后作为命名空间包),
+因此可被进程池 pickle, 与直接运行 strategy.py 时的类互不影响。
+"""
+import importlib
+import os
+import sys
+
+from CTA_BT.CTA_BTv3 import ROOT_DIR, BaseStrategy
+
+
+def strategy_dirs(root=ROOT_DIR):
+    return sorted(
+        d for d in os.listdir(root)
+        if os.path.isfile(os.path.join(root, d, "strategy.py"))
+    )
+
+
+def discover_strategies(root=ROOT_DIR):
+    """返回 {"文件夹.strategy.类名": 策略类}, 按文件夹名排序; 只收集在该文件中定义的类。"""
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    found = {}
+    for d in strategy_dirs(root):
+        module = importlib.import_module(f"{d}.strategy")
+        for obj in vars(module).values():
+            if (isinstance(obj, type) and issubclass(obj, BaseStrategy)
+                    and obj is not BaseStrategy and obj.__module__ == module.__name__):
+                found[f"{module.__name__}.{obj.__name__}"] = obj
+    return found
+
+
+def load_strategy(path, root=ROOT_DIR):
+    """按点分路径导入策略类, 如 "ADX.strategy.ADXStrategy"; 只给文件夹名时取其中唯一的策略。"""
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    if "." not in path:
+        found = [cls for key, cls in discover_strategies(root).items()
+                 if key.startswith(f"{path}.strategy.")]
+        if len(found) != 1:
+            raise ValueError(f"{path}/strategy.py 中找到 {len(found)} 个策略类, 请写完整路径")
+        return found[0]
+    module_name, _, cls_name = path.rpartition(".")
+    strategy_cls = getattr(importlib.import_module(module_name), cls_name)
+    if not (isinstance(strategy_cls, type) and issubclass(strategy_cls, BaseStrategy)):
+        raise TypeError(f"{path} 不是 BaseStrategy 子类")
+    return strategy_cls
@@ -0,0 +1,210 @@
+"""
+参数扫描 (Parameter Sweep)
+
+对一个策略类和参数网格, 每个交易日只读取一次行情, 同日所有参数组合共用一个
+DayCache (滚动均值 / 标准差、ADX 的 TR/DM、EMA 等中间量只算一次), 一遍跑完全部组合。
+
+用法:
+    from CTA_BT.sweep import run_sweep
+    table, daily = run_sweep(ADXStrategy, {"N": [14, 16, 20], "ADX_THRESHOLD": [25, 30]})
+
+table 为整理好的结果表: 每行一个参数组合, 包含参数列与年化、夏普、卡玛、最大回撤;
+daily 为日收益矩阵 (行: 日期, 列: 组合名称)。这是参数鲁棒性热力图的数据基础。
+"""
+import ast
+import itertools
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.CTA_BTv3 import calc_metrics, get_result_dir, load_tradedates, map_days
+from CTA_BT.catalog import split_work
+from CTA_BT.day_cache import DayCache
+
+
+def param_grid(grid):
+    # {"N": [14, 16], "ADX_THRESHOLD": [25, 30]} -> [{"N": 14, "ADX_THRESHOLD": 25}, ...]
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def parse_grid(specs):
+    """命令行参数网格: ["N=14,16,20", "symbol=IM,IF"] -> {"N": [14, 16, 20], "symbol": ["IM", "IF"]}"""
+    grid = {}
+    for spec in specs:
+        key, sep, values = spec.partition("=")
+        if not sep or not values:
+            raise ValueError(f"参数网格格式应为 键=值1,值2,...: {spec}")
+        grid[key.strip()] = [parse_value(v.strip()) for v in values.split(",")]
+    return grid
+
+
+def parse_value(text):
+    # 数字按字面量解析, 其余 (如品种代码、路径) 保留为字符串
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+# 不进入变体名称的类属性: 回测区间与数据路径不改变策略本身, 结果沿用原名称
+_UNNAMED_ATTRS = {"name", "min_date", "max_date", "data_dir", "store_dir"}
+
+
+def _named_params(strategy_cls):
+    """原名称 "品种_策略_参数值..." 末尾依次写入的参数值对应的类属性。
+
+    如 IM_ADX_16 -> (["ADX"], ["N"]); 按数值反查类属性, 数值对应多个属性 (无法确定)
+    时停止, 其前的部分均视为策略名, 如 IM_QJTP -> (["QJTP"], [])。
+    """
+    cls = strategy_cls
+    prefix = f"{cls.symbol}_"
+    name = cls.name[len(prefix):] if cls.name.startswith(prefix) else cls.name
+    tokens = name.split("_")
+    by_value = {}
+    for key in dir(cls):
+        if key.startswith("_") or key == "symbol" or key in _UNNAMED_ATTRS:
+            continue
+        value = getattr(cls, key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            by_value.setdefault(str(value), []).append(key)
+    keys = []
+    while len(tokens) > 1 and len(by_value.get(tokens[-1], ())) == 1:
+        keys.insert(0, by_value.pop(tokens.pop())[0])
+    return tokens, keys
+
+
+def variant_name(strategy_cls, params):
+    """参数变体的结果名称, 沿用原名称 "品种_策略_参数值..." 的写法。
+
+    原名称中写有的参数直接替换为新值, 如 IM_ADX_16 的 N=14 为 IM_ADX_14;
+    名称中没有的参数以 "键值" 依次附在后面, 如 ADX_THRESHOLD=25 为 IM_ADX_16_ADX_THRESHOLD25;
+    换品种时替换品种前缀, 如 IF_ADX_16。
+    """
+    variant = strategy_cls.__dict__.get("_variant_of")
+    if variant is not None:
+        # 变体再取变体: 从原策略类出发, 名称包含两次覆盖的全部参数
+        base, base_params = variant
+        return variant_name(base, {**base_params, **params})
+    if "name" in params:
+        return params["name"]
+    cls = strategy_cls
+    symbol = params.get("symbol", cls.symbol)
+    label, keys = _named_params(cls)
+    extras = [f"{k}{v}" for k, v in sorted(params.items())
+              if k != "symbol" and k not in keys and k not in _UNNAMED_ATTRS]
+    if symbol == cls.symbol and not extras and all(params.get(k, getattr(cls, k)) == getattr(cls, k)
+                                                   for k in keys):
+        return cls.name
+    head = [symbol] if cls.name.startswith(f"{cls.symbol}_") or symbol != cls.symbol else []
+    values = [str(params.get(k, getattr(cls, k))) for k in keys]
+    return "_".join(head + label + values + extras)
+
+
+@lru_cache(maxsize=None)
+def _make_variant(strategy_cls, items):
+    params = dict(items)
+    attrs = dict(params, name=variant_name(strategy_cls, params))
+    attrs["__module__"] = strategy_cls.__module__
+    attrs["_variant_of"] = (strategy_cls, params)   # pickle 时据此在子进程中重新生成 (见 StrategyType)
+    return type(strategy_cls.__name__, (strategy_cls,), attrs)
+
+
+def make_variant(strategy_cls, params):
+    """以类属性覆盖的方式生成参数变体子类; 空参数时返回原类。变体可 pickle, 能直接用于 n_jobs > 1。"""
+    if not params:
+        return strategy_cls
+    return _make_variant(strategy_cls, tuple(sorted(params.items())))
+
+
+def load_key(strategy_cls):
+    # 读取的行情相同 (品种、数据目录、预热) 的策略可共用一份行情; K线周期不同时由分钟行情合成
+    cls = strategy_cls
+    return (cls.symbol, cls.data_dir, cls.store_dir, cls.warmup_bars, cls.gap_mode)
+
+
+def work_days(strategy_classes, tradedates):
+    """tradedates 中至少一个策略有数据的交易日; 数据来源相同的策略只查询一次数据目录索引。"""
+    work = set()
+    for cls in {load_key(cls): cls for cls in strategy_classes}.values():
+        work.update(split_work(cls, tradedates)[0])
+    return [td for td in tradedates if td in work]
+
+
+def sweep_day(strategy_cls, combos, td):
+    """单日: 每个数据来源读取一次行情, 依次运行其下的参数组合。
+
+    返回各组合的日收益; 某组合当日无数据时为 NaN, 全部无数据时返回 None。
+    网格可含 symbol / data_dir 等参数, 各组合按自己的品种与数据目录读取行情。
+    """
+    variants = [make_variant(strategy_cls, params) for params in combos]
+    groups = {}
+    for k, cls in enumerate(variants):
+        groups.setdefault(load_key(cls), []).append(k)
+
+    rets = np.full(len(combos), np.nan)
+    has_data = False
+    for members in groups.values():
+        first = variants[members[0]]
+        base = first(td, first.symbol)
+        try:
+            base.getOrgData()
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            continue
+        has_data = True
+        caches = {}   # 中间量按K线周期分开共享 (同一份行情内)
+        for k in members:
+            stg = variants[k](td, variants[k].symbol)
+            stg.share_data(base)
+            stg.cache = caches.setdefault(stg.bar_period, DayCache())
+            stg.run_backtest()
+            rets[k] = np.sum(stg.PNL)
+    return rets if has_data else None
+
+
+def sweep_table(strategy_cls, combos, daily):
+    # 日收益矩阵 -> 每个组合一行的结果表; 各组合只统计自己有数据的交易日
+    rows = []
+    for params, col in zip(combos, daily.columns):
+        ret = daily[col].dropna()
+        df = pd.DataFrame({"date": ret.index, "ret": ret.values})
+        df["cum_ret"] = np.cumsum(df["ret"])
+        rows.append({**params, "name": col, **(calc_metrics(df) if len(df) else {})})
+    return pd.DataFrame(rows)
+
+
+def run_sweep(strategy_cls, grid, n_jobs=1, tradedates=None, save=True):
+    """参数扫描, 返回 (结果表, 日收益矩阵)。
+
+    grid: {参数名: 取值列表}, 参数名为策略类属性 (如 N, MDAY, NSTD)
+    n_jobs: 交易日在进程池中并行, 语义同 run_backtest
+    tradedates: 指定交易日列表, 默认从 min_date 起的全部交易日; 无数据的交易日预先剔除
+    日收益矩阵中某组合当日无数据 (如网格含 symbol 而该品种缺这一天) 时为 NaN
+    """
+    combos = param_grid(grid)
+    names = [variant_name(strategy_cls, p) for p in combos]
+    if tradedates is None:
+        tradedates = load_tradedates(strategy_cls.min_date)
+    tradedates = work_days([make_variant(strategy_cls, p) for p in combos], tradedates)
+
+    dates, rows = [], []
+    for td, rets in map_days(sweep_day, tradedates, n_jobs, strategy_cls, combos):
+        if rets is None:
+            continue
+        dates.append(td)
+        rows.append(rets)
+
+    daily = pd.DataFrame(np.array(rows).reshape(len(rows), len(combos)),
+                         index=pd.Index(dates, name="date"), columns=names)
+    table = sweep_table(strategy_cls, combos, daily)
+
+    if save:
+        result_dir = get_result_dir(strategy_cls)
+        table_path = os.path.join(result_dir, f"{strategy_cls.name}_sweep.csv")
+        table.to_csv(table_path, index=False)
+        daily.to_csv(os.path.join(result_dir, f"{strategy_cls.name}_sweep_daily.csv"))
+        print(f"参数扫描结果已保存到：{table_path}")
+
+    return table, daily
@@ -0,0 +1,172 @@
+"""
+滚动前推优化 (Walk-Forward Optimization)
+
+把交易日历切成若干 "训练 / 测试" 折, 每折在训练窗口上按指标选出最优参数,
+再在紧随其后的测试窗口上检验, 各折测试段拼接起来即样本外收益曲线:
+    rolling  : 训练窗口长度固定, 随折向后滑动
+    anchored : 训练窗口起点固定在第一天, 逐折变长
+窗口长度按 tradedates.csv 中的交易日计数, 不受个别交易日缺数据影响。
+
+逐日结果只算一次: 先对所有折覆盖的交易日一次性运行全部参数组合 (同 run_sweep,
+每日读取一次行情、同日各组合共用 DayCache, 交易日分段在进程池中并行),
+得到 (交易日 × 组合) 日收益矩阵; 各折的训练与测试只是对矩阵切片打分, 相互重叠的
+折不会重复回测。已有的参数扫描日收益矩阵 ({name}_sweep_daily.csv) 也可直接传入。
+网格可含 symbol: 各组合在自己品种的行情上回测, 矩阵中某品种缺数据的交易日为 NaN, 打分时跳过。
+
+用法:
+    from CTA_BT.walk_forward import walk_forward
+    folds, oos, metrics = walk_forward(
+        BollingerStrategy, {"MDAY": [10, 15, 20], "NSTD": [2.0, 2.125]},
+        train_days=242, test_days=60, mode="rolling", metric="sharpe", n_jobs=8)
+
+    python -m CTA_BT.walk_forward Bollinger.strategy.BollingerStrategy MDAY=10,15,20 \
+        --train 242 --test 60 --mode anchored --jobs 8
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.CTA_BTv3 import calc_metrics, get_result_dir, load_tradedates
+from CTA_BT.metrics import column_metrics
+from CTA_BT.sweep import param_grid, parse_grid, run_sweep, variant_name
+
+
+MODES = ("rolling", "anchored")
+METRICS = ("sharpe", "calmar", "annual_ret")
+
+
+def make_folds(tradedates, train_days, test_days, step=None, mode="rolling"):
+    """切分训练 / 测试折, 返回 [(训练交易日列表, 测试交易日列表)]。
+
+    step: 相邻两折的间隔交易日数, 默认等于 test_days (测试段首尾相接、互不重叠)
+    最后不足 test_days 的尾段也作为一折测试。
+    """
+    if mode not in MODES:
+        raise ValueError(f"未知的切分方式: {mode}, 可选 {MODES}")
+    if train_days < 1 or test_days < 1:
+        raise ValueError("train_days 与 test_days 须为正整数")
+    step = step or test_days
+    tds = list(tradedates)
+
+    folds = []
+    test_start = train_days
+    while test_start < len(tds):
+        train_start = 0 if mode == "anchored" else test_start - train_days
+        folds.append((tds[train_start:test_start], tds[test_start:test_start + test_days]))
+        test_start += step
+    return folds
+
+
+def _select(daily, names, train, metric):
+    # 训练窗口内逐列打分, 返回 (最优组合序号, 各组合得分); 全部无效时序号为 None
+    rows = daily.index.isin(train)
+    scores = column_metrics(daily.values[rows])[metric] if rows.any() else \
+        np.full(len(names), np.nan)
+    if np.all(np.isnan(scores)):
+        return None, scores
+    return int(np.nanargmax(scores)), scores
+
+
+def walk_forward(strategy_cls, grid, train_days=242, test_days=60, step=None, mode="rolling",
+                 metric="sharpe", n_jobs=1, tradedates=None, daily=None, save=True):
+    """滚动前推优化, 返回 (逐折结果表, 样本外日收益 DataFrame, 样本外指标)。
+
+    grid: {参数名: 取值列表}, 同 run_sweep
+    metric: 训练窗口上的选参指标, "sharpe" / "calmar" / "annual_ret"
+    tradedates: 交易日历, 默认从 min_date 起的全部交易日
+    daily: 已算好的 (交易日 × 组合) 日收益矩阵, 列名为组合名称; 给出时不再回测
+    """
+    if metric not in METRICS:
+        raise ValueError(f"未知的选参指标: {metric}, 可选 {METRICS}")
+    combos = param_grid(grid)
+    names = [variant_name(strategy_cls, p) for p in combos]
+    if tradedates is None:
+        tradedates = load_tradedates(strategy_cls.min_date)
+    folds = make_folds(tradedates, train_days, test_days, step, mode)
+    if not folds:
+        raise ValueError(f"交易日不足: 共 {len(tradedates)} 天, 训练窗口需 {train_days} 天")
+
+    if daily is None:
+        # 全部折覆盖的交易日只回测一次
+        first, last = folds[0][0][0], folds[-1][1][-1]
+        needed = [td for td in tradedates if first <= td <= last]
+        print(f"{strategy_cls.name}: {len(folds)} 折, {len(combos)} 组参数, 回测 {len(needed)} 个交易日")
+        _, daily = run_sweep(strategy_cls, grid, n_jobs=n_jobs, tradedates=needed, save=False)
+    else:
+        daily = daily[names]
+
+    rows, oos_parts = [], []
+    for k, (train, test) in enumerate(folds):
+        best, scores = _select(daily, names, train, metric)
+        test_daily = daily[daily.index.isin(test)]
+        row = {
+            "fold": k,
+            "train_start": train[0], "train_end": train[-1],
+            "test_start": test[0], "test_end": test[-1],
+            "train_days": int(daily.index.isin(train).sum()),
+            "test_days": len(test_daily),
+        }
+        if best is None or len(test_daily) == 0:
+            rows.append({**row, "name": None})
+            continue
+
+        # 所选组合在测试段无数据的交易日 (如其品种缺这一天) 不计入样本外收益
+        test_ret = test_daily[names[best]].dropna()
+        part = pd.DataFrame({"date": test_ret.index, "ret": test_ret.values,
+                             "fold": k, "name": names[best]})
+        oos_parts.append(part)
+        test_m = column_metrics(test_ret.values[:, None])
+        rows.append({
+            **row, "name": names[best], **combos[best],
+            f"train_{metric}": scores[best],
+            **{f"test_{key}": float(v[0]) for key, v in test_m.items()},
+        })
+
+    table = pd.DataFrame(rows)
+    if oos_parts:
+        oos = pd.concat(oos_parts, ignore_index=True)
+    else:
+        oos = pd.DataFrame(columns=["date", "ret", "fold", "name"])
+    oos["cum_ret"] = np.cumsum(oos["ret"].astype(np.float64))
+    metrics = calc_metrics(oos) if len(oos) else {}
+
+    if save:
+        result_dir = get_result_dir(strategy_cls)
+        table_path = os.path.join(result_dir, f"{strategy_cls.name}_walkforward.csv")
+        table.to_csv(table_path, index=False)
+        oos.to_csv(os.path.join(result_dir, f"{strategy_cls.name}_walkforward_oos.csv"), index=False)
+        print(f"滚动前推结果已保存到：{table_path}")
+    return table, oos, metrics
+
+
+def main(argv=None):
+    from CTA_BT.strategies import load_strategy
+
+    parser = argparse.ArgumentParser(description="滚动前推优化: 训练窗口选参, 测试窗口检验")
+    parser.add_argument("strategy", help="策略类路径, 如 Bollinger.strategy.BollingerStrategy")
+    parser.add_argument("grid", nargs="+", help="参数网格, 如 MDAY=10,15,20 NSTD=2.0,2.125")
+    parser.add_argument("--train", type=int, default=242, help="训练窗口交易日数")
+    parser.add_argument("--test", type=int, default=60, help="测试窗口交易日数")
+    parser.add_argument("--step", type=int, default=None, help="相邻两折间隔, 默认等于 --test")
+    parser.add_argument("--mode", choices=MODES, default="rolling")
+    parser.add_argument("--metric", choices=METRICS, default="sharpe")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数, -1 为全部CPU核")
+    parser.add_argument("--min-date", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    strategy_cls = load_strategy(args.strategy)
+    tds = load_tradedates(args.min_date or strategy_cls.min_date)
+    table, _, metrics = walk_forward(strategy_cls, parse_grid(args.grid), args.train, args.test,
+                                     args.step, args.mode, args.metric, args.jobs, tds)
+    cols = ["fold", "test_start", "test_end", "name", f"train_{args.metric}", "test_sharpe"]
+    print(table[[c for c in cols if c in table]].to_string(index=False))
+    if metrics:
+        print(f"样本外: 年化 {metrics['annual_ret']:.4f}  夏普 {metrics['sharpe']:.3f}  "
+              f"卡玛 {metrics['calmar']:.3f}  最大回撤 {metrics['max_drawdown']:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""
+跨日指标预热 (Warm-up Buffer)
+
+每个工作进程为每个 (品种, K, 隔夜规则) 保留一个滚动缓冲区, 存放此前连续交易日的
+最后 K 根分钟线。策略开启 warmup_bars = K 后, 当日行情前拼接这 K 根历史K线,
+指标在开盘时已经预热完毕, 不必等待 N / SLOW / MDAY 根K线, 也不需要再读前几日的文件。
+
+规则:
+    1. 历史只取 "截至上一交易日的连续有数据交易日": 上一交易日缺数据时缓冲区清空,
+       当日冷启动 (与未开启预热时一致)。
+    2. 隔夜跳空 gap_mode:
+         "adjust" : 以 今日开盘 / 昨日收盘 的比例缩放历史 OHLC (类似连续合约前复权),
+                    指标看到的是无跳空的连续价格; 成交量、持仓量不调整
+         "raw"    : 原样拼接, 跳空直接进入指标
+    3. 仓位不跨日: 每天仍以空仓开始, 只有指标状态是连续的。
+    4. 缓冲区由顺序运行的交易日增量维护; 进程池中每段的第一天 (或任意不连续的日期)
+       会向前补读历史把缓冲区填满, 因此结果与 n_jobs 及分段方式无关。
+"""
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from CTA_BT.bar_store import N_COLS, load_day
+
+
+GAP_MODES = ("adjust", "raw")
+PRICE_COLS = slice(1, 5)   # open, close, high, low
+
+
+class BarHistory:
+    """最近 K 根分钟线 (已按隔夜规则调整到上一交易日收盘的价格尺度)。"""
+
+    def __init__(self, symbol, k, tradedates, data_dir, store_dir=None, gap_mode="adjust"):
+        if gap_mode not in GAP_MODES:
+            raise ValueError(f"未知的隔夜跳空规则: {gap_mode}, 可选 {GAP_MODES}")
+        self.symbol = symbol
+        self.k = k
+        self.tradedates = tradedates
+        self.data_dir = data_dir
+        self.store_dir = store_dir
+        self.gap_mode = gap_mode
+        self.reset()
+
+    def reset(self):
+        self.bars = np.empty((0, N_COLS))
+        self.last_td = None
+
+    def _gap_factor(self, today):
+        # 今日首根开盘 / 历史最后一根收盘; 任一缺失时不调整
+        if self.gap_mode == "raw" or len(self.bars) == 0 or len(today) == 0:
+            return 1.0
+        factor = today[0, 1] / self.bars[-1, 2]
+        return factor if np.isfinite(factor) and factor > 0 else 1.0
+
+    def _scaled(self, factor):
+        bars = self.bars.copy()
+        if factor != 1.0:
+            bars[:, PRICE_COLS] *= factor
+        return bars
+
+    def push(self, td, today):
+        # 当日收盘后把当日K线并入缓冲区, 只保留最后 K 根; 当日无K线视同缺数据
+        if len(today) == 0:
+            self.reset()
+            return
+        factor = self._gap_factor(today)
+        bars = np.concatenate([self._scaled(factor), np.asarray(today, dtype=np.float64)])
+        self.bars = bars[-self.k:]
+        self.last_td = td
+
+    def _prev_td(self, td):
+        pos = bisect.bisect_left(self.tradedates, td)
+        return self.tradedates[pos - 1] if pos > 0 else None
+
+    def _prime(self, td):
+        # 从 td 的上一交易日向前读取, 直到凑满 K 根或遇到缺数据的交易日
+        self.reset()
+        days = []
+        n_rows = 0
+        pos = bisect.bisect_left(self.tradedates, td)
+        while pos > 0 and n_rows < self.k:
+            pos -= 1
+            prev = self.tradedates[pos]
+            try:
+                arr = load_day(self.symbol, prev, self.data_dir, self.store_dir)
+            except (FileNotFoundError, pd.errors.EmptyDataError):
+                break
+            if len(arr) == 0:
+                break
+            days.append((prev, arr))
+            n_rows += len(arr)
+        for prev, arr in reversed(days):
+            self.push(prev, arr)
+
+    def prefix(self, td, today):
+        """返回拼接在 td 当日行情之前的历史K线 (已按隔夜规则调整)。"""
+        prev = self._prev_td(td)
+        if prev is None:
+            self.reset()
+        elif self.last_td != prev:
+            self._prime(td)
+            if self.last_td != prev:
+                # 上一交易日缺数据: 冷启动
+                self.reset()
+        return self._scaled(self._gap_factor(today))
+
+
+_histories = {}
+
+
+def get_history(symbol, k, tradedates, data_dir, store_dir=None, gap_mode="adjust"):
+    # 进程内按配置复用缓冲区; 同一进程里顺序运行的交易日据此增量更新
+    key = (symbol, k, data_dir, store_dir, gap_mode)
+    hist = _histories.get(key)
+    if hist is None:
+        hist = _histories[key] = BarHistory(symbol, k, tradedates, data_dir, store_dir, gap_mode)
+    return hist
@@ -1,11 +1,13 @@
 #QJTP
 
+import os
 import sys
-sys.path.append(r"E:\StockIndexCTA")
+# 直接运行本文件时把项目根目录加入搜索路径 (也可用 python -m CTA_BT 运行)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from CTA_BT.CTA_BTv3 import BaseStrategy, run_backtest
+from CTA_BT.indicators import RollingMean, rolling_mean, rolling_ols
+from CTA_BT.kernels import size_by
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
 
 class MinStrategy(BaseStrategy):
     # 策略配置
@@ -13,14 +15,9 @@ class MinStrategy(BaseStrategy):
     name = f'{symbol}_QJTP'
     min_date = 20160101
 
-    def getOrgData(self):
-        # 获取原始数据
-        path = fr"E:\StockIndexCTA\Data\{self.symbol}_{self.td}.csv"
-        self.raw_data = pd.read_csv(path)
-
     def prepare_data(self):
         # 准备数据
-        arr = self.raw_data.values
+        arr = self.raw_data
 
         # 计算OHLC的平均值作为核心价格序列
         self.x_series = np.nanmean(arr[:, [1, 2, 3, 4]], axis=1)
@@ -29,6 +26,59 @@ class MinStrategy(BaseStrategy):
         self.openPrice = arr[:, 1]
         self.closePrice = arr[:, 2]
 
+        # --- 整日一次计算回归统计量 ---
+        # 第 i 分钟使用过去5个点 x[i-5:i], 即截至 i-1 的窗口, 故整体后移一位
+        x = self.x_series
+        slope, _, r2 = rolling_ols(x, 5)
+        win_mean = rolling_mean(x, 5)
+
+        self.coef = np.full(len(x), np.nan)
+        self.R2 = np.full(len(x), np.nan)
+        self.cond = np.full(len(x), np.nan)
+
+        # 斜率按窗口均值归一化 (等价于对 lastLine / mean(lastLine) 回归), R2 与缩放无关
+        self.coef[1:] = (slope / win_mean)[:-1]
+        self.R2[1:] = r2[:-1]
+        # 当前价格相对于过去5分钟末端的偏离度
+        self.cond[1:] = x[1:] / x[:-1] - 1
+
+    def init_stream(self):
+        # 实盘逐根推送: 第 i 分钟只用到截至 i-1 的 5 点窗口, 每根K线到达时对该窗口回归一次
+        arr = self.raw_data
+        self.openPrice = arr[:, 1]
+        self.closePrice = arr[:, 2]
+
+        n = len(arr)
+        self.x_series = np.full(n, np.nan)
+        self.coef = np.full(n, np.nan)
+        self.R2 = np.full(n, np.nan)
+        self.cond = np.full(n, np.nan)
+        self._win_mean = RollingMean(5)
+        self._prev_stats = (np.nan, np.nan, np.nan)   # 截至上一分钟窗口的 (斜率, R2, 均值)
+        return True
+
+    def update_stream(self, i):
+        x = self.x_series
+        x[i] = np.nanmean(self.raw_data[i:i + 1, [1, 2, 3, 4]], axis=1)[0]
+        if i > 0:
+            slope, r2, mean = self._prev_stats
+            self.coef[i] = slope / mean
+            self.R2[i] = r2
+            self.cond[i] = x[i] / x[i - 1] - 1
+        slope, _, r2 = rolling_ols(x[max(0, i - 4):i + 1], 5)
+        self._prev_stats = (slope[-1], r2[-1], self._win_mean.update(x[i]))
+
+    def GetPositions(self, start):
+        # 无路径依赖: 每分钟仓位只取决于当分钟的 coef / R2 / cond
+        coef, R2, cond = self.coef, self.R2, self.cond
+        short_cond = (coef >= 0.0005) & (cond > 0.001)
+        long_cond = (coef <= -0.0005) & (cond <= -0.001)
+
+        # 方向由斜率与偏离决定, 仓位大小为拟合优度 R2 (R2 > 0.5 才开仓)
+        direction = np.where(short_cond, -1, np.where(long_cond, 1, 0))
+        pos = size_by(direction, R2, threshold=0.5)
+        pos[:6] = 0
+        return pos
 
     def GetSig(self, i):
         if i < 6:
@@ -36,23 +86,10 @@ class MinStrategy(BaseStrategy):
             self.position = 0
             return
 
-        # 获取数据窗口
-        data = self.x_series[:i+1]
-        nowPoint = data[-1]         # 当前点
-        lastLine = data[-6:-1]      # 过去5个点
-        
-        x = np.linspace(1, len(lastLine), len(lastLine))
-
-        # 线性回归拟合
-        clf = LinearRegression()
-        clf.fit(x.reshape(-1, 1), lastLine / np.nanmean(lastLine))
-        
-        # 计算统计量
-        R2 = clf.score(x.reshape(-1, 1), lastLine / np.nanmean(lastLine)) # 拟合优度
-        coef = clf.coef_[0] # 斜率
-        
-        # 当前价格相对于过去5分钟末端的偏离度
-        cond = nowPoint / lastLine[-1] - 1
+        # 预先算好的统计量
+        R2 = self.R2[i]     # 拟合优度
+        coef = self.coef[i] # 斜率
+        cond = self.cond[i] # 当前价格相对于过去5分钟末端的偏离度
 
         # 交易逻辑: 均值回归 (Reversal Strategy)
         # 1. 如果过去5分钟呈现明显上涨趋势 (coef > 0.0005) 且拟合度高 (R2 > 0.5)